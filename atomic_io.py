@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Atomic IO
+Every output is written to a hidden temp file in its destination folder, fsynced and then
+renamed over the final name, so OneDrive (which does not upload *.tmp files) and readers
+only ever see complete files. Advisory file locks with a timeout keep overlapping runs
+(cron plus a manual rerun) off the same DG folder, history store and alias map
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+LOCK_FOLDER = "_locks"
+LOCK_TIMEOUT_ENV = "SLA_LOCK_TIMEOUT"
+DEFAULT_LOCK_TIMEOUT = 600   # seconds to wait for another run holding the same lock
+LOCK_POLL_SECONDS = 0.5
+
+
+def _temp_path(path):
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _fsync_dir(folder):
+    """Persist the rename itself (POSIX only, Windows cannot open a folder)"""
+    if os.name != "posix":
+        return
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _commit(tmp_path, path):
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+
+
+@contextmanager
+def atomic_path(path):
+    """Temp path for writers that take a file name (parquet, pickle, pstats); renamed over `path` on success"""
+    path = Path(path)
+    tmp_path = _temp_path(path)
+    try:
+        yield tmp_path
+        with open(tmp_path, "r+b") as f:
+            os.fsync(f.fileno())
+        _commit(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+@contextmanager
+def atomic_open(path, mode="w", encoding="utf-8", newline=None):
+    """open() whose file only appears under `path` once it is complete and on disk"""
+    path = Path(path)
+    tmp_path = _temp_path(path)
+    binary = "b" in mode
+    try:
+        with open(tmp_path, mode, encoding=None if binary else encoding, newline=None if binary else newline) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        _commit(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def write_csv(frame, path, **kwargs):
+    """DataFrame.to_csv through a temp file (same bytes as writing to the path directly)"""
+    with atomic_open(path, newline="") as f:
+        frame.to_csv(f, **kwargs)
+    return Path(path)
+
+
+def write_json(data, path, **kwargs):
+    with atomic_open(path) as f:
+        json.dump(data, f, **kwargs)
+    return Path(path)
+
+
+def write_text(path, text):
+    with atomic_open(path) as f:
+        f.write(text)
+    return Path(path)
+
+
+def lock_timeout():
+    """Seconds to wait for a lock ($SLA_LOCK_TIMEOUT, else the default)"""
+    return float(os.environ.get(LOCK_TIMEOUT_ENV) or DEFAULT_LOCK_TIMEOUT)
+
+
+class LockTimeout(TimeoutError):
+    pass
+
+
+def _try_lock(f):
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(f):
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class FileLock:
+    """Exclusive advisory lock on a lock file, shared by processes and by threads of one process.
+
+    The holder's pid, host and start time are written into the file so a waiting run can say
+    who it is waiting for. The file is left in place on release (deleting it would race).
+    """
+
+    def __init__(self, path, timeout=None, label=None):
+        self.path = Path(path)
+        self.timeout = lock_timeout() if timeout is None else timeout
+        self.label = label or self.path.stem
+        self._file = None
+
+    def holder(self):
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _describe_holder(self):
+        holder = self.holder()
+        if not holder:
+            return "another run"
+        return f"pid {holder.get('pid')} on {holder.get('host')} since {holder.get('since')}"
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, "a+", encoding="utf-8")
+        deadline = time.monotonic() + timeout
+        waiting = False
+        while not _try_lock(f):
+            if time.monotonic() >= deadline:
+                f.close()
+                raise LockTimeout(f"{self.label} is locked by {self._describe_holder()} (waited {timeout:.0f}s)")
+            if not waiting:
+                print(f"⏳ Waiting for {self.label} (locked by {self._describe_holder()})...")
+                waiting = True
+            time.sleep(LOCK_POLL_SECONDS)
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps({"pid": os.getpid(), "host": socket.gethostname(),
+                            "since": datetime.now().isoformat(timespec="seconds")}))
+        f.flush()
+        self._file = f
+        return self
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            _unlock(self._file)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def dg_lock(base_path, date, report_name, dg_name, timeout=None):
+    """Lock for one DG's outputs, checkpoints and manifest on one date (kept outside the synced report folders)"""
+    path = Path(base_path) / LOCK_FOLDER / date / report_name / f"{dg_name}.lock"
+    return FileLock(path, timeout, label=f"{report_name}/{dg_name} {date}")
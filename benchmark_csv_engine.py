@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark CSV parser engines on raw source exports
+Times the pandas C parser against pyarrow's multi-threaded memory-mapped reader
+(as used by SourceCache) and checks both return the same frame
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from source_cache import CSV_ENGINES, read_csv_source
+
+
+def time_engine(path, engine, columns, repeat):
+    best = None
+    df = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = read_csv_source(path, columns, engine)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, df
+
+
+def compare_frames(a, b):
+    """None if equal (floats to 1e-9 relative), otherwise a short description of the difference"""
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return f"shape/columns differ: {a.shape} vs {b.shape}"
+    try:
+        pd.testing.assert_frame_equal(a, b, check_dtype=False, rtol=1e-9)
+    except AssertionError as e:
+        return str(e).splitlines()[0]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("files", nargs="+", help="CSV exports (e.g. a DG raw_data/Warehouse.csv)")
+    parser.add_argument("--columns", help="Comma separated projection (default: every column)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per engine, best time is reported")
+    args = parser.parse_args()
+
+    columns = set(args.columns.split(",")) if args.columns else None
+    engines = [e for e in CSV_ENGINES if e != "auto"]
+    print(f"🖥️ CPUs: {os.cpu_count()}")
+
+    for path in map(Path, args.files):
+        size_mb = path.stat().st_size / 1024**2
+        print(f"\n📄 {path.name} ({size_mb:,.1f} MB)")
+        timings = {}
+        frames = {}
+        for engine in engines:
+            timings[engine], frames[engine] = time_engine(path, engine, columns, args.repeat)
+            print(f"  {engine:<8} {timings[engine]:8.2f}s  {size_mb / timings[engine]:8.1f} MB/s  "
+                  f"{len(frames[engine]):,} rows")
+        print(f"  Speedup: {timings['pandas'] / timings['pyarrow']:.2f}x")
+        difference = compare_frames(frames["pandas"], frames["pyarrow"])
+        print("  ✅ Same result" if difference is None else f"  ⚠️ Results differ: {difference}")
+
+
+if __name__ == "__main__":
+    main()
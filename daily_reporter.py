@@ -10,47 +10,37 @@ from datetime import datetime
 from pathlib import Path
 import pandas as pd
 import requests
-import json
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import threading
-import urllib.parse
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import subprocess
 import platform
 
-class LocalWebhookReceiver(BaseHTTPRequestHandler):
-    def do_POST(self):
-        content_length = int(self.headers['Content-Length'])
-        post_data = self.rfile.read(content_length)
-        
-        try:
-            data = json.loads(post_data.decode('utf-8'))
-            print(f"📥 Received webhook: {data}")
-            
-            # Handle different types of commands
-            if 'text' in data:
-                message = data['text']
-                if 'process' in message.lower() or 'run' in message.lower():
-                    print("🎯 Processing command received!")
-                    # Here we would trigger the actual processing
-                    
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "received"}).encode())
-            
-        except Exception as e:
-            print(f"❌ Webhook error: {e}")
-            self.send_response(500)
-            self.end_headers()
-    
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(b"<html><body><h1>Webhook Receiver Active</h1></body></html>")
+from atomic_io import LOCK_TIMEOUT_ENV, LockTimeout, dg_lock, write_csv, write_json
+from status_history import MeterStatusHistory, history_lock
+from sla_uptime import write_uptime_reports
+from status_transitions import (build_transition_reports, find_previous_final_report, read_previous_final,
+                                save_transition_reports)
+from network_health import build_network_health, summarise_network_health, write_network_health
+from outage_attribution import attribute_outages, summarise_outages
+from hierarchy_names import HIERARCHY_LEVELS, HierarchyAliases, alias_fingerprint, resolve_hierarchy
+from data_quality import build_data_quality, summarise_data_quality, write_data_quality
+from sla_utils import most_common, parse_datetimes, status_counts
+from stage_checkpoints import StageCheckpoints, checkpoint_root, fingerprint_files, stage_code_version, stage_key
+from run_manifest import compare_manifest, input_fingerprints, read_manifest, write_manifest
+from stage_dag import DEFAULT_WORKERS, StageDag
+from metrics_exporter import METRICS_DIR_ENV, METRICS_FOLDER, RunMetrics
+from report_registry import ReportDefinition, get_reports, register_report
+from source_cache import CSV_ENGINE_ENV, CSV_ENGINES, SourceCache
+from pipeline_plan import (build_intermediate, build_master, column_projections, expected_columns, expected_files,
+                           load_pipeline_spec, provenance_counts, spec_version)
+from field_extracts import EXTRACT_PARTITIONS, MANUFACTURERS_FOLDER, partition_frame, sanitise_filename, write_extracts
+import legacy_engine
+from preview_estimate import DEFAULT_SAMPLE_SIZE, preview_dg, print_preview
+from upload_validation import find_upload_folders, peek_header, print_validation_table, validate_many, write_validation_json
+
+# Sources, joins, coalesce rules and Final columns of the comms report (pipeline_spec.json)
+PIPELINE_SPEC = load_pipeline_spec()
 
 class DesktopNotifier:
     def __init__(self):
@@ -196,33 +186,14 @@ class TeamsNotifier:
             print(f"Failed to send adaptive card: {e}")
             return False
 
-class WebhookManager:
-    def __init__(self, port=8080):
-        self.port = port
-        self.server = None
-        self.thread = None
-    
-    def start_server(self):
-        """Start local webhook server in background thread"""
-        try:
-            self.server = HTTPServer(('localhost', self.port), LocalWebhookReceiver)
-            self.thread = threading.Thread(target=self.server.serve_forever)
-            self.thread.daemon = True
-            self.thread.start()
-            print(f"🌐 Webhook server started on port {self.port}")
-            return True
-        except Exception as e:
-            print(f"❌ Failed to start webhook server: {e}")
-            return False
-    
-    def stop_server(self):
-        """Stop the webhook server"""
-        if self.server:
-            self.server.shutdown()
-            self.server.server_close()
-            print("🛑 Webhook server stopped")
-
 class DailyReporter:
+    dag_workers = DEFAULT_WORKERS   # concurrent DAG tasks per DG (1 runs them one at a time)
+    extract_partition = "subdivision"   # per-office Final report extracts, see field_extracts (None = off)
+    all_manufacturers = False           # also build per-manufacturer outputs from the same load (Kimbal stays the default)
+    lock_timeout = None                 # seconds to wait for a DG another run holds (None = $SLA_LOCK_TIMEOUT or 600)
+    write_outputs = True                # False keeps every report in memory and writes nothing (see sla_api)
+    engine = "optimised"                # "legacy" builds Master/Final with the pre-planner merge chain (see legacy_engine)
+    
     def __init__(self, base_path=None):
         """Initialize the reporter with base path"""
         if base_path is None:
@@ -239,6 +210,11 @@ class DailyReporter:
         if base_path is None:
             base_path = Path('/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting')
         
+    def set_date(self, date):
+        """Process another date's folder (YYYY-MM-DD) instead of today's"""
+        self.today_date = date
+        self.report_date_folder = self.base_path / date
+    
     def get_report_structure(self, report_name):
         """Get paths for a specific report"""
         report_folder = self.report_date_folder / report_name
@@ -341,332 +317,636 @@ class DailyReporter:
         print(f"✅ Default DG folders created: {', '.join(default_dgs)}")
         return default_dgs
     
-    def process_comms_reporting(self):
-        """Process Communications Reporting for all DG subfolders"""
-        report_name = "Report_1_Comms_Reporting"
+    def process_comms_reporting(self, resume=False, force=False, profile=False, dg_names=None, results=None):
+        """Process Communications Reporting for all DG subfolders (or only `dg_names`)"""
+        return self.process_reports(["comms"], resume=resume, force=force, profile=profile,
+                                    dg_names=dg_names, results=results)
+    
+    def get_report_paths(self, report, dg_name, raw_dir):
+        """Output paths for a registered report; raw data always comes from the source report's folder"""
+        dg_folder = self.report_date_folder / report.folder / dg_name
+        return {
+            "report_folder": dg_folder,
+            "raw_data": raw_dir,
+            "output": dg_folder / "output",
+        }
+    
+    def process_reports(self, report_names=None, resume=False, force=False, profile=False, dg_names=None, results=None):
+        """Process the registered reports (all by default) for every DG, loading each source once per DG.
+
+        dg_names limits the run to those DG folders. A `results` dict is filled with
+        {dg_name: {report name: stage results}} (see process_dg). profile implies force,
+        an up-to-date DG would otherwise be skipped with nothing profiled.
+        """
+        if profile and not force:
+            print("🔬 --profile rebuilds every DG (implies --force)")
+            force = True
+        reports = get_reports(report_names)
+        report_name = "Report_1_Comms_Reporting"  # DG folders and raw_data uploads live here
         print(f"\n{'='*60}")
-        print(f"Processing {report_name} for {self.today_date}")
+        print(f"Processing {', '.join(r.folder for r in reports)} for {self.today_date}")
         print(f"{'='*60}\n")
         
-        # Create date folder if it doesn't exist
-        self.report_date_folder.mkdir(parents=True, exist_ok=True)
-        print(f"✓ Date folder ensured: {self.report_date_folder}")
-            
-        # Create main folder structure and notify
-        main_paths = self.create_structure(report_name)
-        self.notify_folder_creation()
+        if self.write_outputs:
+            # Create date folder if it doesn't exist
+            self.report_date_folder.mkdir(parents=True, exist_ok=True)
+            print(f"✓ Date folder ensured: {self.report_date_folder}")
+                
+            # Create main folder structure and notify
+            main_paths = self.create_structure(report_name)
+            self.notify_folder_creation()
+        elif not (self.report_date_folder / report_name).exists():
+            print(f"❌ No {report_name} folder for {self.today_date}: {self.report_date_folder / report_name}")
+            return False
                 
         # Get all DG subfolder structures
         dg_structures = self.get_dg_report_structures(report_name)
                 
         # If no DG subfolders exist, create default ones (DG1, DG2, DG3)
-        if not dg_structures:
+        if not dg_structures and self.write_outputs:
             print(f"\n⚠️ No existing DG subfolders found in {report_name}")
             print(f"   Creating default DG structure...")
             default_dgs = self.create_default_dg_structure(report_name)
             # Re-fetch structures after creation
             dg_structures = self.get_dg_report_structures(report_name)
             
+        if dg_names is not None:
+            missing = [name for name in dg_names if name not in dg_structures]
+            if missing:
+                print(f"⚠️ DG folder(s) not found for {self.today_date}: {missing}")
+            dg_structures = {name: paths for name, paths in dg_structures.items() if name in dg_names}
+            
         if not dg_structures:
-            print(f"❌ Failed to create DG subfolders")
+            print(f"❌ Failed to create DG subfolders" if dg_names is None else f"❌ No DG subfolders to process")
             return False
                 
         print(f"📁 Found {len(dg_structures)} DG subfolder(s): {list(dg_structures.keys())}")
             
-        # Process each DG subfolder
-        for dg_name, paths in dg_structures.items():
-            print(f"\n--- Processing {dg_name} ---")
-            raw_dir = paths["raw_data"]
-                        
-            # Validate filenames before processing
-            if not self.validate_filenames(raw_dir):
-                continue  # Skip this DG if files are invalid
-                        
-            # Validate columns before processing (warnings only, don't skip)
-            self.validate_columns(raw_dir)
-            # Continue processing even if column validation has warnings
-                        
-            # Ensure structure exists
-            paths = self.create_dg_structure(report_name, dg_name)
-            raw_dir = paths["raw_data"]
-                        
-            # Skip if raw_data folder is empty
-            if not raw_dir.exists() or not any(raw_dir.iterdir()):
-                print(f"⚠️ Raw data folder for {dg_name} is empty or doesn't exist, skipping...")
-                continue
+        # Run metrics are written even if a DG fails, so a scraper can alert on it
+        metrics = RunMetrics(self.today_date, report_name)
+        completed = False
+        try:
+            # Each DG is locked while it runs. A DG another process holds is retried after the
+            # others (waiting up to the lock timeout), and its manifest check then skips it if
+            # that run already rebuilt it
+            queue = [(dg_name, paths, 0) for dg_name, paths in dg_structures.items()]
+            while queue:
+                dg_name, paths, timeout = queue.pop(0)
+                try:
+                    locks = self.lock_dg(reports, dg_name, timeout)
+                except LockTimeout as e:
+                    if timeout == 0:
+                        print(f"🔒 {dg_name} is being processed by another run, coming back to it after the other DGs")
+                        queue.append((dg_name, paths, None))
+                    else:
+                        print(f"❌ Skipping {dg_name}: {e}")
+                        metrics.record_dg(dg_name, None, None, paths["output"], False)
+                    continue
+                try:
+                    self.process_dg_folder(dg_name, paths, reports, report_name, metrics, resume, force, profile, results)
+                finally:
+                    for lock in locks:
+                        lock.release()
+            completed = True
+        finally:
+            metrics.finish(success=completed)
+            try:
+                if self.write_outputs:
+                    metrics.write(self.get_metrics_dir())
+            except Exception as e:
+                print(f"⚠️ Could not write metrics file: {e}")
             
-            # Stats tracking
-            stats = {}
+        print(f"\n{'='*60}")
+        print(f"✅ Processing completed for all DG subfolders")
+        print(f"{'='*60}")
+        return True
+    
+    def lock_dg(self, reports, dg_name, timeout=None):
+        """Take the DG lock of every report folder, in sorted order so two runs cannot deadlock"""
+        locks = []
+        if not self.write_outputs:
+            return locks  # an in-memory run only reads the DG folder
+        try:
+            for folder in sorted({report.folder for report in reports}):
+                lock = dg_lock(self.base_path, self.today_date, folder, dg_name,
+                               self.lock_timeout if timeout is None else timeout)
+                locks.append(lock.acquire())
+        except LockTimeout:
+            for lock in locks:
+                lock.release()
+            raise
+        return locks
+    
+    def process_dg_folder(self, dg_name, paths, reports, report_name, metrics, resume=False, force=False, profile=False,
+                          results=None):
+        """Process the registered reports of one DG folder (the caller holds its DG locks)"""
+        print(f"\n--- Processing {dg_name} ---")
+        raw_dir = paths["raw_data"]
+        
+        # Skip reports whose inputs, code and outputs match the last run's manifest
+        # (an in-memory run always builds, its results are what the caller wants)
+        inputs = self.get_manifest_inputs(report_name, dg_name, raw_dir) if raw_dir.exists() and self.write_outputs else None
+        pending = []
+        for report in reports:
+            stages = report.stages(self)
+            report_paths = self.get_report_paths(report, dg_name, raw_dir)
+            if not force and inputs is not None:
+                reasons = compare_manifest(read_manifest(report_paths["output"]), inputs,
+                                           self.get_pipeline_version(stages), report_paths["output"])
+                if not reasons:
+                    print(f"⏭️ {dg_name} {report.name} report is up to date (run manifest matches), skipping. Use --force to rebuild.")
+                    metrics.record_skipped(dg_name, report=report.folder)
+                    continue
+                print(f"🔄 Rebuilding {dg_name} {report.name} report: " + "; ".join(reasons[:10]) + (f" (+{len(reasons) - 10} more)" if len(reasons) > 10 else ""))
+            pending.append((report, stages))
+        if not pending:
+            return
                 
-            # 1. Load Warehouse base
-            warehouse_path = raw_dir / "Warehouse.csv"
-            if not warehouse_path.exists():
-                print(f"❌ Base file {warehouse_path.name} not found in {dg_name}")
-                continue
+        # Validate filenames before processing
+        if not self.validate_filenames(raw_dir):
+            return  # Skip this DG if files are invalid
                 
-            print(f"📦 Loading Warehouse base...")
-            df_master = pd.read_csv(warehouse_path)
-            df_master['Meter Serial No'] = df_master['Meter Serial No'].astype(str).str.strip()
-            
-            # Filter for Kimbal manufacturer only
-            if 'Manufacturer' in df_master.columns:
-                original_count = len(df_master)
-                df_master = df_master[df_master['Manufacturer'].str.contains('KIMBAL', case=False, na=False)]
-                filtered_count = len(df_master)
-                print(f"🔍 Filtered manufacturers: {original_count} → {filtered_count} meters (Kimbal only)")
-            
-            stats['Warehouse'] = {'total': len(df_master)}
+        # Validate columns before processing (warnings only, don't skip)
+        self.validate_columns(raw_dir)
+        # Continue processing even if column validation has warnings
                 
-            # 2. Merge New_Service_connection
-            nsc_path = raw_dir / "New_Service_connection.csv"
-            if nsc_path.exists():
-                print(f"🔗 Merging {nsc_path.name}...")
-                df_nsc = pd.read_csv(nsc_path)
-                df_nsc['New Meter QR Code '] = df_nsc['New Meter QR Code '].astype(str).str.strip()
-                    
-                # Track mapping stats
-                matched = df_nsc['New Meter QR Code '].isin(df_master['Meter Serial No']).sum()
-                stats['New_Service_connection'] = {
-                    'total': len(df_nsc),
-                    'mapped': matched,
-                    'unmapped': len(df_nsc) - matched
-                }
-                    
-                df_master = pd.merge(df_master, df_nsc, left_on='Meter Serial No', right_on='New Meter QR Code ', how='left', suffixes=('', '_NSC'))
+        # Ensure structure exists
+        if self.write_outputs:
+            paths = self.create_dg_structure(report_name, dg_name)
+            raw_dir = paths["raw_data"]
                 
-            # 3. Merge Merged_CI-MI
-            ci_mi_path = raw_dir / "Merged_CI-MI.csv"
-            if ci_mi_path.exists():
-                print(f"🔗 Merging {ci_mi_path.name}...")
-                df_ci_mi = pd.read_csv(ci_mi_path)
-                df_ci_mi['New Meter QR Code'] = df_ci_mi['New Meter QR Code'].astype(str).str.strip()
-                    
-                # Track mapping stats
-                matched = df_ci_mi['New Meter QR Code'].isin(df_master['Meter Serial No']).sum()
-                stats['Merged_CI-MI'] = {
-                    'total': len(df_ci_mi),
-                    'mapped': matched,
-                    'unmapped': len(df_ci_mi) - matched
-                }
-                    
-                df_master = pd.merge(df_master, df_ci_mi, left_on='Meter Serial No', right_on='New Meter QR Code', how='left', suffixes=('', '_CIMI'))
+        # Skip if raw_data folder is empty
+        if not raw_dir.exists() or not any(raw_dir.iterdir()):
+            print(f"⚠️ Raw data folder for {dg_name} is empty or doesn't exist, skipping...")
+            return
+        
+        # Every report of this DG reads through one cache holding the union of their columns
+        cache = SourceCache.for_folder(raw_dir)
+        for report, _ in pending:
+            cache.require(report.sources)
+        try:
+            for report, stages in pending:
+                report_paths = self.get_report_paths(report, dg_name, raw_dir)
+                report_results = None if results is None else {}
+                if self.write_outputs:
+                    report_paths["output"].mkdir(parents=True, exist_ok=True)
+                if not self.process_dg(dg_name, report.folder, report_paths, resume=resume, metrics=metrics,
+                                       profile=profile, stages=stages, results=report_results):
+                    continue
+                if results is not None:
+                    results.setdefault(dg_name, {})[report.name] = report_results
+                if self.write_outputs:
+                    try:
+                        if inputs is None:
+                            inputs = self.get_manifest_inputs(report_name, dg_name, raw_dir)
+                        write_manifest(report_paths["output"], self.today_date, dg_name, inputs,
+                                       self.get_pipeline_version(stages))
+                    except Exception as e:
+                        print(f"⚠️ Could not write run manifest: {e}")
+        finally:
+            SourceCache.release(raw_dir)
     
-            # 4. Merge Meter_Installation
-            mi_path = raw_dir / "Meter_Installation.csv"
-            if mi_path.exists():
-                print(f"🔗 Merging {mi_path.name}...")
-                df_mi = pd.read_csv(mi_path)
-                df_mi['New Meter Number Scan'] = df_mi['New Meter Number Scan'].astype(str).str.strip()
-                    
-                # Track mapping stats
-                matched = df_mi['New Meter Number Scan'].isin(df_master['Meter Serial No']).sum()
-                stats['Meter_Installation'] = {
-                    'total': len(df_mi),
-                    'mapped': matched,
-                    'unmapped': len(df_mi) - matched
-                }
-                    
-                df_master = pd.merge(df_master, df_mi, left_on='Meter Serial No', right_on='New Meter Number Scan', how='left', suffixes=('', '_MI'))
+    def is_kimbal(self, df):
+        """Rows of the default (Kimbal-only) report"""
+        if 'Manufacturer' not in df.columns:
+            return pd.Series(True, index=df.index)
+        return df['Manufacturer'].str.contains('KIMBAL', case=False, na=False)
     
-            # 5. Merge Node ID
-            node_id_path = raw_dir / "Node ID.xlsx"
-            if node_id_path.exists():
-                print(f"🔗 Merging {node_id_path.name}...")
-                df_node = pd.read_excel(node_id_path)
-                df_node['Meter Number'] = df_node['Meter Number'].astype(str).str.strip()
-                    
-                # Track mapping stats
-                matched = df_node['Meter Number'].isin(df_master['Meter Serial No']).sum()
-                stats['Node_ID'] = {
-                    'total': len(df_node),
-                    'mapped': matched,
-                    'unmapped': len(df_node) - matched
-                }
-                    
-                df_master = pd.merge(df_master, df_node, left_on='Meter Serial No', right_on='Meter Number', how='left')
-                # Ensure only one NodeId exists (the excel has NodeId column)
-                if 'NodeId' in df_master.columns:
-                    print(f"✅ NodeId merged successfully")
+    def get_comms_stages(self):
+        """Ordered (name, function, checkpointed) stages run for each DG"""
+        return [
+            ("load_sources", self.stage_load_sources, True),
+            ("build_master", self.stage_build_master, True),
+            ("build_final", self.stage_build_final, True),
+            ("reports", self.stage_reports, False),
+        ]
     
-            # 6. Merge Routing files
-            routing_files = sorted(list(raw_dir.glob("Routings Part-*.xlsx")))
-            if not routing_files: # Check for single Routings.xlsx or similar
-                routing_files = list(raw_dir.glob("Routings*.xlsx"))
-                    
-            if routing_files:
-                print(f"🔗 Merging {len(routing_files)} routing file(s)...")
-                df_routings_list = []
-                for rf in routing_files:
-                    df_routings_list.append(pd.read_excel(rf))
-                    
-                df_routings = pd.concat(df_routings_list, ignore_index=True).drop_duplicates()
-                df_routings['Node ID'] = df_routings['Node ID'].astype(str).str.strip()
-                    
-                if 'NodeId' in df_master.columns:
-                    # Clean NodeId to remove .0 if it's a float before converting to string
-                    def clean_node_id(val):
-                        if pd.isna(val): return ""
-                        try:
-                            return str(int(float(val)))
-                        except:
-                            return str(val).strip()
+    def get_pipeline_version(self, stages=None):
+        """Combined code/config version of every stage and the pipeline spec"""
+        parts = [stage_code_version(func) for _, func, _ in (stages or self.get_comms_stages())]
+        parts.append(spec_version(PIPELINE_SPEC))
+        if self.all_manufacturers:
+            parts.append("all_manufacturers")
+        if self.engine != "optimised":
+            parts.append(f"engine:{self.engine}")
+        return stage_key("pipeline", "|".join(parts))
     
-                    df_master['NodeId_str'] = df_master['NodeId'].apply(clean_node_id)
-                        
-                    # Track mapping stats
-                    matched = df_routings['Node ID'].isin(df_master['NodeId_str']).sum()
-                    stats['Routings'] = {
-                        'total': len(df_routings),
-                        'mapped': matched,
-                        'unmapped': len(df_routings) - matched
-                    }
-                        
-                    df_master = pd.merge(df_master, df_routings, left_on='NodeId_str', right_on='Node ID', how='left', suffixes=('', '_ROUTING'))
-                    df_master.drop(columns=['NodeId_str'], inplace=True)
-                    print(f"✅ Routing data merged successfully")
-                else:
-                    print(f"⚠️ Skipping routing merge: NodeId not found in master data")
+    def get_manifest_inputs(self, report_name, dg_name, raw_dir):
+        """Raw files plus the previous day's Final report (used for status transitions) and the manual hierarchy aliases"""
+        _, previous_path = find_previous_final_report(self.base_path, dg_name, self.today_date, report_name)
+        inputs = input_fingerprints(raw_dir, [("previous_final_report", previous_path)])
+        inputs["hierarchy_aliases"] = alias_fingerprint(self.base_path)
+        return inputs
     
-            # Summary of missing data in master file
-            print(f"\n{'='*60}")
-            print(f"MAPPING & MISSING DATA SUMMARY FOR {dg_name}")
-            print(f"{'='*60}")
-            print(f"Warehouse Base: {stats['Warehouse']['total']} records")
-                
-            for key, s in stats.items():
-                if key == 'Warehouse': continue
-                print(f"\nSource: {key}")
-                print(f"  - Total records in source: {s['total']}")
-                print(f"  - Successfully mapped to master: {s['mapped']}")
-                print(f"  - Unmapped (Missing in Warehouse): {s['unmapped']}")
-                
-            print(f"\nMaster Data Coverage (Missing values in master):")
-            if 'NodeId' in df_master.columns:
-                missing_node = df_master['NodeId'].isna().sum()
-                print(f"  - Meters without Node ID: {missing_node} ({stats['Warehouse']['total'] - missing_node} found)")
-                
-            if 'Gateway ID' in df_master.columns:
-                missing_route = df_master['Gateway ID'].isna().sum()
-                print(f"  - Meters without Routing Info: {missing_route} ({stats['Warehouse']['total'] - missing_route} found)")
-                
-            print(f"{'='*60}\n")
-                
-            # Save master result
-            master_output_path = paths["output"] / f"Master_SLA_Report_{self.today_date}.csv"
-            df_master.to_csv(master_output_path, index=False)
-            print(f"\n✨ Master report created: {master_output_path.name}")
+    def get_metrics_dir(self):
+        """Prometheus textfile-collector folder ($SLA_METRICS_DIR, else _metrics under the base path)"""
+        return Path(os.environ.get(METRICS_DIR_ENV) or self.base_path / METRICS_FOLDER)
+    
+    def get_checkpoint_dir(self, report_name, dg_name):
+        """Checkpoints live in a local folder outside the synced base path (see stage_checkpoints.checkpoint_root)"""
+        return checkpoint_root(self.base_path) / self.today_date / report_name / dg_name
+    
+    def process_dg(self, dg_name, report_name, paths, resume=False, metrics=None, profile=False, stages=None,
+                   results=None):
+        """Run the stages for one DG, optionally resuming from the last valid checkpoint.
+
+        A `results` dict receives every stage's state (DataFrames, stats, aggregates), the
+        report frames by label under "reports", the JSON summary and the stage timings.
+        """
+        stages = stages or self.get_comms_stages()
+        checkpoints = StageCheckpoints(self.get_checkpoint_dir(report_name, dg_name), checkpoint_root(self.base_path))
+        
+        # Each stage key chains the upstream key, so any change re-runs everything below it
+        raw_files = [f for f in paths["raw_data"].iterdir() if f.is_file() and not f.name.startswith('.')]
+        inputs = {"date": self.today_date, "raw_files": fingerprint_files(raw_files), "spec": spec_version(PIPELINE_SPEC)}
+        if self.all_manufacturers:
+            inputs["all_manufacturers"] = True
+        if self.engine != "optimised":
+            inputs["engine"] = self.engine
+        # Only build_final reads the alias map (its manual rows; the spellings a run appends do not count)
+        stage_inputs = {"build_final": {"hierarchy_aliases": alias_fingerprint(self.base_path)}}
+        keys = []
+        for i, (name, func, _) in enumerate(stages):
+            keys.append(stage_key(name, stage_code_version(func), keys[-1] if keys else None,
+                                  inputs if i == 0 else stage_inputs.get(name)))
+        
+        start, state = 0, None
+        if resume:
+            # Keys are chained, so the last valid checkpoint also vouches for every stage above it
+            # (the raw-source stage is only checkpointed by --resume runs)
+            for i, (name, _, checkpointed) in enumerate(stages):
+                if not checkpointed:
+                    break
+                if checkpoints.is_valid(name, keys[i]):
+                    start = i + 1
+            if start:
+                state = checkpoints.load(stages[start - 1][0])
+                print(f"⏩ Resuming {dg_name} after checkpoint '{stages[start - 1][0]}'")
+            else:
+                print(f"ℹ️ No valid checkpoint for {dg_name}, running all stages")
+        
+        # Stages run one after another, but the CSV writes, checkpoint saves and report tasks
+        # they hand back are scheduled on the DAG and overlap with whatever comes next
+        profiler = None
+        if profile:
+            # One worker so a single profiler sees every task in turn
+            from profiling import DGProfiler
+            profiler = DGProfiler(paths["output"], dg_name, self.today_date)
+            dag = StageDag(max_workers=1, task_wrapper=profiler.wrap)
+            profiler.start()
+        else:
+            dag = StageDag(max_workers=self.dag_workers)
+        scheduled_writes = {}
+        previous = None
+        success = False
+        try:
+            for i in range(start, len(stages)):
+                name, func, checkpointed = stages[i]
+                print(f"▶️ Stage {name} ({dg_name})")
+                dag.add(name, lambda prev=state, func=func: func(dg_name, report_name, paths, prev),
+                        [previous] if previous else [])
+                state = dag.result(name)
+                if state is None:
+                    return False
+                previous = name
                 
-            # 7. Create Intermediate File with specific fields
-            print(f"📝 Creating intermediate report...")
+                write_tasks = []
+                for path, frame, label in state.pop("writes", []):
+                    if results is not None:
+                        results.setdefault("reports", {})[label] = frame
+                    if not self.write_outputs:
+                        continue
+                    task_name = f"write {path.name}"
+                    dag.add(task_name, lambda path=path, frame=frame, label=label: self.write_csv_output(path, frame, label),
+                            after=[name])
+                    scheduled_writes[path] = task_name
+                    write_tasks.append(task_name)
                 
-            # Coalesce fields from multiple sources to fill blanks
-            print(f"🔄 Coalescing data from multiple sources...")
+                # The raw-source stage is only pickled for --resume runs (it is just the raw files re-read)
+                if checkpointed and self.write_outputs and (resume or i > 0):
+                    dag.add(f"checkpoint {name}",
+                            lambda name=name, key=keys[i], saved=state: self.save_checkpoint(checkpoints, name, key, saved),
+                            after=[name] + write_tasks)
                 
-            def coalesce_cols(df, base_col, sources):
-                result = df[base_col].copy() if base_col in df.columns else pd.Series([pd.NA] * len(df))
-                for s in sources:
-                    if s in df.columns:
-                        result = result.fillna(df[s])
-                return result
+                # Report tasks take other tasks' results as inputs, and may also wait for an output file
+                for task_name, task_func, task_inputs, wait_for in state.pop("tasks", []):
+                    after = [name] + [scheduled_writes[p] for p in wait_for if p in scheduled_writes]
+                    dag.add(task_name, task_func, task_inputs, after=after)
+                if results is not None:
+                    results.update(state)
+            dag.wait()
+            success = True
+            # A finished DG has nothing to resume; only failed runs keep their checkpoints
+            if self.write_outputs:
+                checkpoints.clear()
+        finally:
+            dag.close()
+            timings = dag.report(f"STAGE TIMINGS FOR {dg_name}")
+            if profiler is not None:
+                profiler.stop()
+            if metrics is not None:
+                metrics.record_dg(dg_name, timings, dag.peek("json_summary"), paths["output"], success, report=report_name)
+            if results is not None:
+                results["summary"] = dag.peek("json_summary")
+                results["timings"] = timings
+        return True
     
-            # Map the coalesced columns
-            df_master['Final_Feeder'] = coalesce_cols(df_master, 'Feeder Name(From Field)', ['Feeder Name(From Field)_CIMI', 'Feeder Name(From Field)_MI'])
-            df_master['Final_ConsName'] = coalesce_cols(df_master, 'Consumer Name', ['Consumer name', 'Consumer Name_MI'])
-            df_master['Final_Address'] = coalesce_cols(df_master, 'Address', ['address', 'Address_MI'])
-            df_master['Final_Mobile'] = coalesce_cols(df_master, 'Mobile Number', ['Mobile Number_CIMI', 'Mobile Number_MI'])
-            df_master['Final_Lat'] = coalesce_cols(df_master, 'Latitude', ['Latitude_CIMI', 'Latitude_MI'])
-            df_master['Final_Long'] = coalesce_cols(df_master, 'Longitude', ['Longitude_CIMI', 'Longitude_MI'])
-            df_master['Final_Subdivision'] = coalesce_cols(df_master, 'Installed Sub Division', ['Sub Division Name', 'Sub Division Name_CIMI', 'Sub Division Name_MI'])
+    def write_csv_output(self, path, frame, label):
+        """Write one of the large per-DG CSV reports (run as a DAG task)"""
+        write_csv(frame, path, index=False)
+        print(f"✨ {label} created: {path.name}")
+        return path
     
-            # Define the mapping (Requested Name: Final Column Name)
-            column_mapping = {
-                "Meter Serial No": "Meter Serial No",
-                "Node ID": "NodeId",
-                "Manufacturer": "Manufacturer",
-                "Installation Status": "Installation Status",
-                "Installation date": "Installation date",
-                "Consumer No": "Consumer No",
-                "Division": "Division",
-                "Subdivision": "Final_Subdivision",
-                "Circle": "Circle",
-                "Feeder Name": "Final_Feeder",
-                "Cons Name": "Final_ConsName",
-                "Cons Address": "Final_Address",
-                "Mob No.": "Final_Mobile",
-                "Latitude": "Final_Lat",
-                "Longitude": "Final_Long",
-                "Gateway ID": "Gateway ID",
-                "Hop Count": "Hop Count",
-                "Sink ID": "Sink ID",
-                "Communicated At": "Communicated At",
-                "Source Endpoint": "Source Endpoint"
-            }
-                
-            # Select and rename columns
-            final_cols = []
-            rename_dict = {}
-            missing_columns = []
-                    
-            for requested, actual in column_mapping.items():
-                if actual in df_master.columns:
-                    final_cols.append(actual)
-                    rename_dict[actual] = requested
-                else:
-                    missing_columns.append(requested)
-                    print(f"⚠️ Column {requested} ({actual}) not found")
-                            
-            df_intermediate = df_master[final_cols].rename(columns=rename_dict)
-                    
-            # Add missing columns with empty values
-            for missing_col in missing_columns:
-                df_intermediate[missing_col] = ""
-                
-            intermediate_output_path = paths["output"] / f"Intermediate_SLA_Report_{self.today_date}.csv"
-            df_intermediate.to_csv(intermediate_output_path, index=False)
-            print(f"✨ Intermediate report created: {intermediate_output_path.name}")
+    def save_checkpoint(self, checkpoints, name, key, state):
+        """Persist a stage checkpoint once its output files are on disk"""
+        try:
+            checkpoints.save(name, key, state, state.get("outputs", []))
+        except Exception as e:
+            print(f"⚠️ Could not save checkpoint '{name}': {e}")
     
-            # 8. Create Final Report with Comm Status
-            print(f"📡 Calculating Comm Status for Final Report...")
-            df_final = df_intermediate.copy()
-                
-            def calculate_comm_status(comm_at):
-                if pd.isna(comm_at) or str(comm_at).strip() == "":
-                    return "Never Comm"
-                try:
-                    # Try parsing the date (Handling DD-MM-YYYY HH:MM:SS)
-                    dt = pd.to_datetime(comm_at, dayfirst=True, errors='coerce')
-                    if pd.isna(dt):
-                        return "Never Comm"
-                    
-                    # Compare communication date with folder date
-                    comm_date_str = dt.strftime("%Y-%m-%d")
-                    
-                    if comm_date_str == self.today_date:
-                        return "Communicating"
-                    elif comm_date_str < self.today_date:
-                        return "Non Comm"
-                    else:
-                        # Future date - treat as Never Comm (data error)
-                        return "Never Comm"
-                except:
-                    return "Never Comm"
+    def stage_load_sources(self, dg_name, report_name, paths, state):
+        """Stage 1: take the Warehouse base and every optional source from the shared source cache"""
+        cache = SourceCache.for_folder(paths["raw_data"])
+        sources = {}
+        
+        # 1. Load Warehouse base
+        if not cache.available("Warehouse"):
+            print(f"❌ Base file Warehouse.csv not found in {dg_name}")
+            return None
             
-            # Handle missing Communicated At column gracefully
-            if 'Communicated At' not in df_intermediate.columns:
-                df_final['Comm Status'] = "Never Comm"
-            else:
+        print(f"📦 Loading Warehouse base...")
+        df_warehouse = cache.get("Warehouse")
+        
+        # Filter for Kimbal manufacturer only (a new frame, the cached one is shared with other reports)
+        if 'Manufacturer' in df_warehouse.columns and self.all_manufacturers:
+            # Every manufacturer is merged once; the Kimbal rows are split off after the merges
+            print(f"🏭 All manufacturers: {len(df_warehouse)} meters ({int(self.is_kimbal(df_warehouse).sum())} Kimbal)")
+            df_warehouse = df_warehouse.copy(deep=False)
+        elif 'Manufacturer' in df_warehouse.columns:
+            original_count = len(df_warehouse)
+            df_warehouse = df_warehouse[self.is_kimbal(df_warehouse)]
+            filtered_count = len(df_warehouse)
+            print(f"🔍 Filtered manufacturers: {original_count} → {filtered_count} meters (Kimbal only)")
+        else:
+            df_warehouse = df_warehouse.copy(deep=False)
+        sources['Warehouse'] = df_warehouse
+        
+        for name in dict.fromkeys(join["source"] for join in PIPELINE_SPEC["joins"]):
+            if cache.available(name):
+                print(f"📦 Loading {name}...")
+                sources[name] = cache.get(name)
+        
+        return {"sources": sources}
+    
+    def stage_build_master(self, dg_name, report_name, paths, state):
+        """Stage 2: merge the sources onto the Warehouse base and write the Master report"""
+        sources = state["sources"]
+        
+        # Joins, keys and suffixes come from the pipeline spec; the planner runs them smallest
+        # source first. Stats are always for the Kimbal meters, also when every manufacturer is merged
+        if self.engine == "legacy":
+            df_master, stats = legacy_engine.build_master(PIPELINE_SPEC, sources, self.is_kimbal if self.all_manufacturers else None)
+        else:
+            report_mask = self.is_kimbal(sources['Warehouse']) if self.all_manufacturers else None
+            df_master, stats = build_master(PIPELINE_SPEC, sources, report_mask)
+        
+        # The Master/Intermediate/Final reports of record stay Kimbal-only
+        df_master_all = None
+        if self.all_manufacturers:
+            df_master_all = df_master
+            df_master = df_master_all[self.is_kimbal(df_master_all)].reset_index(drop=True)
+        
+        # Summary of missing data in master file
+        print(f"\n{'='*60}")
+        print(f"MAPPING & MISSING DATA SUMMARY FOR {dg_name}")
+        print(f"{'='*60}")
+        print(f"Warehouse Base: {stats['Warehouse']['total']} records")
+            
+        for key, s in stats.items():
+            if key == 'Warehouse': continue
+            print(f"\nSource: {key}")
+            print(f"  - Total records in source: {s['total']}")
+            print(f"  - Successfully mapped to master: {s['mapped']}")
+            print(f"  - Unmapped (Missing in Warehouse): {s['unmapped']}")
+            
+        missing_node = None
+        missing_route = None
+        print(f"\nMaster Data Coverage (Missing values in master):")
+        if 'NodeId' in df_master.columns:
+            missing_node = int(df_master['NodeId'].isna().sum())
+            print(f"  - Meters without Node ID: {missing_node} ({stats['Warehouse']['total'] - missing_node} found)")
+            
+        if 'Gateway ID' in df_master.columns:
+            missing_route = int(df_master['Gateway ID'].isna().sum())
+            print(f"  - Meters without Routing Info: {missing_route} ({stats['Warehouse']['total'] - missing_route} found)")
+            
+        print(f"{'='*60}\n")
+            
+        # Save master result (written in the background, also this stage's checkpoint output)
+        master_output_path = paths["output"] / f"Master_SLA_Report_{self.today_date}.csv"
+        master_writes = [(master_output_path, df_master, "Master report")] if PIPELINE_SPEC.get("master_report", True) else []
+        
+        return {
+            "df_master": df_master,
+            "df_master_all": df_master_all,
+            "stats": stats,
+            "missing_node": missing_node,
+            "missing_route": missing_route,
+            "outputs": [path for path, _, _ in master_writes],
+            "writes": master_writes,
+        }
     
-                df_final['Comm Status'] = df_final['Communicated At'].apply(calculate_comm_status)
+    def stage_build_final(self, dg_name, report_name, paths, state):
+        """Stage 3: coalesce into the Intermediate report, then add Comm Status and Remarks"""
+        # The Master is only read (the Master CSV may still be writing from it).
+        # With every manufacturer loaded, build on all rows once and split the Kimbal rows off below
+        df_master_all = state.get("df_master_all")
+        df_master = df_master_all if df_master_all is not None else state["df_master"]
+        
+        # 7. Create Intermediate File with the coalesce rules and Final columns of the pipeline spec
+        print(f"📝 Creating intermediate report...")
+        print(f"🔄 Coalescing data from multiple sources...")
+        if self.engine == "legacy":
+            df_intermediate, df_provenance = legacy_engine.build_intermediate(PIPELINE_SPEC, df_master)
+        else:
+            df_intermediate, df_provenance = build_intermediate(PIPELINE_SPEC, df_master)
+        
+        # One canonical name per Circle/Division/Subdivision (alias map in _hierarchy, categorical columns)
+        aliases = HierarchyAliases.open(self.base_path)
+        # The spellings as coalesced, for the data quality profile's inconsistent-name counts
+        df_raw_names = df_intermediate[[c for c in HIERARCHY_LEVELS if c in df_intermediate.columns]]
+        if self.engine == "legacy":
+            df_intermediate, name_changes = legacy_engine.resolve_hierarchy(df_intermediate, aliases)
+        else:
+            df_intermediate, name_changes = resolve_hierarchy(df_intermediate, aliases)
+        if self.write_outputs:
+            aliases.save()
+        for level, (spellings, canonical) in name_changes.items():
+            if spellings != canonical:
+                print(f"🏷️ {level}: {spellings} spellings resolved to {canonical} names")
+            
+        intermediate_output_path = paths["output"] / f"Intermediate_SLA_Report_{self.today_date}.csv"
+
+        # 8. Create Final Report with Comm Status
+        print(f"📡 Calculating Comm Status for Final Report...")
+        df_final = df_intermediate.copy()
+            
+        def calculate_comm_status(comm_at):
+            if pd.isna(comm_at) or str(comm_at).strip() == "":
+                return "Never Comm"
+            try:
+                # Try parsing the date (Handling DD-MM-YYYY HH:MM:SS)
+                dt = pd.to_datetime(comm_at, dayfirst=True, errors='coerce')
+                if pd.isna(dt):
+                    return "Never Comm"
                 
-            # Add blank Remarks column
-            df_final['Remarks'] = ""
+                # Compare communication date with folder date
+                comm_date_str = dt.strftime("%Y-%m-%d")
                 
-            final_output_path = paths["output"] / f"Final_SLA_Report_{self.today_date}.csv"
-            df_final.to_csv(final_output_path, index=False)
+                if comm_date_str == self.today_date:
+                    return "Communicating"
+                elif comm_date_str < self.today_date:
+                    return "Non Comm"
+                else:
+                    # Future date - treat as Never Comm (data error)
+                    return "Never Comm"
+            except:
+                return "Never Comm"
+        
+        # Handle missing Communicated At column gracefully
+        if 'Communicated At' not in df_intermediate.columns:
+            df_final['Comm Status'] = "Never Comm"
+        else:
+
+            df_final['Comm Status'] = df_final['Communicated At'].apply(calculate_comm_status)
+        
+        df_final_all = None
+        if df_master_all is not None:
+            df_final_all = df_final
+            kimbal = self.is_kimbal(df_master_all).to_numpy()
+            df_intermediate = df_intermediate[kimbal].reset_index(drop=True)
+            df_provenance = df_provenance[kimbal].reset_index(drop=True)
+            df_raw_names = df_raw_names[kimbal].reset_index(drop=True)
+            df_final = df_final_all[kimbal].reset_index(drop=True)
+        
+        # Which feed filled each coalesced field ('<field> Source' columns of the Intermediate report)
+        provenance = provenance_counts(df_provenance)
+        for field, counts in provenance.items():
+            print(f"🧬 {field}: " + ", ".join(f"{code} {n}" for code, n in counts.items()))
+        df_intermediate = pd.concat([df_intermediate, df_provenance], axis=1)
             
-            print(f"✨ Final report created: {final_output_path.name}")
-            print(f"📊 Total records: {len(df_final)}")
+        # Fill Remarks: Non Comm meters that went silent together behind one gateway/sink
+        # are marked as probable infrastructure outages, the rest as individual faults
+        comm_at_parsed = parse_datetimes(df_final["Communicated At"]) if "Communicated At" in df_final.columns else None
+        df_outages = None
+        try:
+            df_final['Remarks'], df_outages = attribute_outages(df_final, comm_at_parsed)
+            print(f"🧭 Outage attribution: {len(df_outages)} probable infrastructure outage(s)")
+        except Exception as e:
+            print(f"⚠️ Could not attribute outages: {e}")
+            df_final['Remarks'] = ""
             
+        final_output_path = paths["output"] / f"Final_SLA_Report_{self.today_date}.csv"
+        print(f"📊 Total records: {len(df_final)}")
+        
+        return {
+            "df_final": df_final,
+            "df_final_all": df_final_all,
+            "df_outages": df_outages,
+            "comm_at_parsed": comm_at_parsed,
+            "stats": state["stats"],
+            "provenance": provenance,
+            "raw_names": df_raw_names,
+            "missing_node": state["missing_node"],
+            "missing_route": state["missing_route"],
+            "outputs": [intermediate_output_path, final_output_path],
+            "writes": [(intermediate_output_path, df_intermediate, "Intermediate report"),
+                       (final_output_path, df_final, "Final report")],
+        }
+    
+    def stage_reports(self, dg_name, report_name, paths, state):
+        """Stage 4: history, summaries and terminal output, returned as DAG tasks (not checkpointed)"""
+        df_final = state["df_final"]
+        df_outages = state["df_outages"]
+        comm_at_parsed = state["comm_at_parsed"]
+        stats = state["stats"]
+        final_output_path = paths["output"] / f"Final_SLA_Report_{self.today_date}.csv"
+        # Summary tables the tasks build, kept in memory for in-process callers (see sla_api)
+        aggregates = {}
+        
+        def history_task():
+            # Record today's statuses in the cross-day history store
+            uptime_summary = None
+            if not self.write_outputs:
+                return uptime_summary  # the store only takes days whose Final report was written
+            try:
+                # Runs for other dates of this DG share the store
+                with history_lock(self.base_path, dg_name, report_name, self.lock_timeout):
+                    history = MeterStatusHistory.open(self.base_path, dg_name, report_name)
+                    history.append_day(self.today_date, df_final)
+                    print(f"🗂️ Status history updated: {history.n_meters} meters over {len(history.dates)} day(s)")
+                
+                    # Rolling-window uptime (7/30/90 days) from the history
+                    uptime_summary = write_uptime_reports(history, dg_name, self.today_date, paths["output"])
+            except Exception as e:
+                print(f"⚠️ Could not update meter status history: {e}")
+            return uptime_summary
+        
+        def transitions_task():
+            # Day-over-day transitions against the previous available Final report
+            transitions_summary = None
+            try:
+                previous_date, previous_path = find_previous_final_report(self.base_path, dg_name, self.today_date, report_name)
+                if previous_path is not None:
+                    matrix, extract, transitions_summary = build_transition_reports(
+                        df_final, read_previous_final(previous_path), previous_date)
+                    aggregates["status_transitions"], aggregates["status_changes"] = matrix, extract
+                    if self.write_outputs:
+                        save_transition_reports(matrix, extract, dg_name, self.today_date, previous_date, paths["output"])
+                else:
+                    print(f"ℹ️ No earlier Final report for {dg_name}, skipping status transitions")
+            except Exception as e:
+                print(f"⚠️ Could not compute status transitions: {e}")
+            return transitions_summary
+        
+        def network_health_task():
+            # Gateway / sink health rollup from routing data
+            network_summary = None
+            try:
+                df_network = build_network_health(df_final, comm_at_parsed)
+                aggregates["network_health"] = df_network
+                if not df_network.empty and self.write_outputs:
+                    write_network_health(df_network, paths["output"], dg_name, self.today_date)
+                network_summary = summarise_network_health(df_network, df_final)
+            except Exception as e:
+                print(f"⚠️ Could not build network health rollup: {e}")
+            return network_summary
+        
+        def outage_attribution_task():
+            outage_summary = None
+            if df_outages is not None:
+                if len(df_outages) and self.write_outputs:
+                    outages_path = paths["output"] / f"Outage_Attribution_{dg_name}_{self.today_date}.csv"
+                    write_csv(df_outages, outages_path, index=False)
+                    print(f"✨ Outage attribution: {outages_path.name}")
+                outage_summary = summarise_outages(df_final['Remarks'], df_outages)
+            return outage_summary
+        
+        def data_quality_task():
+            # Null rates, invalid formats, range violations and inconsistent names per Final column
+            quality_summary = None
+            try:
+                df_quality = build_data_quality(df_final, self.today_date, state.get("raw_names"))
+                aggregates["data_quality"] = df_quality
+                if self.write_outputs:
+                    write_data_quality(df_quality, paths["output"], dg_name, self.today_date)
+                quality_summary = summarise_data_quality(df_quality)
+                print(f"🧪 Data quality: {quality_summary['columns_with_issues']} of {quality_summary['columns_profiled']} column(s) with nulls or issues")
+            except Exception as e:
+                print(f"⚠️ Could not profile data quality: {e}")
+            return quality_summary
+        
+        def json_summary_task(uptime_summary, transitions_summary, network_summary, outage_summary, quality_summary):
             # 9. Create JSON summary for Teams / Power Automate
             summary = {
                 "date": self.today_date,
@@ -685,22 +965,20 @@ class DailyReporter:
             # Comm Status by Subdivision
             if 'Subdivision' in df_final.columns:
                 subdivision_summary = {}
-                for subdivision in df_final['Subdivision'].dropna().unique():
-                    subdivision_data = df_final[df_final['Subdivision'] == subdivision]
-                    subdivision_comm_counts = subdivision_data['Comm Status'].value_counts().to_dict()
+                for subdivision, counts in status_counts(df_final, 'Subdivision', sort=False).iterrows():
                     subdivision_summary[str(subdivision)] = {
-                        "Communicating": int(subdivision_comm_counts.get("Communicating", 0)),
-                        "Never Comm": int(subdivision_comm_counts.get("Never Comm", 0)),
-                        "Non Comm": int(subdivision_comm_counts.get("Non Comm", 0)),
-                        "Total": int(len(subdivision_data))
+                        "Communicating": int(counts["Communicating"]),
+                        "Never Comm": int(counts["Never Comm"]),
+                        "Non Comm": int(counts["Non Comm"]),
+                        "Total": int(counts["Total"])
                     }
                 summary["comm_status_by_subdivision"] = subdivision_summary
             else:
                 summary["comm_status_by_subdivision"] = {}
             
             # Missing data summary from earlier stats
-            missing_node = locals().get("missing_node", None)
-            missing_route = locals().get("missing_route", None)
+            missing_node = state["missing_node"]
+            missing_route = state["missing_route"]
             # Count rows where Communicated At is blank/invalid
             if "Communicated At" in df_final.columns:
                 missing_comm_at = df_final["Communicated At"].isna().sum()
@@ -712,13 +990,24 @@ class DailyReporter:
                 "rows_missing_communicated_at": int(missing_comm_at) if missing_comm_at is not None else None,
                 "source_mapping": stats,
             }
+            summary["coalesce_provenance"] = state.get("provenance")
+            summary["sla_uptime"] = uptime_summary
+            summary["status_transitions"] = transitions_summary
+            summary["network_health"] = network_summary
+            if outage_summary is not None:
+                summary["outage_attribution"] = outage_summary
+            summary["data_quality"] = quality_summary
             
-            summary_output_path = paths["output"] / f"SLA_Summary_{dg_name}_{self.today_date}.json"
-            with open(summary_output_path, "w", encoding="utf-8") as f:
-                json.dump(summary, f, ensure_ascii=False, indent=2)
-            print(f"📄 JSON Summary file created: {summary_output_path.name}")
-            
+            if self.write_outputs:
+                summary_output_path = paths["output"] / f"SLA_Summary_{dg_name}_{self.today_date}.json"
+                write_json(summary, summary_output_path, ensure_ascii=False, indent=2)
+                print(f"📄 JSON Summary file created: {summary_output_path.name}")
+            return summary
+        
+        def status_summary_task(df_final=df_final, output_dir=paths["output"]):
             # 10. Create Simplified CSV Summary Reports
+            comm_counts = df_final["Comm Status"].value_counts().to_dict()
+            total_records = int(len(df_final))
             print(f"📝 Creating simplified CSV summary reports...")
             
             # ===== REPORT 1: OVERALL STATUS & HIERARCHICAL BREAKDOWN =====
@@ -730,78 +1019,46 @@ class DailyReporter:
                 "Circle": "",
                 "Division": "",
                 "Subdivision": "",
-                "Communicating": summary['comm_status_overall']['Communicating'],
-                "Never Comm": summary['comm_status_overall']['Never Comm'],
-                "Non Comm": summary['comm_status_overall']['Non Comm'],
-                "Total": summary['total_records'],
-                "Communicating %": round(100 * summary['comm_status_overall']['Communicating'] / summary['total_records'], 2) if summary['total_records'] > 0 else 0
+                "Communicating": int(comm_counts.get("Communicating", 0)),
+                "Never Comm": int(comm_counts.get("Never Comm", 0)),
+                "Non Comm": int(comm_counts.get("Non Comm", 0)),
+                "Total": total_records,
+                "Communicating %": round(100 * int(comm_counts.get("Communicating", 0)) / total_records, 2) if total_records > 0 else 0
             }
             status_data.append(overall_row)
             
-            # Hierarchical breakdown
+            # Hierarchical breakdown: one groupby per level; a Division/Subdivision row names the
+            # most common Circle/Division of its meters
             print(f"🏢 Creating hierarchical breakdown...")
-            
-            # By Circle
-            if 'Circle' in df_final.columns:
-                for circle in sorted(df_final['Circle'].dropna().unique()):
-                    circle_data = df_final[df_final['Circle'] == circle]
-                    circle_comm_counts = circle_data['Comm Status'].value_counts().to_dict()
-                    status_data.append({
-                        "Category": "By Circle",
-                        "Circle": str(circle),
-                        "Division": "",
-                        "Subdivision": "",
-                        "Communicating": int(circle_comm_counts.get("Communicating", 0)),
-                        "Never Comm": int(circle_comm_counts.get("Never Comm", 0)),
-                        "Non Comm": int(circle_comm_counts.get("Non Comm", 0)),
-                        "Total": int(len(circle_data)),
-                        "Communicating %": round(100 * circle_comm_counts.get("Communicating", 0) / len(circle_data), 2) if len(circle_data) > 0 else 0
-                    })
-            
-            # By Division
-            if 'Division' in df_final.columns:
-                for division in sorted(df_final['Division'].dropna().unique()):
-                    division_data = df_final[df_final['Division'] == division]
-                    division_comm_counts = division_data['Comm Status'].value_counts().to_dict()
-                    circle_val = division_data['Circle'].mode()[0] if 'Circle' in division_data.columns and len(division_data['Circle'].mode()) > 0 else ""
-                    
-                    status_data.append({
-                        "Category": "By Division",
-                        "Circle": str(circle_val),
-                        "Division": str(division),
-                        "Subdivision": "",
-                        "Communicating": int(division_comm_counts.get("Communicating", 0)),
-                        "Never Comm": int(division_comm_counts.get("Never Comm", 0)),
-                        "Non Comm": int(division_comm_counts.get("Non Comm", 0)),
-                        "Total": int(len(division_data)),
-                        "Communicating %": round(100 * division_comm_counts.get("Communicating", 0) / len(division_data), 2) if len(division_data) > 0 else 0
-                    })
-            
-            # By Subdivision
-            if 'Subdivision' in df_final.columns:
-                for subdivision in sorted(df_final['Subdivision'].dropna().unique()):
-                    subdivision_data = df_final[df_final['Subdivision'] == subdivision]
-                    subdivision_comm_counts = subdivision_data['Comm Status'].value_counts().to_dict()
-                    circle_val = subdivision_data['Circle'].mode()[0] if 'Circle' in subdivision_data.columns and len(subdivision_data['Circle'].mode()) > 0 else ""
-                    division_val = subdivision_data['Division'].mode()[0] if 'Division' in subdivision_data.columns and len(subdivision_data['Division'].mode()) > 0 else ""
-                    
-                    status_data.append({
-                        "Category": "By Subdivision",
-                        "Circle": str(circle_val),
-                        "Division": str(division_val),
-                        "Subdivision": str(subdivision),
-                        "Communicating": int(subdivision_comm_counts.get("Communicating", 0)),
-                        "Never Comm": int(subdivision_comm_counts.get("Never Comm", 0)),
-                        "Non Comm": int(subdivision_comm_counts.get("Non Comm", 0)),
-                        "Total": int(len(subdivision_data)),
-                        "Communicating %": round(100 * subdivision_comm_counts.get("Communicating", 0) / len(subdivision_data), 2) if len(subdivision_data) > 0 else 0
+            for category, level, parents in [("By Circle", "Circle", []),
+                                             ("By Division", "Division", ["Circle"]),
+                                             ("By Subdivision", "Subdivision", ["Circle", "Division"])]:
+                if level not in df_final.columns:
+                    continue
+                parent_values = {parent: most_common(df_final, level, parent) if parent in df_final.columns else {}
+                                 for parent in parents}
+                for value, counts in status_counts(df_final, level).iterrows():
+                    row = {"Category": category, "Circle": "", "Division": "", "Subdivision": ""}
+                    for parent in parents:
+                        row[parent] = str(parent_values[parent].get(value, ""))
+                    row[level] = str(value)
+                    row.update({
+                        "Communicating": int(counts["Communicating"]),
+                        "Never Comm": int(counts["Never Comm"]),
+                        "Non Comm": int(counts["Non Comm"]),
+                        "Total": int(counts["Total"]),
+                        "Communicating %": round(100 * int(counts["Communicating"]) / int(counts["Total"]), 2) if counts["Total"] > 0 else 0
                     })
+                    status_data.append(row)
             
-            df_status = pd.DataFrame(status_data)
-            status_path = paths["output"] / f"Comm_Status_Summary_{dg_name}_{self.today_date}.csv"
-            df_status.to_csv(status_path, index=False)
-            print(f"✨ Status summary: {status_path.name}")
-            
+            if self.write_outputs:
+                df_status = pd.DataFrame(status_data)
+                status_path = output_dir / f"Comm_Status_Summary_{dg_name}_{self.today_date}.csv"
+                write_csv(df_status, status_path, index=False)
+                print(f"✨ Status summary: {status_path.name}")
+            return status_data
+        
+        def ageing_task(df_final=df_final, output_dir=paths["output"]):
             # ===== REPORT 2: AGEING ANALYSIS =====
             print(f"📊 Analyzing ageing for Non Comm and Never Comm meters...")
             ageing_data = []
@@ -819,7 +1076,7 @@ class DailyReporter:
             if 'Communicated At' in df_final.columns:
                 non_comm_df = df_final[df_final['Comm Status'] == 'Non Comm'].copy()
                 never_comm_df = df_final[df_final['Comm Status'] == 'Never Comm'].copy()
-                
+            
                 # Calculate ageing for Non Comm (days since last communication)
                 if len(non_comm_df) > 0:
                     def calculate_days_since_comm(comm_at):
@@ -831,9 +1088,9 @@ class DailyReporter:
                         except:
                             pass
                         return None
-                    
+            
                     non_comm_df['Days_Since_Comm'] = non_comm_df['Communicated At'].apply(calculate_days_since_comm)
-                    
+            
                     for bucket_name, (min_days, max_days) in age_buckets.items():
                         count = len(non_comm_df[(non_comm_df['Days_Since_Comm'] >= min_days) & 
                                                 (non_comm_df['Days_Since_Comm'] <= max_days)])
@@ -843,7 +1100,7 @@ class DailyReporter:
                             "Count": count,
                             "Percentage": round(100 * count / len(non_comm_df), 2) if len(non_comm_df) > 0 else 0
                         })
-                
+            
                 # Calculate ageing for Never Comm (days since installation)
                 if len(never_comm_df) > 0 and 'Installation date' in never_comm_df.columns:
                     def calculate_days_since_installation(inst_date):
@@ -855,9 +1112,9 @@ class DailyReporter:
                         except:
                             pass
                         return None
-                    
+            
                     never_comm_df['Days_Since_Installation'] = never_comm_df['Installation date'].apply(calculate_days_since_installation)
-                    
+            
                     for bucket_name, (min_days, max_days) in age_buckets.items():
                         count = len(never_comm_df[(never_comm_df['Days_Since_Installation'] >= min_days) & 
                                                   (never_comm_df['Days_Since_Installation'] <= max_days)])
@@ -868,12 +1125,14 @@ class DailyReporter:
                             "Percentage": round(100 * count / len(never_comm_df), 2) if len(never_comm_df) > 0 else 0
                         })
             
-            if ageing_data:
+            if ageing_data and self.write_outputs:
                 df_ageing = pd.DataFrame(ageing_data)
-                ageing_path = paths["output"] / f"Comm_Ageing_Analysis_{dg_name}_{self.today_date}.csv"
-                df_ageing.to_csv(ageing_path, index=False)
+                ageing_path = output_dir / f"Comm_Ageing_Analysis_{dg_name}_{self.today_date}.csv"
+                write_csv(df_ageing, ageing_path, index=False)
                 print(f"✨ Ageing analysis: {ageing_path.name}")
-            
+            return ageing_data
+        
+        def print_summary_task(summary, status_data, ageing_data, network_summary):
             # Print final summary to terminal
             print(f"\n{'='*60}")
             print(f"📊 SIMPLIFIED COMM STATUS SUMMARY FOR {dg_name}")
@@ -901,16 +1160,16 @@ class DailyReporter:
             # Print ageing summary
             if ageing_data:
                 print(f"\n=== AGEING ANALYSIS ===")
-                
+            
                 non_comm_ageing = [item for item in ageing_data if item['Category'] == 'Non Comm']
                 never_comm_ageing = [item for item in ageing_data if item['Category'] == 'Never Comm']
-                
+            
                 if non_comm_ageing:
                     print(f"\n   Non Comm Meters (days since last communication):")
                     for item in non_comm_ageing:
                         if item['Count'] > 0:
                             print(f"      {item['Age Bucket']}: {item['Count']} meters ({item['Percentage']}%)")
-                
+            
                 if never_comm_ageing:
                     print(f"\n   Never Comm Meters (days since installation):")
                     for item in never_comm_ageing:
@@ -927,6 +1186,12 @@ class DailyReporter:
             if missing_summary['rows_missing_communicated_at'] is not None:
                 print(f"   Rows missing Communicated At: {missing_summary['rows_missing_communicated_at']}")
             
+            # Print gateways with the most Non Comm meters
+            if network_summary and network_summary['worst_gateways']:
+                print(f"\n📶 GATEWAYS WITH MOST NON COMM METERS:")
+                for gw in network_summary['worst_gateways'][:5]:
+                    print(f"   {gw['gateway_id']}: {gw['non_comm']}/{gw['meters']} Non Comm ({gw['non_comm_pct']}%), last seen {gw['last_seen']}")
+            
             # Print mapping summary
             print(f"\n🔗 MAPPING SUMMARY:")
             for source_name, mapping_stats in missing_summary['source_mapping'].items():
@@ -935,93 +1200,96 @@ class DailyReporter:
                     mapped = mapping_stats['mapped']
                     unmapped = mapping_stats['unmapped']
                     print(f"   {source_name}: Total={total}, Mapped={mapped}, Unmapped={unmapped}")
-            
-        print(f"\n{'='*60}")
-        print(f"✅ Processing completed for all DG subfolders")
-        print(f"{'='*60}")
-        return True
+        
+        # (name, function, tasks whose results it takes, output files it must wait for)
+        # The history store re-reads Final reports from disk, so it waits for today's Final CSV
+        def extracts_task():
+            # One Final report slice per subdivision office
+            try:
+                write_extracts(df_final, paths["output"], dg_name, self.today_date, self.extract_partition)
+            except Exception as e:
+                print(f"⚠️ Could not write subdivision extracts: {e}")
+        
+        def manufacturers_task():
+            # Final report, status summary, ageing and JSON summary per manufacturer, all
+            # partitions of the one merged frame (no per-manufacturer reload or re-merge).
+            # Kimbal's are the main outputs already, so only the other manufacturers get a folder
+            df_all = state.get("df_final_all")
+            df_all = df_all[~self.is_kimbal(df_all)]
+            manufacturers_dir = paths["output"] / MANUFACTURERS_FOLDER
+            manufacturers_dir.mkdir(parents=True, exist_ok=True)
+            comm_counts = df_final["Comm Status"].value_counts()
+            index = [{"Manufacturer": "KIMBAL", "Folder": "(main output)", "Total": len(df_final),
+                      **{s: int(comm_counts.get(s, 0)) for s in ["Communicating", "Never Comm", "Non Comm"]}}]
+            for (manufacturer,), part in partition_frame(df_all, ["Manufacturer"]):
+                part = part.reset_index(drop=True)
+                out_dir = manufacturers_dir / sanitise_filename(manufacturer)
+                out_dir.mkdir(parents=True, exist_ok=True)
+                print(f"🏭 {manufacturer}: {len(part)} meters → {MANUFACTURERS_FOLDER}/{out_dir.name}/")
+                try:
+                    comm_at = parse_datetimes(part["Communicated At"]) if "Communicated At" in part.columns else None
+                    part['Remarks'], _ = attribute_outages(part, comm_at)
+                except Exception as e:
+                    print(f"⚠️ Could not attribute outages for {manufacturer}: {e}")
+                    part['Remarks'] = ""
+                write_csv(part, out_dir / f"Final_SLA_Report_{self.today_date}.csv", index=False)
+                status_summary_task(part, out_dir)
+                ageing_task(part, out_dir)
+                
+                comm_counts = part["Comm Status"].value_counts()
+                summary = {
+                    "date": self.today_date,
+                    "dg_name": dg_name,
+                    "manufacturer": manufacturer,
+                    "total_records": int(len(part)),
+                    "comm_status_overall": {s: int(comm_counts.get(s, 0)) for s in ["Communicating", "Never Comm", "Non Comm"]},
+                }
+                write_json(summary, out_dir / f"SLA_Summary_{dg_name}_{self.today_date}.json", ensure_ascii=False, indent=2)
+                index.append({"Manufacturer": manufacturer, "Folder": out_dir.name, "Total": len(part),
+                              **summary["comm_status_overall"]})
+            index_path = manufacturers_dir / f"Manufacturers_Index_{dg_name}_{self.today_date}.csv"
+            write_csv(pd.DataFrame(index), index_path, index=False)
+            print(f"✨ Per-manufacturer outputs for {len(index) - 1} other manufacturer(s): {index_path.name}")
+            return index
+        
+        def keep(key, task):
+            # The DG's own status summary / ageing rows also as DataFrames (not the per-manufacturer ones)
+            def run():
+                rows = task()
+                aggregates[key] = pd.DataFrame(rows)
+                return rows
+            return run
+        
+        tasks = [
+            ("history", history_task, [], [final_output_path]),
+            ("transitions", transitions_task, [], []),
+            ("network_health", network_health_task, [], []),
+            ("outage_attribution", outage_attribution_task, [], []),
+            ("data_quality", data_quality_task, [], []),
+            ("json_summary", json_summary_task,
+             ["history", "transitions", "network_health", "outage_attribution", "data_quality"], []),
+            ("status_summary", keep("status_summary", status_summary_task), [], []),
+            ("ageing", keep("ageing", ageing_task), [], []),
+            ("print_summary", print_summary_task, ["json_summary", "status_summary", "ageing", "network_health"], []),
+        ]
+        # Extracts and per-manufacturer folders are files only (df_final_all holds every manufacturer)
+        if self.extract_partition and self.write_outputs:
+            tasks.append(("subdivision_extracts", extracts_task, [], []))
+        if state.get("df_final_all") is not None and self.write_outputs:
+            tasks.append(("manufacturers", manufacturers_task, [], []))
+        return {"tasks": tasks, "aggregates": aggregates}
+    
     
     def get_expected_files(self):
-        """Return list of expected raw data files"""
-        return [
-            "Warehouse.csv",
-            "New_Service_connection.csv",
-            "Merged_CI-MI.csv",
-            "Meter_Installation.csv",
-            "Node ID.xlsx",
-            "Routings Part-1.xlsx",  # May have multiple parts
-            "Routings Part-2.xlsx",  # May have multiple parts
-        ]
+        """Return list of expected raw data files (from the pipeline spec)"""
+        return expected_files(PIPELINE_SPEC)
     
     def get_file_column_mapping(self):
-        """Define expected columns per file type"""
-        return {
-            "Warehouse.csv": [
-                "Meter Serial No",
-                "Feeder Name(From Field)",
-                "Consumer Name",
-                "Address",
-                "Mobile Number",
-                "Latitude",
-                "Longitude",
-                "Installed Sub Division",
-                "Division",
-                "Circle",
-            ],
-            "New_Service_connection.csv": [
-                "New Meter QR Code ",  # Note the trailing space
-                "Feeder Name(From Field)",
-                "Consumer name",
-                "address",
-                "Mobile Number",
-                "Latitude",
-                "Longitude",
-                "Sub Division Name",
-            ],
-            "Merged_CI-MI.csv": [
-                "New Meter QR Code",
-                "Feeder Name(From Field)",
-                "Consumer Name",
-                "Address",
-                "Mobile Number",
-                "Latitude",
-                "Longitude",
-                "Sub Division Name",
-            ],
-            "Meter_Installation.csv": [
-                "New Meter Number Scan",
-                "Feeder Name(From Field)",
-                "Consumer Name",
-                "Address",
-                "Mobile Number",
-                "Latitude",
-                "Longitude",
-                "Sub Division Name",
-            ],
-            "Node ID.xlsx": [
-                "Meter Number",
-                "NodeId",
-            ],
-            "Routings Part-1.xlsx": [  # Same structure as Part-2
-                "Node ID",
-                "Gateway ID",
-                "Hop Count",
-                "Sink ID",
-                "Communicated At",
-                "Source Endpoint",
-            ],
-            "Routings Part-2.xlsx": [  # Same structure as Part-1
-                "Node ID",
-                "Gateway ID",
-                "Hop Count",
-                "Sink ID",
-                "Communicated At",
-                "Source Endpoint",
-            ],
-        }
+        """Expected columns per file type (from the pipeline spec)"""
+        return expected_columns(PIPELINE_SPEC)
     
-    def validate_filenames(self, raw_dir):
-        """Validate that expected files are present in raw_data folder"""
+    def check_filenames(self, raw_dir):
+        """(missing, unexpected) file names in a raw_data folder"""
         expected_files = self.get_expected_files()
         actual_files = {f.name for f in raw_dir.iterdir() if f.is_file()}
         
@@ -1040,7 +1308,7 @@ class DailyReporter:
                     missing_files.append(expected)
         
         # Check for extra files
-        for actual in actual_files:
+        for actual in sorted(actual_files):
             if actual not in expected_files:
                 # Allow other routing files that match pattern
                 # Ignore macOS system files
@@ -1049,6 +1317,12 @@ class DailyReporter:
                 if not (actual.startswith("Routings") and actual.endswith((".xlsx", ".xls"))):
                     extra_files.append(actual)
         
+        return missing_files, extra_files
+    
+    def validate_filenames(self, raw_dir):
+        """Validate that expected files are present in raw_data folder"""
+        missing_files, extra_files = self.check_filenames(raw_dir)
+        
         if missing_files or extra_files:
             print("\n❌ FILE VALIDATION ISSUES:")
             if missing_files:
@@ -1061,12 +1335,12 @@ class DailyReporter:
         print("✅ All expected files present")
         return True
     
-    def validate_columns(self, raw_dir):
-        """Validate column headers in each file"""
+    def check_columns(self, raw_dir):
+        """Header check of every recognised file: [{file, missing_columns, extra_columns, error}]"""
         expected_columns = self.get_file_column_mapping()
-        all_valid = True
+        results = []
         
-        for file_path in raw_dir.iterdir():
+        for file_path in sorted(raw_dir.iterdir()):
             if not file_path.is_file():
                 continue
             
@@ -1076,34 +1350,39 @@ class DailyReporter:
                 # Use any routing file as the template for column expectations
                 file_key = "Routings Part-1.xlsx"
             
-            if file_key in expected_columns:
-                print(f"\n🔍 Validating columns in {file_path.name}...")
-                
-                try:
-                    if file_path.suffix.lower() in ['.xlsx', '.xls']:
-                        df = pd.read_excel(file_path, nrows=0)  # Read only headers
-                    else:
-                        df = pd.read_csv(file_path, nrows=0, low_memory=False)  # Read only headers
-                    
-                    actual_cols = set(df.columns.tolist())
-                    expected_cols = set(expected_columns[file_key])
-                    
-                    missing_cols = expected_cols - actual_cols
-                    extra_cols = actual_cols - expected_cols
-                    
-                    if missing_cols:
-                        print(f"  ❌ Missing columns: {list(missing_cols)}")
-                        all_valid = False
-                    if extra_cols:
-                        print(f"  ⚠️ Extra columns: {list(extra_cols)}")
-                        # Not failing for extra columns, just warning
-                    
-                    if not missing_cols:
-                        print(f"  ✅ Columns validated for {file_path.name}")
-                        
-                except Exception as e:
-                    print(f"  ❌ Could not read {file_path.name}: {e}")
-                    all_valid = False
+            if file_key not in expected_columns:
+                continue
+            
+            result = {"file": file_path.name, "missing_columns": [], "extra_columns": [], "error": None}
+            try:
+                actual_cols = set(peek_header(file_path))  # Read only headers
+                expected_cols = set(expected_columns[file_key])
+                result["missing_columns"] = sorted(expected_cols - actual_cols)
+                result["extra_columns"] = sorted(actual_cols - expected_cols)
+            except Exception as e:
+                result["error"] = str(e)
+            results.append(result)
+        
+        return results
+    
+    def validate_columns(self, raw_dir):
+        """Validate column headers in each file"""
+        all_valid = True
+        
+        for result in self.check_columns(raw_dir):
+            print(f"\n🔍 Validating columns in {result['file']}...")
+            if result["error"]:
+                print(f"  ❌ Could not read {result['file']}: {result['error']}")
+                all_valid = False
+                continue
+            if result["missing_columns"]:
+                print(f"  ❌ Missing columns: {result['missing_columns']}")
+                all_valid = False
+            if result["extra_columns"]:
+                print(f"  ⚠️ Extra columns: {result['extra_columns']}")
+                # Not failing for extra columns, just warning
+            if not result["missing_columns"]:
+                print(f"  ✅ Columns validated for {result['file']}")
         
         if not all_valid:
             print("\n⚠️ Column validation failed. Please fix the file columns and run again.")
@@ -1111,9 +1390,62 @@ class DailyReporter:
             print("\n✅ All file columns validated successfully")
         
         return all_valid
+    
+    def validate_uploads(self, dates):
+        """Header-only validation of every DG upload on the given dates, without processing anything"""
+        import time
+        
+        start = time.perf_counter()
+        folders = find_upload_folders(self.base_path, dates)
+        print(f"\n🔍 Validating {len(folders)} DG upload folder(s) across {len(dates)} date(s)...")
+        if not folders:
+            print("⚠️ No DG raw_data folders found")
+            return False
+        
+        results = validate_many(self, folders)
+        elapsed = time.perf_counter() - start
+        print_validation_table(results)
+        report_path = write_validation_json(self.base_path, dates, results, elapsed)
+        print(f"⏱️ Validated in {elapsed:.2f}s")
+        print(f"📝 Validation report: {report_path}")
+        return all(r["passed"] for r in results)
 
+    def preview_uploads(self, sample_size=DEFAULT_SAMPLE_SIZE):
+        """Estimated Comm Status shares per Circle/Division from a stratified sample (no full run)"""
+        import time
+        
+        report_name = "Report_1_Comms_Reporting"
+        report_folder = self.report_date_folder / report_name
+        if not report_folder.exists():
+            print(f"❌ No {report_name} folder for {self.today_date}")
+            return False
+        
+        any_previewed = False
+        # Strata grouped by canonical names like the real summaries (read-only, nothing is saved)
+        aliases = HierarchyAliases.open(self.base_path)
+        for dg_name, paths in sorted(self.get_dg_report_structures(report_name).items()):
+            raw_dir = paths["raw_data"]
+            if not raw_dir.exists() or not any(raw_dir.iterdir()):
+                print(f"⚠️ Raw data folder for {dg_name} is empty or doesn't exist, skipping...")
+                continue
+            start = time.perf_counter()
+            try:
+                df_preview = preview_dg(raw_dir, self.today_date, sample_size, aliases=aliases)
+            except Exception as e:
+                print(f"❌ Could not preview {dg_name}: {e}")
+                continue
+            if df_preview is None:
+                print(f"❌ Base file Warehouse.csv not found in {dg_name}")
+                continue
+            print_preview(df_preview, dg_name)
+            paths["output"].mkdir(parents=True, exist_ok=True)
+            preview_path = paths["output"] / f"Comm_Status_Preview_ESTIMATE_{dg_name}_{self.today_date}.csv"
+            write_csv(df_preview, preview_path, index=False)
+            print(f"✨ Estimate written to {preview_path.name} ({time.perf_counter() - start:.1f}s)")
+            any_previewed = True
+        return any_previewed
     
-    def run(self):
+    def run(self, resume=False, force=False, profile=False):
         """Run the daily reporting process (local only, no webhooks)"""
         try:
             print(f"\n🚀 Daily Reporting System Started")
@@ -1126,7 +1458,7 @@ class DailyReporter:
                 print(f"   Please ensure OneDrive is syncing and the path is correct.")
                 sys.exit(1)
             
-            self.process_comms_reporting()
+            self.process_comms_reporting(resume=resume, force=force, profile=profile)
             
             print(f"\n✅ Process completed")
             print(f"\n📂 Folder structure ready at: {self.report_date_folder}")
@@ -1139,9 +1471,68 @@ class DailyReporter:
             sys.exit(1)
 
 
+# Built-in report. Further reports register the same way, with the sources/columns they need.
+register_report(ReportDefinition(
+    name="comms",
+    folder="Report_1_Comms_Reporting",
+    # Every column while the spec keeps the Master report, else only what the Final report needs
+    sources=column_projections(PIPELINE_SPEC),
+    stages=lambda reporter: reporter.get_comms_stages(),
+    description="Daily communication status: Master/Intermediate/Final reports and summaries",
+))
+
+
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Daily SLA Comms Reporting")
+    parser.add_argument("--resume", action="store_true",
+                        help="Restart each DG from the first stage whose inputs or code changed")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild every DG even if its run manifest says it is up to date")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile each DG (cProfile + tracemalloc), reports go to the DG output folder (implies --force)")
+    parser.add_argument("--csv-engine", choices=CSV_ENGINES,
+                        help=f"CSV parser for raw sources (default ${CSV_ENGINE_ENV} or auto: pyarrow when installed)")
+    parser.add_argument("--engine", choices=legacy_engine.ENGINES, default="optimised",
+                        help="Master/Final build: optimised (pipeline planner) or legacy (pre-planner merge chain)")
+    parser.add_argument("--validate-only", action="store_true",
+                        help="Only check file names and headers of every DG upload, then exit (1 if any fail)")
+    parser.add_argument("--extracts", choices=list(EXTRACT_PARTITIONS) + ["none"], default="subdivision",
+                        help="Per-office Final report extracts in output/Subdivision_Extracts (default: one per subdivision)")
+    parser.add_argument("--all-manufacturers", action="store_true",
+                        help="Also build per-manufacturer outputs in output/Manufacturers (reports of record stay Kimbal-only)")
+    parser.add_argument("--preview", action="store_true",
+                        help="Estimate Comm Status shares per Circle/Division from a stratified sample, then exit")
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE, help="Meters sampled per DG for --preview")
+    parser.add_argument("--verify", action="store_true",
+                        help="Run the legacy and optimised engines on the same inputs, diff every output and print the speedup")
+    parser.add_argument("--keep-sandbox", action="store_true", help="With --verify, keep both engines' output folders")
+    parser.add_argument("--lock-timeout", type=float,
+                        help=f"Seconds to wait for a DG another run is processing (default ${LOCK_TIMEOUT_ENV} or 600)")
+    parser.add_argument("--date", help="Date to preview/verify, or last date to validate (YYYY-MM-DD, default today)")
+    parser.add_argument("--days", type=int, default=1, help="Number of dates to validate, ending at --date")
+    args = parser.parse_args()
+    
     # Use SharePoint path as base path (adjust per user machine if needed)
     sharepoint_path = Path('/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting')
     
     reporter = DailyReporter(base_path=sharepoint_path)
-    reporter.run()
+    if args.csv_engine:
+        SourceCache.csv_engine = args.csv_engine
+    reporter.extract_partition = None if args.extracts == "none" else args.extracts
+    reporter.all_manufacturers = args.all_manufacturers
+    reporter.lock_timeout = args.lock_timeout
+    reporter.engine = args.engine
+    if args.preview:
+        if args.date:
+            reporter.set_date(args.date)
+        sys.exit(0 if reporter.preview_uploads(args.sample_size) else 1)
+    if args.verify:
+        from engine_verification import verify_engines
+        sys.exit(0 if verify_engines(reporter, args.date or reporter.today_date, keep=args.keep_sandbox) else 1)
+    if args.validate_only:
+        from datetime import timedelta
+        end = datetime.strptime(args.date, "%Y-%m-%d") if args.date else datetime.now()
+        dates = [(end - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(args.days - 1, -1, -1)]
+        sys.exit(0 if reporter.validate_uploads(dates) else 1)
+    reporter.run(resume=args.resume, force=args.force, profile=args.profile)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Data Quality Profile
+Null rates, invalid formats (coordinates, mobile numbers, dates, Node IDs), range
+violations (outside the service area, future dates), inconsistent hierarchy spellings
+and the top offending values for every column of the Final report. Each column is
+factorized once and every check runs on its distinct values only
+"""
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import write_csv
+from sla_utils import parse_datetimes
+
+# Service area (India) - coordinates outside it are range violations
+COORDINATE_RANGES = {"Latitude": (6.0, 37.5), "Longitude": (68.0, 97.5)}
+MOBILE_PATTERN = r"^[6-9]\d{9}$"     # 10-digit Indian mobile after dropping +91 / 0 prefixes
+TOP_OFFENDING_VALUES = 5
+
+# Check per Final report column; every other column only gets null counts
+COLUMN_CHECKS = {
+    "Meter Serial No": "key",
+    "Node ID": "node_id",
+    "Latitude": "coordinate",
+    "Longitude": "coordinate",
+    "Mob No.": "mobile",
+    "Installation date": "past_date",
+    "Communicated At": "past_date",
+    "Circle": "name",
+    "Division": "name",
+    "Subdivision": "name",
+    "Feeder Name": "name",
+}
+SKIPPED_COLUMNS = {"Comm Status", "Remarks"}    # derived by the run itself
+
+COLUMNS = ["Column", "Check", "Rows", "Nulls", "Null %", "Invalid Format", "Out Of Range", "Inconsistent",
+           "Offending %", "Top Offending Values"]
+
+
+def _numbers(texts):
+    return pd.to_numeric(texts, errors="coerce")
+
+
+def _mobile_digits(texts):
+    """Digits of a mobile number, without a float '.0', separators or a +91/91/0 prefix"""
+    digits = texts.str.replace(r"\.0+$", "", regex=True).str.replace(r"[\s\-()+]", "", regex=True)
+    digits = digits.mask(digits.str.len().eq(12) & digits.str.startswith("91"), digits.str[2:])
+    return digits.mask(digits.str.len().eq(11) & digits.str.startswith("0"), digits.str[1:])
+
+
+def _inconsistent_names(raw, counts):
+    """Spellings that differ from the most common one only in case, spacing or punctuation"""
+    normalised = raw.str.upper().str.replace(r"[^A-Z0-9]+", "", regex=True)
+    canonical = (pd.DataFrame({"raw": raw, "norm": normalised, "n": counts})
+                 .sort_values("n", ascending=False, kind="stable")
+                 .drop_duplicates("norm").set_index("norm")["raw"])
+    return (raw != normalised.map(canonical)).to_numpy()
+
+
+def _check_uniques(column, check, values, counts, today):
+    """(invalid format, out of range, inconsistent) masks over a column's distinct non-blank values"""
+    texts = values.astype(str)
+    none = np.zeros(len(values), dtype=bool)
+    invalid, out_of_range, inconsistent = none, none, none
+    if check == "key":
+        # Every row past the first of a serial (the Final report should have one row per meter)
+        invalid = counts > 1
+    elif check == "node_id":
+        numbers = _numbers(values)
+        invalid = (numbers.isna() | (numbers != np.floor(numbers))).to_numpy()
+    elif check == "coordinate":
+        numbers = _numbers(values)
+        invalid = numbers.isna().to_numpy()
+        low, high = COORDINATE_RANGES[column]
+        out_of_range = (~invalid & ((numbers < low) | (numbers > high))).to_numpy()
+    elif check == "mobile":
+        invalid = ~_mobile_digits(texts.str.strip()).str.fullmatch(MOBILE_PATTERN).fillna(False).to_numpy(dtype=bool)
+    elif check == "past_date":
+        parsed = parse_datetimes(texts)
+        invalid = parsed.isna().to_numpy()
+        out_of_range = (parsed.dt.normalize() > today).to_numpy()
+    elif check == "name":
+        inconsistent = _inconsistent_names(texts, counts)
+    return invalid, out_of_range, inconsistent
+
+
+def profile_column(series, check, today):
+    """One profile row for a column: factorize once, check the distinct values, weight by their counts"""
+    codes, uniques = pd.factorize(series)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    if pd.api.types.is_numeric_dtype(series):
+        values = pd.Series(uniques)
+        blank = np.zeros(len(values), dtype=bool)
+    else:
+        values = pd.Series(uniques, dtype=object).astype(str)
+        blank = (values.str.strip() == "").to_numpy()
+
+    row = {"Column": series.name, "Check": check or "nulls", "Rows": int(len(series)),
+           "Nulls": int((codes < 0).sum() + counts[blank].sum()),
+           "Invalid Format": 0, "Out Of Range": 0, "Inconsistent": 0}
+    offending = np.zeros(len(uniques), dtype=bool)
+    if check:
+        keep = ~blank
+        masks = _check_uniques(series.name, check, values[keep].reset_index(drop=True), counts[keep], today)
+        for label, mask in zip(["Invalid Format", "Out Of Range", "Inconsistent"], masks):
+            full = np.zeros(len(uniques), dtype=bool)
+            full[keep] = mask
+            # A duplicated key counts its extra rows, every other check all rows of the value
+            row[label] = int((counts[full] - 1).sum()) if check == "key" else int(counts[full].sum())
+            offending |= full
+
+    row["Null %"] = round(100 * row["Nulls"] / len(series), 2) if len(series) else 0
+    bad_rows = row["Invalid Format"] + row["Out Of Range"] + row["Inconsistent"]
+    row["Offending %"] = round(100 * bad_rows / len(series), 2) if len(series) else 0
+    top = np.flatnonzero(offending)
+    top = top[np.argsort(-counts[top], kind="stable")][:TOP_OFFENDING_VALUES]
+    row["Top Offending Values"] = "; ".join(f"{values.iloc[i]} ({counts[i]})" for i in top)
+    return row
+
+
+def build_data_quality(df_final, today_date, raw_columns=None):
+    """Profile of every Final report column, one row per column.
+
+    raw_columns holds columns as they were before the run rewrote them (the hierarchy names
+    before alias resolution), so their spellings are profiled instead of the canonical names
+    """
+    today = pd.Timestamp(today_date)
+    raw_columns = raw_columns if raw_columns is not None else {}
+    rows = [profile_column(raw_columns[column] if column in raw_columns else df_final[column],
+                           COLUMN_CHECKS.get(column), today)
+            for column in df_final.columns if column not in SKIPPED_COLUMNS]
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def summarise_data_quality(df_quality):
+    """JSON view: per column counts and offending values, for columns with any nulls or issues"""
+    issues = df_quality[(df_quality[["Nulls", "Invalid Format", "Out Of Range", "Inconsistent"]] > 0).any(axis=1)]
+    return {
+        "columns_profiled": int(len(df_quality)),
+        "columns_with_issues": int(len(issues)),
+        "columns": {
+            row["Column"]: {
+                "nulls": int(row["Nulls"]),
+                "null_pct": float(row["Null %"]),
+                "invalid_format": int(row["Invalid Format"]),
+                "out_of_range": int(row["Out Of Range"]),
+                "inconsistent": int(row["Inconsistent"]),
+                "top_offending_values": row["Top Offending Values"],
+            }
+            for _, row in issues.iterrows()
+        },
+    }
+
+
+def write_data_quality(df_quality, output_dir, dg_name, date):
+    path = output_dir / f"Data_Quality_{dg_name}_{date}.csv"
+    write_csv(df_quality, path, index=False)
+    print(f"✨ Data quality profile: {path.name}")
+    return path
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Engine Verification (--verify)
+Runs the legacy engine (sequential pd.merge chain, fillna coalesce and row-by-row hierarchy
+names from legacy_engine, pandas CSV parser, one task at a time) and the optimised engine
+(pipeline planner, argmax coalesce, factorized name resolution, pyarrow CSV reader, concurrent
+stage DAG) on the same inputs in two sandboxes, then compares every output cell by cell.
+Row order is ignored and floats are compared with a tolerance
+"""
+
+import copy
+import hashlib
+import json
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import write_json
+from hierarchy_names import aliases_path
+from metrics_exporter import METRICS_FOLDER
+from run_manifest import MANIFEST_NAME
+from sla_utils import REPORT_NAME
+from source_cache import SourceCache
+from stage_dag import DEFAULT_WORKERS
+from status_history import HISTORY_FOLDER
+from status_transitions import find_previous_final_report
+
+VERIFY_FOLDER = "_verify"
+ENGINES = {
+    "legacy": {"engine": "legacy", "csv_engine": "pandas", "dag_workers": 1},
+    "optimised": {"engine": "optimised", "csv_engine": "auto", "dag_workers": DEFAULT_WORKERS},
+}
+FLOAT_RTOL = 1e-9
+FLOAT_ATOL = 1e-9
+HASH_DIGITS = 12          # significant digits numbers are rounded to before row hashing
+KEY_COLUMN = "Meter Serial No"
+MAX_SAMPLES = 5
+
+
+def _link_or_copy(source, target):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        target.symlink_to(source.resolve(), target_is_directory=source.is_dir())
+    except OSError:
+        # No symlink permission (e.g. Windows without developer mode)
+        if source.is_dir():
+            shutil.copytree(source, target)
+        else:
+            shutil.copy2(source, target)
+
+
+def build_sandbox(base_path, sandbox, date, dg_names, report_name=REPORT_NAME):
+    """Mirror what a run of `date` reads: raw uploads, the previous Final report, the history store and hierarchy aliases"""
+    base_path = Path(base_path)
+    for dg_name in dg_names:
+        raw_dir = base_path / date / report_name / dg_name / "raw_data"
+        _link_or_copy(raw_dir, sandbox / date / report_name / dg_name / "raw_data")
+        _, previous_path = find_previous_final_report(base_path, dg_name, date, report_name)
+        if previous_path is not None:
+            # Same relative place, so an archived (Parquet) previous day is found there too
+            _link_or_copy(previous_path, sandbox / previous_path.relative_to(base_path))
+        history_dir = base_path / HISTORY_FOLDER / report_name / dg_name
+        if history_dir.exists():
+            # Copied, not linked: the run appends today's Final to it
+            shutil.copytree(history_dir, sandbox / HISTORY_FOLDER / report_name / dg_name)
+    alias_file = aliases_path(base_path)
+    if alias_file.exists():
+        # Copied too: the run may append new spellings
+        target = aliases_path(sandbox)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(alias_file, target)
+
+
+def warm_file_cache(paths):
+    """Read the raw files once so the first engine does not pay for cold disk reads"""
+    for raw_dir in paths:
+        for f in raw_dir.iterdir():
+            if f.is_file():
+                with open(f, "rb") as handle:
+                    while handle.read(1 << 24):
+                        pass
+
+
+def run_engine(reporter, sandbox, date, settings):
+    """Process `date` in the sandbox with one engine's settings; returns wall seconds"""
+    engine_reporter = copy.copy(reporter)
+    engine_reporter.base_path = sandbox
+    engine_reporter.set_date(date)
+    engine_reporter.engine = settings["engine"]
+    engine_reporter.dag_workers = settings["dag_workers"]
+    engine_reporter.get_metrics_dir = lambda: sandbox / METRICS_FOLDER
+
+    previous_engine = SourceCache.csv_engine
+    SourceCache.csv_engine = settings["csv_engine"]
+    try:
+        start = time.perf_counter()
+        engine_reporter.process_reports(force=True)
+        return time.perf_counter() - start
+    finally:
+        SourceCache.csv_engine = previous_engine
+
+
+def _normalise(df):
+    """Numbers rounded to HASH_DIGITS significant digits, everything else as text"""
+    out = df.copy()
+    for column in out.columns:
+        numeric = pd.to_numeric(out[column], errors="coerce")
+        mask = numeric.notna()
+        if mask.any():
+            out.loc[mask, column] = [f"{v:.{HASH_DIGITS}g}" for v in numeric[mask]]
+    return out
+
+
+def _row_hashes(df):
+    return np.sort(pd.util.hash_pandas_object(df, index=False).to_numpy())
+
+
+def _cells_differ(a, b):
+    """Boolean frame of cells that differ beyond the float tolerance"""
+    differ = a.to_numpy() != b.to_numpy()
+    columns = np.flatnonzero(differ.any(axis=0))
+    for i in columns:
+        x = pd.to_numeric(a.iloc[:, i], errors="coerce").to_numpy(dtype=float)
+        y = pd.to_numeric(b.iloc[:, i], errors="coerce").to_numpy(dtype=float)
+        both = ~np.isnan(x) & ~np.isnan(y)
+        close = both & np.isclose(np.where(both, x, 0), np.where(both, y, 0), rtol=FLOAT_RTOL, atol=FLOAT_ATOL)
+        differ[:, i] &= ~close
+    return pd.DataFrame(differ, columns=a.columns)
+
+
+def compare_csv(legacy_path, optimised_path):
+    a = pd.read_csv(legacy_path, dtype=str, keep_default_na=False)
+    b = pd.read_csv(optimised_path, dtype=str, keep_default_na=False)
+    result = {"rows": [len(a), len(b)], "digest": hashlib.sha1(_row_hashes(_normalise(a)).tobytes()).hexdigest()[:16]}
+
+    common = [c for c in a.columns if c in b.columns]
+    missing = [c for c in a.columns if c not in b.columns]
+    extra = [c for c in b.columns if c not in a.columns]
+    if missing or extra:
+        result.update(missing_columns=missing, extra_columns=extra)
+    a, b = a[common], b[common]
+
+    # Fast path: same multiset of (rounded) rows, in any order
+    if not missing and not extra and len(a) == len(b) and np.array_equal(_row_hashes(_normalise(a)),
+                                                                          _row_hashes(_normalise(b))):
+        result["status"] = "identical"
+        return result
+
+    # Align rows on the meter serial when it is a unique key, otherwise on the sorted rows
+    if KEY_COLUMN in common and a[KEY_COLUMN].is_unique and b[KEY_COLUMN].is_unique:
+        only_legacy = a.loc[~a[KEY_COLUMN].isin(b[KEY_COLUMN]), KEY_COLUMN]
+        only_optimised = b.loc[~b[KEY_COLUMN].isin(a[KEY_COLUMN]), KEY_COLUMN]
+        result["rows_only_in_legacy"] = int(len(only_legacy))
+        result["rows_only_in_optimised"] = int(len(only_optimised))
+        if len(only_legacy) or len(only_optimised):
+            result["sample_unmatched_keys"] = (only_legacy.head(MAX_SAMPLES).tolist()
+                                               + only_optimised.head(MAX_SAMPLES).tolist())
+        a = a.set_index(KEY_COLUMN, drop=False)
+        keys = a.index.intersection(b[KEY_COLUMN])
+        a = a.loc[keys]
+        b = b.set_index(KEY_COLUMN, drop=False).loc[keys]
+    else:
+        rows = min(len(a), len(b))
+        a = a.iloc[_normalise(a).sort_values(common).index[:rows]]
+        b = b.iloc[_normalise(b).sort_values(common).index[:rows]]
+        keys = pd.RangeIndex(rows)
+
+    differ = _cells_differ(a, b)
+    column_diffs = {}
+    for column in common:
+        rows = np.flatnonzero(differ[column].to_numpy())
+        if len(rows):
+            column_diffs[column] = {
+                "cells": int(len(rows)),
+                "samples": [{"row": str(keys[r]), "legacy": a[column].iloc[r], "optimised": b[column].iloc[r]}
+                            for r in rows[:MAX_SAMPLES]],
+            }
+    result["different_cells"] = int(sum(d["cells"] for d in column_diffs.values()))
+    if column_diffs:
+        result["columns"] = column_diffs
+    unmatched = result.get("rows_only_in_legacy", 0) + result.get("rows_only_in_optimised", 0)
+    clean = not (missing or extra or column_diffs or unmatched or len(a) != len(b) or result["rows"][0] != result["rows"][1])
+    result["status"] = "within_tolerance" if clean else "different"
+    return result
+
+
+def _flatten(value, prefix=""):
+    if isinstance(value, dict):
+        items = {}
+        for k, v in value.items():
+            items.update(_flatten(v, f"{prefix}.{k}" if prefix else str(k)))
+        return items
+    if isinstance(value, list):
+        items = {}
+        for i, v in enumerate(value):
+            items.update(_flatten(v, f"{prefix}[{i}]"))
+        return items
+    return {prefix: value}
+
+
+def compare_json(legacy_path, optimised_path):
+    with open(legacy_path, encoding="utf-8") as f:
+        a = _flatten(json.load(f))
+    with open(optimised_path, encoding="utf-8") as f:
+        b = _flatten(json.load(f))
+    diffs = []
+    for key in sorted(set(a) | set(b)):
+        x, y = a.get(key), b.get(key)
+        if x == y:
+            continue
+        if (isinstance(x, (int, float)) and isinstance(y, (int, float))
+                and np.isclose(x, y, rtol=FLOAT_RTOL, atol=FLOAT_ATOL)):
+            continue
+        diffs.append({"key": key, "legacy": x, "optimised": y})
+    result = {"keys": [len(a), len(b)], "different_values": len(diffs)}
+    if diffs:
+        result["samples"] = diffs[:MAX_SAMPLES * 4]
+    result["status"] = "different" if diffs else "identical"
+    return result
+
+
+def compare_parquet(legacy_path, optimised_path):
+    a = pd.read_parquet(legacy_path)
+    b = pd.read_parquet(optimised_path)
+    result = {"rows": [len(a), len(b)]}
+    try:
+        pd.testing.assert_frame_equal(a, b, check_exact=False, rtol=FLOAT_RTOL, atol=FLOAT_ATOL)
+    except AssertionError as e:
+        result.update(status="different", message=" ".join(str(e).split())[:500])
+        return result
+    result["status"] = "identical"
+    return result
+
+
+COMPARERS = {".csv": compare_csv, ".json": compare_json, ".parquet": compare_parquet}
+
+
+def _output_files(sandbox, date):
+    """Every file under the date's DG output folders, extract and manufacturer subfolders included"""
+    root = sandbox / date
+    files = set()
+    for p in root.rglob("*"):
+        rel = p.relative_to(root)
+        if "output" in rel.parts and p.is_file() and not p.is_symlink():
+            files.add(rel)
+    return files
+
+
+def compare_outputs(legacy_dir, optimised_dir, date):
+    """Compare every CSV/JSON/Parquet report written under the two sandboxes' date folders"""
+    results = {}
+    legacy_files = _output_files(legacy_dir, date)
+    optimised_files = _output_files(optimised_dir, date)
+    for rel in sorted(legacy_files | optimised_files):
+        if rel.name == MANIFEST_NAME or rel.suffix.lower() not in COMPARERS:
+            continue
+        if rel not in optimised_files or rel not in legacy_files:
+            results[str(rel)] = {"status": "missing_in_optimised" if rel not in optimised_files else "missing_in_legacy"}
+            continue
+        compare = COMPARERS[rel.suffix.lower()]
+        try:
+            results[str(rel)] = compare(legacy_dir / date / rel, optimised_dir / date / rel)
+        except Exception as e:
+            results[str(rel)] = {"status": "error", "error": str(e)}
+    return results
+
+
+def print_verification(results, timings):
+    print(f"\n{'='*78}")
+    print(f"ENGINE VERIFICATION")
+    print(f"{'='*78}")
+    for rel, r in results.items():
+        icon = {"identical": "✅", "within_tolerance": "✅"}.get(r["status"], "❌")
+        detail = ""
+        if "different_cells" in r:
+            detail = f"{r['different_cells']:,} cell(s) differ"
+        elif "different_values" in r:
+            detail = f"{r['different_values']:,} value(s) differ"
+        unmatched = r.get("rows_only_in_legacy", 0) + r.get("rows_only_in_optimised", 0)
+        if unmatched:
+            detail += f", {unmatched:,} unmatched row(s)"
+        if "rows" in r:
+            detail = f"rows {r['rows'][0]:,}/{r['rows'][1]:,} " + detail
+        print(f"{icon} {r['status']:<18} {rel}  {detail}")
+        if "message" in r:
+            print(f"     {r['message']}")
+        for column, d in r.get("columns", {}).items():
+            sample = d["samples"][0]
+            print(f"     {column}: {d['cells']:,} cell(s), e.g. row {sample['row']}: "
+                  f"{sample['legacy']!r} vs {sample['optimised']!r}")
+    print(f"{'-'*78}")
+    for engine, seconds in timings.items():
+        print(f"⏱️ {engine:<10} {seconds:8.2f}s  {ENGINES[engine]}")
+    if timings.get("optimised"):
+        print(f"🚀 Speedup: {timings['legacy'] / timings['optimised']:.2f}x")
+
+
+def verify_engines(reporter, date, keep=False):
+    """Run both engines on `date`, compare their outputs and write _verify/Verify_[DATE].json"""
+    base_path = Path(reporter.base_path)
+    report_folder = base_path / date / REPORT_NAME
+    dg_names = sorted(p.parent.name for p in report_folder.glob("*/raw_data") if any(p.iterdir())) \
+        if report_folder.exists() else []
+    if not dg_names:
+        print(f"❌ No DG raw data found for {date} in {report_folder}")
+        return False
+    print(f"\n🔬 Verifying engines for {date}: {', '.join(dg_names)}")
+    warm_file_cache([report_folder / dg / "raw_data" for dg in dg_names])
+
+    work_dir = Path(tempfile.mkdtemp(prefix=f"sla_verify_{date}_"))
+    timings = {}
+    try:
+        for engine, settings in ENGINES.items():
+            sandbox = work_dir / engine
+            build_sandbox(base_path, sandbox, date, dg_names)
+            print(f"\n{'#'*70}\n# {engine.upper()} ENGINE\n{'#'*70}")
+            timings[engine] = run_engine(reporter, sandbox, date, settings)
+        results = compare_outputs(work_dir / "legacy", work_dir / "optimised", date)
+    finally:
+        if keep:
+            print(f"📂 Sandboxes kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    passed = all(r["status"] in ["identical", "within_tolerance"] for r in results.values())
+    print_verification(results, timings)
+
+    out_dir = base_path / VERIFY_FOLDER
+    out_dir.mkdir(parents=True, exist_ok=True)
+    report_path = out_dir / f"Verify_{date}.json"
+    write_json({
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "date": date,
+        "dgs": dg_names,
+        "engines": ENGINES,
+        "tolerance": {"rtol": FLOAT_RTOL, "atol": FLOAT_ATOL},
+        "seconds": {k: round(v, 3) for k, v in timings.items()},
+        "speedup": round(timings["legacy"] / timings["optimised"], 3) if timings.get("optimised") else None,
+        "passed": passed,
+        "files": results,
+    }, report_path, ensure_ascii=False, indent=2, default=str)
+    print(f"{'✅ Outputs match' if passed else '❌ Outputs differ'} - diff report: {report_path}")
+    return passed
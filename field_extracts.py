@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Field Extracts
+Splits the Final report into one CSV per Subdivision (optionally per Subdivision and Comm
+Status) for the subdivision offices. The frame is sorted once by partition and each
+partition is a contiguous slice, written on a thread pool, with an index of every file
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import write_csv
+
+EXTRACTS_FOLDER = "Subdivision_Extracts"
+MANUFACTURERS_FOLDER = "Manufacturers"    # per-manufacturer outputs (--all-manufacturers)
+EXTRACT_PARTITIONS = {
+    "subdivision": ["Subdivision"],
+    "subdivision-status": ["Subdivision", "Comm Status"],
+}
+UNASSIGNED = "Unassigned"
+MAX_WORKERS = 8
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def sanitise_filename(value):
+    """Filesystem-safe name part (no separators, spaces or reserved characters)"""
+    cleaned = _UNSAFE_CHARS.sub("_", str(value).strip()).strip("._")
+    return cleaned or UNASSIGNED
+
+
+def partition_frame(df, columns):
+    """Yield (key tuple, frame slice) per partition from a single stable sort of the rows"""
+    keys = pd.DataFrame({c: df[c].astype(object).fillna("").astype(str).str.strip() if c in df.columns else UNASSIGNED
+                         for c in columns}, index=df.index)
+    keys = keys.mask(keys.isin(["", "nan", "None", "<NA>"]), UNASSIGNED)
+    group_ids = keys.groupby(columns, sort=True, dropna=False).ngroup().to_numpy()
+    order = np.argsort(group_ids, kind="stable")
+    sorted_df = df.take(order)
+    sorted_keys = keys.take(order)
+    ends = np.cumsum(np.bincount(group_ids))
+    start = 0
+    for end in ends:
+        yield tuple(sorted_keys.iloc[start]), sorted_df.iloc[start:end]
+        start = end
+
+
+def write_extracts(df_final, output_dir, dg_name, date, partition="subdivision", max_workers=MAX_WORKERS):
+    """Write every partition of the Final report plus an index; returns the index DataFrame"""
+    columns = EXTRACT_PARTITIONS[partition]
+    extracts_dir = Path(output_dir) / EXTRACTS_FOLDER
+    extracts_dir.mkdir(parents=True, exist_ok=True)
+    index_path = extracts_dir / f"Extracts_Index_{dg_name}_{date}.csv"
+
+    # Drop extracts of an earlier run of the same day, so renamed subdivisions do not linger
+    if index_path.exists():
+        for name in pd.read_csv(index_path, usecols=["File"])["File"]:
+            (extracts_dir / name).unlink(missing_ok=True)
+
+    jobs = []
+    used = set()
+    for key, frame in partition_frame(df_final, columns):
+        stem = "_".join(sanitise_filename(k) for k in key)
+        # Sanitising can map two names to one file (and Windows/macOS are case-insensitive)
+        unique, n = stem, 2
+        while unique.lower() in used:
+            unique, n = f"{stem}_{n}", n + 1
+        used.add(unique.lower())
+        jobs.append((key, extracts_dir / f"Final_SLA_Report_{unique}_{date}.csv", frame))
+
+    def write(job):
+        _, path, frame = job
+        write_csv(frame, path, index=False)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(write, jobs))
+
+    index = pd.DataFrame([dict(zip(columns, key), File=path.name, Rows=len(frame)) for key, path, frame in jobs],
+                         columns=columns + ["File", "Rows"])
+    write_csv(index, index_path, index=False)
+    print(f"✨ {len(jobs)} {partition} extract(s) written to {EXTRACTS_FOLDER}/ (index: {index_path.name})")
+    return index
@@ -1,18 +1,29 @@
 #!/usr/bin/env python3
 """
-Generate simplified comm status reports from existing Final_SLA_Report files
+Generate simplified comm status reports from existing Final_SLA_Report files,
+or from Final reports built in memory (--in-process, see sla_api)
 """
 
+import argparse
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
 import json
 
-def generate_comm_summaries(final_report_path, output_dir, dg_name, date):
-    """Generate simplified comm status summary reports from Final SLA Report"""
+from atomic_io import write_csv
+
+def generate_comm_summaries(final_report, output_dir, dg_name, date):
+    """Generate simplified comm status summary reports from Final SLA Report.
+
+    final_report is a Final_SLA_Report CSV path or the Final DataFrame itself (e.g. from
+    sla_api.run_sla). With output_dir None the reports are only returned, not written.
+    """
     
-    print(f"📊 Reading Final SLA Report: {final_report_path.name}")
-    df_final = pd.read_csv(final_report_path)
+    if isinstance(final_report, pd.DataFrame):
+        df_final = final_report
+    else:
+        print(f"📊 Reading Final SLA Report: {final_report.name}")
+        df_final = pd.read_csv(final_report)
     
     print(f"   Total records: {len(df_final)}")
     
@@ -97,9 +108,10 @@ def generate_comm_summaries(final_report_path, output_dir, dg_name, date):
             })
     
     df_status = pd.DataFrame(status_data)
-    status_path = output_dir / f"Comm_Status_Summary_{dg_name}_{date}.csv"
-    df_status.to_csv(status_path, index=False)
-    print(f"✨ Status summary: {status_path.name}")
+    if output_dir is not None:
+        status_path = output_dir / f"Comm_Status_Summary_{dg_name}_{date}.csv"
+        write_csv(df_status, status_path, index=False)
+        print(f"✨ Status summary: {status_path.name}")
     
     # ===== REPORT 2: AGEING ANALYSIS =====
     print(f"📊 Analyzing ageing for Non Comm and Never Comm meters...")
@@ -167,10 +179,10 @@ def generate_comm_summaries(final_report_path, output_dir, dg_name, date):
                     "Percentage": round(100 * count / len(never_comm_df), 2) if len(never_comm_df) > 0 else 0
                 })
     
-    if ageing_data:
-        df_ageing = pd.DataFrame(ageing_data)
+    df_ageing = pd.DataFrame(ageing_data)
+    if ageing_data and output_dir is not None:
         ageing_path = output_dir / f"Comm_Ageing_Analysis_{dg_name}_{date}.csv"
-        df_ageing.to_csv(ageing_path, index=False)
+        write_csv(df_ageing, ageing_path, index=False)
         print(f"✨ Ageing analysis: {ageing_path.name}")
     
     # Print summary
@@ -216,37 +228,51 @@ def generate_comm_summaries(final_report_path, output_dir, dg_name, date):
     return {
         'overall': overall_row,
         'status_count': len(status_data),
-        'ageing_count': len(ageing_data) if ageing_data else 0
+        'ageing_count': len(ageing_data) if ageing_data else 0,
+        'status': df_status,
+        'ageing': df_ageing,
     }
 
 
 if __name__ == "__main__":
-    base_path = Path("/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting")
-    date = "2026-02-06"
+    parser = argparse.ArgumentParser(description="Simplified comm status reports per DG")
+    parser.add_argument("--base-path", default="/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting")
+    parser.add_argument("--date", default="2026-02-06")
+    parser.add_argument("--dg", nargs="+", help="Only these DG folders (default: all)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Build the Final reports in memory from raw_data instead of reading Final_SLA_Report CSVs")
+    args = parser.parse_args()
+    base_path = Path(args.base_path)
+    date = args.date
     
     print(f"🚀 Generating Simplified Comm Status Reports for {date}")
     print(f"{'='*70}\n")
     
     report_folder = base_path / date / "Report_1_Comms_Reporting"
     
+    if args.in_process:
+        from sla_api import run_sla
+        finals = {dg_name: result.df_final for dg_name, result in run_sla(date, args.dg, base_path)}
+    else:
+        finals = {}
+        for dg_folder in sorted(report_folder.iterdir()):
+            if dg_folder.is_dir() and dg_folder.name.startswith("DG") and (not args.dg or dg_folder.name in args.dg):
+                finals[dg_folder.name] = dg_folder / "output" / f"Final_SLA_Report_{date}.csv"
+    
     # Process each DG
-    for dg_folder in report_folder.iterdir():
-        if dg_folder.is_dir() and dg_folder.name.startswith("DG"):
-            dg_name = dg_folder.name
-            output_dir = dg_folder / "output"
-            final_report = output_dir / f"Final_SLA_Report_{date}.csv"
-            
-            if not final_report.exists():
-                print(f"⚠️  Skipping {dg_name} - Final_SLA_Report not found")
-                continue
-            
-            print(f"\n{'='*70}")
-            print(f"Processing {dg_name}")
-            print(f"{'='*70}")
-            
-            result = generate_comm_summaries(final_report, output_dir, dg_name, date)
+    for dg_name, final_report in finals.items():
+        output_dir = report_folder / dg_name / "output"
+        if isinstance(final_report, Path) and not final_report.exists():
+            print(f"⚠️  Skipping {dg_name} - Final_SLA_Report not found")
+            continue
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        print(f"\n{'='*70}")
+        print(f"Processing {dg_name}")
+        print(f"{'='*70}")
+        
+        result = generate_comm_summaries(final_report, output_dir, dg_name, date)
     
     print(f"\n{'='*70}")
     print(f"✅ All simplified reports generated successfully!")
     print(f"{'='*70}")
-
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Hierarchy Names
+Resolves the raw Circle / Division / Subdivision spellings coming out of the coalesce
+(Warehouse vs NSC / CI-MI / MI) to one canonical name each, using an editable alias map
+kept beside the history store. Only distinct values are resolved and the columns come
+back as categoricals, so every summary groups one subdivision as one row
+"""
+
+import hashlib
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import FileLock, write_csv
+
+HIERARCHY_FOLDER = "_hierarchy"
+ALIASES_FILE = "Hierarchy_Aliases.csv"
+HIERARCHY_LEVELS = ["Circle", "Division", "Subdivision"]
+ALIAS_COLUMNS = ["Level", "Name", "Canonical", "Source"]
+AUTO = "auto"    # Source of rows added by a run; to override, edit Canonical and set any other Source (or add such rows)
+
+
+def aliases_path(base_path):
+    return Path(base_path) / HIERARCHY_FOLDER / ALIASES_FILE
+
+
+def alias_fingerprint(base_path):
+    """Hash of the manual alias rows (None without any).
+
+    Auto rows only ever add keys a run derived from its own data, so a run appending new
+    spellings does not invalidate its checkpoints or other DGs' run manifests.
+    """
+    rows = HierarchyAliases.open(base_path).rows
+    manual = rows[rows["Source"] != AUTO].sort_values(ALIAS_COLUMNS)
+    if manual.empty:
+        return None
+    return hashlib.sha1(manual.to_csv(index=False).encode("utf-8")).hexdigest()
+
+
+def name_key(names):
+    """Spelling-insensitive key: upper case, punctuation and runs of spaces folded to one space"""
+    return names.str.upper().str.replace(r"[^A-Z0-9]+", " ", regex=True).str.strip()
+
+
+def tidy(names):
+    return names.str.strip().str.replace(r"\s+", " ", regex=True)
+
+
+def _case_rank(name):
+    """0 upper case, 1 every word capitalised ('S-Div1'), 2 anything else ('sd-a', 'circle n')"""
+    if name == name.upper():
+        return 0
+    words = [w for w in re.split(r"[^A-Za-z0-9]+", name) if w]
+    return 1 if all(not w[0].isalpha() or w[0].isupper() for w in words) else 2
+
+
+def canonical_spelling(spellings):
+    """Best-formed of a key's spellings: upper case, else capitalised, ties alphabetical.
+
+    Only depends on which spellings were seen, not on how often or in which run; a key seen
+    in lower case only gets the upper-case form.
+    """
+    best = min(spellings, key=lambda name: (_case_rank(name), name))
+    return best if _case_rank(best) < 2 else best.upper()
+
+
+class HierarchyAliases:
+    """Alias map: (level, name key) -> canonical name, persisted as a CSV anyone can edit.
+
+    Rows whose Source is not 'auto' win over auto rows, so a manual row can merge two
+    spellings that differ by more than case/punctuation (e.g. 'Sub-Div A' -> 'SD-A').
+    An auto key's name is the canonical_spelling of every spelling stored or seen for it
+    (the Canonical column of auto rows is only informative).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.rows = self._read()
+        self.manual = {}
+        self.spellings = {}
+        self.new_rows = []
+        for row in self.rows.itertuples(index=False):
+            key = (row.Level, self._key(row.Name))
+            if row.Source != AUTO:
+                self.manual[key] = row.Canonical
+            else:
+                self.spellings.setdefault(key, set()).add(row.Name)
+        self.known = set(zip(self.rows["Level"], self.rows["Name"]))
+
+    @classmethod
+    def open(cls, base_path):
+        return cls(aliases_path(base_path))
+
+    @staticmethod
+    def _key(name):
+        return name_key(pd.Series([name], dtype=object)).iloc[0]
+
+    def _read(self):
+        if not self.path.exists():
+            return pd.DataFrame(columns=ALIAS_COLUMNS, dtype=object)
+        rows = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+        return rows.reindex(columns=ALIAS_COLUMNS, fill_value=AUTO)
+
+    def add(self, level, name):
+        """Record a (tidy) spelling; new ones are appended to the map by save()"""
+        if (level, name) in self.known:
+            return
+        self.known.add((level, name))
+        self.spellings.setdefault((level, self._key(name)), set()).add(name)
+        self.new_rows.append({"Level": level, "Name": name, "Source": AUTO})
+
+    def canonical(self, level, key):
+        """The manual row's name for a key, else the canonical_spelling of its spellings (None if unseen)"""
+        if (level, key) in self.manual:
+            return self.manual[(level, key)]
+        spellings = self.spellings.get((level, key))
+        return canonical_spelling(spellings) if spellings else None
+
+    def resolve(self, values, level):
+        """Canonical categorical for a column (its spellings are recorded first, so they all count)"""
+        codes, uniques = pd.factorize(values)
+        names = tidy(pd.Series(uniques, dtype=object).astype(str))
+        keys = name_key(names)
+        for name, key in zip(names, keys):
+            if key:
+                self.add(level, name)
+        canonical = np.array([self.canonical(level, key) if key else None for key in keys], dtype=object)
+
+        resolved = pd.Categorical(canonical)
+        row_codes = np.where(codes >= 0, resolved.codes[np.maximum(codes, 0)], -1)
+        return pd.Series(pd.Categorical.from_codes(row_codes, categories=resolved.categories),
+                         index=values.index, name=values.name)
+
+    def save(self):
+        """Append this run's new spellings (re-reading first, another DG or process may have added some)"""
+        if not self.new_rows:
+            return
+        with FileLock(self.path.with_suffix(".lock"), label="hierarchy alias map"):
+            stored = HierarchyAliases(self.path)
+            added = [row for row in self.new_rows if (row["Level"], row["Name"]) not in stored.known]
+            if added:
+                for row in added:
+                    stored.add(row["Level"], row["Name"])
+                rows = pd.concat([stored.rows, pd.DataFrame(added, columns=ALIAS_COLUMNS)], ignore_index=True)
+                # Keep the informative Canonical column of auto rows in step with the merged spellings
+                rows["Canonical"] = [canonical if source != AUTO else stored.canonical(level, self._key(name))
+                                     for level, name, canonical, source in rows.itertuples(index=False)]
+                write_csv(rows, self.path, index=False)
+            self.new_rows = []
+
+
+def resolve_hierarchy(df, aliases, levels=HIERARCHY_LEVELS):
+    """Copy of df with each hierarchy column resolved; returns (df, {level: (spellings, canonical names)})"""
+    df = df.copy(deep=False)
+    changes = {}
+    for level in levels:
+        if level in df.columns:
+            raw = df[level]
+            df[level] = aliases.resolve(raw, level)
+            changes[level] = (int(raw.nunique()), len(df[level].cat.categories))
+    return df, changes
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Legacy Engine
+The Master/Final build done the way it was before the pipeline planner: one pd.merge per join
+in spec order on the full frames, fillna coalescing and a row-by-row hierarchy name lookup.
+Kept as the reference --verify diffs the optimised engine (pipeline_plan, hierarchy_names)
+against, and selectable with DailyReporter.engine = "legacy".
+
+It is a reimplementation driven by pipeline_spec.json, not the pre-planner code itself: it
+reads the same SourceCache frames and shares the spec, the NodeId key transform and the
+source codes, so a bug in loading the raw files or in the spec is on both sides of the diff
+and --verify does not catch it
+"""
+
+import numpy as np
+import pandas as pd
+
+from hierarchy_names import HIERARCHY_LEVELS, name_key, tidy
+from pipeline_plan import KEY_TRANSFORMS, column_codes
+
+ENGINES = ["optimised", "legacy"]
+
+
+def build_master(spec, sources, is_report_row=None):
+    """Merge every available source onto the base one after another; returns (df_master, stats).
+
+    is_report_row(df) marks the rows the stats count (default every row), as in build_master
+    of pipeline_plan.
+    """
+    base = spec["base"]
+    df_master = sources[base]
+    report_rows = (lambda df: df[is_report_row(df)]) if is_report_row else (lambda df: df)
+    stats = {base: {"total": len(report_rows(df_master))}}
+
+    for join in spec["joins"]:
+        source = join["source"]
+        if sources.get(source) is None:
+            continue
+        if join["left_on"] not in df_master.columns:
+            print(f"⚠️ Skipping {join['label']} merge: {join['left_on']} not found in master data")
+            continue
+        print(f"🔗 Merging {join['label']}...")
+        df_source = sources[source]
+        right_on = spec["sources"][source]["key"]
+
+        left_on = join["left_on"]
+        if join.get("left_transform"):
+            left_on = f"{left_on}_str"
+            df_master[left_on] = df_master[join["left_on"]].apply(KEY_TRANSFORMS[join["left_transform"]])
+
+        # Track mapping stats
+        matched = int(df_source[right_on].isin(report_rows(df_master)[left_on]).sum())
+        stats[source] = {'total': len(df_source), 'mapped': matched, 'unmapped': len(df_source) - matched}
+
+        df_master = pd.merge(df_master, df_source, left_on=left_on, right_on=right_on, how='left',
+                             suffixes=tuple(join["suffixes"]))
+        if left_on != join["left_on"]:
+            df_master.drop(columns=[left_on], inplace=True)
+
+    print(f"✅ {len(stats) - 1} source(s) joined (legacy merge chain)")
+    return df_master, stats
+
+
+def coalesce_cols(df, base_col, sources):
+    """fillna through the sources in order; returns (values, position of the column used or -1)"""
+    columns = [base_col] + list(sources)
+    result = df[base_col].copy() if base_col in df.columns else pd.Series([pd.NA] * len(df), index=df.index)
+    positions = np.where(result.notna().to_numpy(), 0, -1).astype(np.int8)
+    for i, s in enumerate(columns[1:], start=1):
+        if s in df.columns:
+            positions[(result.isna() & df[s].notna()).to_numpy()] = i
+            result = result.fillna(df[s])
+    return result, positions
+
+
+def build_intermediate(spec, df_master):
+    """Coalesced Final_* columns added to the whole Master, then select/rename; same result as pipeline_plan's"""
+    df_master = df_master.copy(deep=False)
+    codes = column_codes(spec)
+    provenance = {}
+    for name, inputs in spec["coalesce"].items():
+        df_master[name], positions = coalesce_cols(df_master, inputs[0], inputs[1:])
+        labels = np.array([codes.get(c, c) for c in inputs] + [""], dtype=object)
+        provenance[name] = pd.Categorical(labels[positions], categories=list(dict.fromkeys(labels)))
+
+    final_cols, rename_dict, missing_columns = [], {}, []
+    for requested, actual in spec["final_columns"].items():
+        if actual in df_master.columns:
+            final_cols.append(actual)
+            rename_dict[actual] = requested
+        else:
+            missing_columns.append(requested)
+            print(f"⚠️ Column {requested} ({actual}) not found")
+
+    df_intermediate = df_master[final_cols].rename(columns=rename_dict)
+    for missing_col in missing_columns:
+        df_intermediate[missing_col] = ""
+    df_provenance = pd.DataFrame({f"{requested} Source": provenance[actual]
+                                  for requested, actual in spec["final_columns"].items() if actual in provenance},
+                                 index=df_intermediate.index)
+    return df_intermediate, df_provenance
+
+
+def resolve_hierarchy(df, aliases, levels=HIERARCHY_LEVELS):
+    """hierarchy_names.resolve_hierarchy one row at a time (same alias rules, new spellings queued on `aliases`)"""
+    df = df.copy(deep=False)
+    changes = {}
+    for level in levels:
+        if level not in df.columns:
+            continue
+        raw = df[level]
+        # Every spelling is recorded before any row is named, so they all count
+        for name in tidy(raw.dropna().astype(str)).unique():
+            if name_key(pd.Series([name], dtype=object)).iloc[0]:
+                aliases.add(level, name)
+
+        def canonical(value):
+            if pd.isna(value):
+                return None
+            key = name_key(tidy(pd.Series([str(value)], dtype=object))).iloc[0]
+            return aliases.canonical(level, key) if key else None
+
+        df[level] = pd.Categorical(raw.apply(canonical))
+        changes[level] = (int(raw.nunique()), len(df[level].cat.categories))
+    return df, changes
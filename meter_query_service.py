@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Meter Query Service
+Read-only HTTP API for meter lookup and drill-down lists, served from an
+in-memory index over the latest Final_SLA_Report files
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sla_utils import DATE_FOLDER_PATTERN, REPORT_NAME, WebhookManager
+
+# Query parameter -> indexed column
+GROUP_COLUMNS = {
+    "circle": "Circle",
+    "division": "Division",
+    "subdivision": "Subdivision",
+    "status": "Comm Status",
+    "dg": "DG",
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 5000
+
+
+def normalise_key(value):
+    """Normalise a lookup value so 'sd-a ' and 'SD-A' hit the same group"""
+    return str(value).strip().lower()
+
+
+def find_latest_final_reports(base_path, report_name=REPORT_NAME):
+    """Return (date, [Final_SLA_Report paths]) for the newest date folder that has any"""
+    base_path = Path(base_path)
+    if not base_path.exists():
+        return None, []
+
+    date_folders = sorted(
+        (f for f in base_path.iterdir() if f.is_dir() and DATE_FOLDER_PATTERN.match(f.name)),
+        key=lambda f: f.name,
+        reverse=True,
+    )
+    for date_folder in date_folders:
+        date = date_folder.name
+        reports = sorted((date_folder / report_name).glob(f"*/output/Final_SLA_Report_{date}.csv"))
+        if reports:
+            return date, reports
+    return None, []
+
+
+class MeterIndex:
+    """Immutable in-memory index over one day's Final_SLA_Report files"""
+
+    def __init__(self, df, report_date, source_files):
+        self.df = df.reset_index(drop=True)
+        self.report_date = report_date
+        self.source_files = [str(f) for f in source_files]
+        self.loaded_at = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        # Hash index on Meter Serial No (built eagerly so the first lookup is not slow)
+        self.serial_index = pd.Index(self.df["Meter Serial No"].astype(str).str.strip())
+        self.serial_index.get_indexer_for([""])
+
+        # Group indexes: column -> {normalised value: sorted row positions}
+        self.group_indexes = {}
+        for param, col in GROUP_COLUMNS.items():
+            if col not in self.df.columns:
+                continue
+            groups = {}
+            for value, positions in self.df.groupby(col, sort=False, observed=True).indices.items():
+                key = normalise_key(value)
+                if key in groups:
+                    positions = np.union1d(groups[key], positions)
+                groups[key] = positions
+            self.group_indexes[param] = groups
+
+    @classmethod
+    def from_files(cls, report_date, report_files):
+        """Load one or more DG Final reports into a single index"""
+        frames = []
+        for report_file in report_files:
+            df = pd.read_csv(report_file, dtype=str, keep_default_na=False, na_values=[""])
+            df["DG"] = Path(report_file).parent.parent.name
+            frames.append(df)
+        df = pd.concat(frames, ignore_index=True)
+        for col in GROUP_COLUMNS.values():
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        return cls(df, report_date, report_files)
+
+    def __len__(self):
+        return len(self.df)
+
+    def _records(self, positions):
+        """Convert row positions to JSON-safe dicts"""
+        rows = self.df.iloc[positions].astype(object)
+        return rows.where(rows.notna(), None).to_dict("records")
+
+    def lookup(self, serial):
+        """Return every row for a meter serial (a meter can appear in more than one DG)"""
+        positions = self.serial_index.get_indexer_for([str(serial).strip()])
+        return self._records(positions[positions >= 0])
+
+    def filter_positions(self, filters):
+        """Intersect group indexes for the given {param: value} filters"""
+        unknown = [p for p in filters if p not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unsupported filter(s): {unknown}. Use {list(GROUP_COLUMNS)}")
+
+        candidates = []
+        for param, value in filters.items():
+            groups = self.group_indexes.get(param, {})
+            candidates.append(groups.get(normalise_key(value), np.array([], dtype=np.intp)))
+
+        if not candidates:
+            return np.arange(len(self.df))
+
+        # Intersect smallest first so each step is as cheap as possible
+        candidates.sort(key=len)
+        positions = candidates[0]
+        for other in candidates[1:]:
+            if len(positions) == 0:
+                break
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+    def query(self, filters, page=1, page_size=DEFAULT_PAGE_SIZE):
+        """Return one page of rows matching all filters"""
+        page = max(int(page), 1)
+        page_size = min(max(int(page_size), 1), MAX_PAGE_SIZE)
+        positions = self.filter_positions(filters)
+        start = (page - 1) * page_size
+        return {
+            "report_date": self.report_date,
+            "filters": filters,
+            "total": int(len(positions)),
+            "page": page,
+            "page_size": page_size,
+            "pages": int(-(-len(positions) // page_size)),
+            "records": self._records(positions[start:start + page_size]),
+        }
+
+    def summary(self):
+        """Comm Status counts per DG for a quick health check"""
+        counts = {}
+        if "Comm Status" in self.df.columns:
+            grouped = self.df.groupby(["DG", "Comm Status"], observed=True).size()
+            for (dg, status), count in grouped.items():
+                counts.setdefault(str(dg), {})[str(status)] = int(count)
+        return {
+            "report_date": self.report_date,
+            "loaded_at": self.loaded_at,
+            "total_records": len(self.df),
+            "source_files": self.source_files,
+            "comm_status_by_dg": counts,
+        }
+
+
+class MeterQueryService:
+    """Holds the current MeterIndex and swaps in a new one when a newer report appears"""
+
+    def __init__(self, base_path, report_name=REPORT_NAME, reload_interval=60, settle_seconds=30):
+        self.base_path = Path(base_path)
+        self.report_name = report_name
+        self.reload_interval = reload_interval
+        self.settle_seconds = settle_seconds
+        self.index = None
+        self._signature = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def _report_signature(self, report_files):
+        return tuple((str(f), f.stat().st_mtime_ns, f.stat().st_size) for f in report_files)
+
+    def reload_if_changed(self):
+        """Build a new index off to the side and swap it in; the old one keeps serving meanwhile"""
+        with self._reload_lock:
+            report_date, report_files = find_latest_final_reports(self.base_path, self.report_name)
+            if not report_files:
+                return False
+
+            # Skip files still being written (or synced) by a running report job
+            newest_mtime = max(f.stat().st_mtime for f in report_files)
+            if self.index is not None and time.time() - newest_mtime < self.settle_seconds:
+                return False
+
+            signature = self._report_signature(report_files)
+            if signature == self._signature:
+                return False
+
+            started = time.time()
+            try:
+                new_index = MeterIndex.from_files(report_date, report_files)
+            except Exception as e:
+                print(f"❌ Failed to load reports for {report_date}: {e}")
+                return False
+
+            self.index = new_index  # single reference swap - readers never see a partial index
+            self._signature = signature
+            print(f"🔄 Loaded {len(new_index)} meters for {report_date} from {len(report_files)} report(s) "
+                  f"in {time.time() - started:.1f}s")
+            return True
+
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"⚠️ Reload check failed: {e}")
+
+    def start_watcher(self):
+        """Poll for newer Final reports in a background thread"""
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+class MeterQueryHandler(BaseHTTPRequestHandler):
+    """Routes: /health, /summary, /meter/<serial>, /meters?circle=&division=&subdivision=&status=&dg=&page=&page_size="""
+
+    service = None  # bound by make_handler()
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        path = url.path.rstrip("/") or "/"
+        index = self.service.index  # take one reference for the whole request
+
+        if path in ("/", "/health"):
+            self._send_json(200, {
+                "status": "ok" if index is not None else "loading",
+                "report_date": index.report_date if index is not None else None,
+                "records": len(index) if index is not None else 0,
+            })
+            return
+
+        if index is None:
+            self._send_json(503, {"error": "No Final_SLA_Report loaded yet"})
+            return
+
+        try:
+            if path == "/summary":
+                self._send_json(200, index.summary())
+            elif path.startswith("/meter/"):
+                serial = urllib.parse.unquote(path[len("/meter/"):])
+                records = index.lookup(serial)
+                if records:
+                    self._send_json(200, {"report_date": index.report_date, "meter": serial, "records": records})
+                else:
+                    self._send_json(404, {"error": f"Meter {serial} not found", "report_date": index.report_date})
+            elif path == "/meters":
+                page = params.pop("page", 1)
+                page_size = params.pop("page_size", DEFAULT_PAGE_SIZE)
+                self._send_json(200, index.query(params, page=page, page_size=page_size))
+            else:
+                self._send_json(404, {"error": f"Unknown path {path}"})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            print(f"❌ Query error: {e}")
+            self._send_json(500, {"error": "Internal error"})
+
+
+def make_handler(service):
+    """Bind a handler class to a service instance"""
+    return type("BoundMeterQueryHandler", (MeterQueryHandler,), {"service": service})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve meter lookups from the latest Final_SLA_Report")
+    parser.add_argument("--base-path", default='/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting')
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--reload-interval", type=int, default=60, help="Seconds between checks for a newer report")
+    args = parser.parse_args()
+
+    service = MeterQueryService(args.base_path, reload_interval=args.reload_interval)
+    print(f"📦 Loading latest Final_SLA_Report from {args.base_path}...")
+    if not service.reload_if_changed():
+        print("⚠️ No Final_SLA_Report found yet - will keep checking")
+    service.start_watcher()
+
+    manager = WebhookManager(port=args.port, handler_class=make_handler(service), host=args.host)
+    if not manager.start_server():
+        return
+    print(f"🔎 Query API ready: http://{args.host}:{args.port}/meters?subdivision=<name>&status=Non%20Comm")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        service.stop()
+        manager.stop_server()
+
+
+if __name__ == "__main__":
+    main()
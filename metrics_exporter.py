@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Metrics Exporter
+Collects run-health numbers (durations, rows per source, mapping stats, peak memory,
+output sizes, Comm Status totals) and writes them in Prometheus textfile-collector
+format, atomically, for node_exporter to scrape
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+from atomic_io import write_text
+
+METRICS_DIR_ENV = "SLA_METRICS_DIR"
+METRICS_FILE_NAME = "sla_reporting.prom"
+METRICS_FOLDER = "_metrics"
+
+# name: (type, help)
+METRIC_DEFINITIONS = {
+    "sla_report_date_info": ("gauge", "Report date processed by the last run"),
+    "sla_run_success": ("gauge", "1 if the last run finished without an error"),
+    "sla_run_duration_seconds": ("gauge", "Wall time of the last run"),
+    "sla_run_timestamp_seconds": ("gauge", "Unix time the last run finished"),
+    "sla_peak_memory_bytes": ("gauge", "Peak resident memory of the last run"),
+    "sla_dg_success": ("gauge", "1 if the DG was processed without an error"),
+    "sla_dg_skipped": ("gauge", "1 if the DG was skipped because its run manifest was up to date"),
+    "sla_dg_duration_seconds": ("gauge", "Wall time spent processing the DG"),
+    "sla_stage_duration_seconds": ("gauge", "Duration of each stage/task of the DG"),
+    "sla_source_rows": ("gauge", "Rows loaded per source file"),
+    "sla_source_mapped_rows": ("gauge", "Source rows that matched a Warehouse meter"),
+    "sla_source_unmapped_rows": ("gauge", "Source rows with no matching Warehouse meter"),
+    "sla_meters": ("gauge", "Meters per Comm Status in the Final report"),
+    "sla_output_bytes": ("gauge", "Size of each output file"),
+}
+
+DATE_SUFFIX = re.compile(r"_\d{4}-\d{2}-\d{2}")
+
+
+def peak_memory_bytes():
+    """Peak RSS of this process, or None where the resource module is unavailable (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def output_label(file_name, dg_name):
+    """Stable label for an output file: drop the date and DG parts of the name"""
+    stem = DATE_SUFFIX.sub("", Path(file_name).name)
+    return stem.replace(f"_{dg_name}", "")
+
+
+class RunMetrics:
+    """Samples for one run; rendered grouped by metric name with HELP/TYPE headers"""
+
+    def __init__(self, date, report_name):
+        self.date = date
+        self.report_name = report_name
+        self.started = time.time()
+        self.samples = []
+        self.add("sla_report_date_info", 1, date=date)
+
+    def add(self, name, value, **labels):
+        if value is None:
+            return
+        if name not in METRIC_DEFINITIONS:
+            raise ValueError(f"Unknown metric {name}")
+        labels = {"report": self.report_name, **labels}
+        self.samples.append((name, labels, float(value)))
+
+    def record_skipped(self, dg_name, report=None):
+        self.add("sla_dg_skipped", 1, dg=dg_name, report=report or self.report_name)
+
+    def record_dg(self, dg_name, timings, summary, output_dir, success, report=None):
+        """Add one DG's timings, mapping stats, status totals and output sizes"""
+        report = report or self.report_name
+        self.add("sla_dg_skipped", 0, dg=dg_name, report=report)
+        self.add("sla_dg_success", 1 if success else 0, dg=dg_name, report=report)
+        if timings:
+            self.add("sla_dg_duration_seconds", timings["wall_seconds"], dg=dg_name, report=report)
+            for stage, seconds in timings["task_seconds"].items():
+                self.add("sla_stage_duration_seconds", seconds, dg=dg_name, report=report, stage=stage)
+
+        if summary:
+            for source, s in summary.get("missing_data_summary", {}).get("source_mapping", {}).items():
+                self.add("sla_source_rows", s.get("total"), dg=dg_name, report=report, source=source)
+                self.add("sla_source_mapped_rows", s.get("mapped"), dg=dg_name, report=report, source=source)
+                self.add("sla_source_unmapped_rows", s.get("unmapped"), dg=dg_name, report=report, source=source)
+            for status, count in summary.get("comm_status_overall", {}).items():
+                self.add("sla_meters", count, dg=dg_name, report=report, status=status)
+
+        output_dir = Path(output_dir)
+        if output_dir.exists():
+            for f in sorted(output_dir.iterdir()):
+                if f.is_file():
+                    self.add("sla_output_bytes", f.stat().st_size, dg=dg_name, report=report,
+                             file=output_label(f.name, dg_name))
+
+    def finish(self, success):
+        self.add("sla_run_success", 1 if success else 0)
+        self.add("sla_run_duration_seconds", round(time.time() - self.started, 3))
+        self.add("sla_run_timestamp_seconds", int(time.time()))
+        self.add("sla_peak_memory_bytes", peak_memory_bytes())
+
+    def render(self):
+        lines = []
+        for name, (metric_type, help_text) in METRIC_DEFINITIONS.items():
+            samples = [(labels, value) for n, labels, value in self.samples if n == name]
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                value_text = str(int(value)) if value.is_integer() else repr(value)
+                lines.append(f"{name}{{{label_text}}} {value_text}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, metrics_dir):
+        """Write to a temp file in the same folder, then rename, so scrapers never see a partial file"""
+        metrics_dir = Path(metrics_dir)
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        path = write_text(metrics_dir / METRICS_FILE_NAME, self.render())
+        print(f"📈 Metrics written: {path}")
+        return path
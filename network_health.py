@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Network Health Rollup
+Per-gateway and per-sink meter counts, Comm Status distribution, hop-count
+histogram and last-seen time, built from the routing columns of the Final report
+"""
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import atomic_path, write_csv
+from sla_utils import COMM_STATUSES, parse_datetimes
+
+MAX_HOP_BUCKET = 10  # hop counts >= this share one "Hop 10+" column
+WORST_GATEWAYS_IN_SUMMARY = 10
+
+LEVELS = {
+    "Gateway": ["Gateway ID"],
+    "Sink": ["Gateway ID", "Sink ID"],
+}
+
+
+def _hop_labels(hops):
+    """Map numeric hop counts to histogram column labels"""
+    labels = pd.Series("Hop Unknown", index=hops.index, dtype=object)
+    known = hops.notna()
+    capped = hops[known].clip(upper=MAX_HOP_BUCKET).astype(int)
+    labels[known] = "Hop " + capped.astype(str)
+    labels[known & (hops >= MAX_HOP_BUCKET)] = f"Hop {MAX_HOP_BUCKET}+"
+    return labels
+
+
+def build_network_health(df_final, comm_at=None):
+    """One row per gateway and per (gateway, sink), each level built with a single groupby"""
+    if "Gateway ID" not in df_final.columns:
+        return pd.DataFrame()
+
+    if comm_at is None:
+        comm_at = parse_datetimes(df_final["Communicated At"]) if "Communicated At" in df_final.columns \
+            else pd.Series(pd.NaT, index=df_final.index)
+
+    routed = df_final["Gateway ID"].notna() & (df_final["Gateway ID"].astype(str).str.strip() != "")
+    if not routed.any():
+        return pd.DataFrame()
+    work = pd.DataFrame({
+        "Gateway ID": df_final.loc[routed, "Gateway ID"].astype(str).str.strip(),
+        "Sink ID": df_final.loc[routed, "Sink ID"].astype(str).str.strip() if "Sink ID" in df_final.columns else "",
+        "Last Seen": comm_at[routed],
+    })
+
+    # One-hot status and hop columns so every metric is a plain sum in the same pass
+    status = df_final.loc[routed, "Comm Status"]
+    for s in COMM_STATUSES:
+        work[s] = (status == s).astype(np.int32)
+
+    hops = pd.to_numeric(df_final.loc[routed, "Hop Count"], errors="coerce") if "Hop Count" in df_final.columns \
+        else pd.Series(np.nan, index=work.index)
+    hop_dummies = pd.get_dummies(_hop_labels(hops), dtype=np.int32)
+    hop_cols = sorted((c for c in hop_dummies.columns if c != "Hop Unknown"),
+                      key=lambda c: int(c.split()[1].rstrip("+")))
+    if "Hop Unknown" in hop_dummies.columns:
+        hop_cols.append("Hop Unknown")
+    work = pd.concat([work, hop_dummies[hop_cols]], axis=1)
+    work["Hop Sum"] = hops.fillna(0)
+    work["Hop Known"] = hops.notna().astype(np.int32)
+    work["Meters"] = 1
+
+    agg_spec = {c: "sum" for c in ["Meters"] + COMM_STATUSES + hop_cols + ["Hop Sum", "Hop Known"]}
+    agg_spec["Last Seen"] = "max"
+
+    frames = []
+    for level, keys in LEVELS.items():
+        grouped = work.groupby(keys, sort=True).agg(agg_spec).reset_index()
+        grouped.insert(0, "Level", level)
+        frames.append(grouped)
+
+    df = pd.concat(frames, ignore_index=True)
+    if "Sink ID" not in df.columns:
+        df["Sink ID"] = ""
+    df["Sink ID"] = df["Sink ID"].fillna("")
+    df["Communicating %"] = np.round(100 * df["Communicating"] / df["Meters"], 2)
+    df["Non Comm %"] = np.round(100 * df["Non Comm"] / df["Meters"], 2)
+    df["Avg Hop Count"] = np.round(df["Hop Sum"] / df["Hop Known"].where(df["Hop Known"] > 0), 2)
+
+    columns = (["Level", "Gateway ID", "Sink ID", "Meters"] + COMM_STATUSES +
+               ["Communicating %", "Non Comm %", "Avg Hop Count"] + hop_cols + ["Last Seen"])
+    return df[columns]
+
+
+def summarise_network_health(df_health, df_final):
+    """Compact JSON view: counts plus the gateways with the most Non Comm meters"""
+    if df_health.empty:
+        return {"gateways": 0, "sinks": 0, "meters_without_gateway": int(len(df_final)), "worst_gateways": []}
+
+    gateways = df_health[df_health["Level"] == "Gateway"]
+    worst = gateways.sort_values(["Non Comm", "Meters"], ascending=False).head(WORST_GATEWAYS_IN_SUMMARY)
+    return {
+        "gateways": int(len(gateways)),
+        "sinks": int((df_health["Level"] == "Sink").sum()),
+        "meters_without_gateway": int(len(df_final) - gateways["Meters"].sum()),
+        "worst_gateways": [
+            {
+                "gateway_id": str(row["Gateway ID"]),
+                "meters": int(row["Meters"]),
+                "non_comm": int(row["Non Comm"]),
+                "non_comm_pct": float(row["Non Comm %"]),
+                "last_seen": None if pd.isna(row["Last Seen"]) else str(row["Last Seen"]),
+            }
+            for _, row in worst.iterrows()
+        ],
+    }
+
+
+def write_network_health(df_health, output_dir, dg_name, date):
+    """Write the rollup as CSV, plus Parquet when pyarrow is installed"""
+    csv_path = output_dir / f"Network_Health_{dg_name}_{date}.csv"
+    write_csv(df_health, csv_path, index=False)
+    written = [csv_path]
+
+    try:
+        import pyarrow  # noqa: F401 - only needed for the Parquet copy
+        parquet_path = output_dir / f"Network_Health_{dg_name}_{date}.parquet"
+        with atomic_path(parquet_path) as tmp_path:
+            df_health.to_parquet(tmp_path, index=False)
+        written.append(parquet_path)
+    except ImportError:
+        pass
+
+    print(f"✨ Network health: {', '.join(p.name for p in written)}")
+    return written
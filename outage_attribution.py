@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Outage Attribution
+Clusters Non Comm meters by gateway and last-communication time so that meters
+that went silent together are labelled as a probable gateway/sink outage instead
+of unrelated individual faults
+"""
+
+import numpy as np
+import pandas as pd
+
+from sla_utils import parse_datetimes
+
+OUTAGE_GAP_MINUTES = 30    # consecutive last-seen times further apart start a new cluster
+MIN_OUTAGE_METERS = 10     # smallest cluster reported as an infrastructure outage
+TOP_OUTAGES_IN_SUMMARY = 10
+
+INDIVIDUAL_FAULT = "Probable individual meter fault"
+NO_ROUTING = "Non Comm - no routing info"
+
+
+def cluster_non_comm(df_final, comm_at=None, gap_minutes=OUTAGE_GAP_MINUTES):
+    """Assign a cluster id to every Non Comm meter with routing and a timestamp.
+
+    Meters are sorted by (Gateway ID, last seen) and a new cluster starts whenever
+    the gateway changes or the gap to the previous meter exceeds gap_minutes.
+    Returns a DataFrame indexed like df_final's Non Comm rows.
+    """
+    if comm_at is None:
+        comm_at = parse_datetimes(df_final["Communicated At"])
+
+    non_comm = df_final["Comm Status"] == "Non Comm"
+    gateway = df_final["Gateway ID"] if "Gateway ID" in df_final.columns else pd.Series(np.nan, index=df_final.index)
+    sink = df_final["Sink ID"] if "Sink ID" in df_final.columns else pd.Series(np.nan, index=df_final.index)
+    has_routing = gateway.notna() & (gateway.astype(str).str.strip() != "") & comm_at.notna()
+
+    work = pd.DataFrame({
+        "Gateway ID": gateway[non_comm & has_routing].astype(str).str.strip(),
+        "Sink ID": sink[non_comm & has_routing].astype(str).str.strip(),
+        "Last Seen": comm_at[non_comm & has_routing],
+    })
+    if work.empty:
+        work["Cluster"] = pd.Series(dtype=np.int64)
+        return work
+
+    work = work.sort_values(["Gateway ID", "Last Seen"], kind="mergesort")
+    gateway_codes = pd.factorize(work["Gateway ID"])[0]
+    seconds = work["Last Seen"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+    new_cluster = np.ones(len(work), dtype=bool)
+    new_cluster[1:] = (gateway_codes[1:] != gateway_codes[:-1]) | (np.diff(seconds) > gap_minutes * 60)
+    work["Cluster"] = np.cumsum(new_cluster) - 1
+    return work
+
+
+def attribute_outages(df_final, comm_at=None, min_meters=MIN_OUTAGE_METERS, gap_minutes=OUTAGE_GAP_MINUTES):
+    """Return (remarks Series aligned to df_final, DataFrame of probable outages)"""
+    if comm_at is None:
+        comm_at = parse_datetimes(df_final["Communicated At"]) if "Communicated At" in df_final.columns \
+            else pd.Series(pd.NaT, index=df_final.index)
+
+    remarks = pd.Series("", index=df_final.index, dtype=object)
+    non_comm = df_final["Comm Status"] == "Non Comm"
+    remarks[non_comm] = NO_ROUTING
+
+    work = cluster_non_comm(df_final, comm_at, gap_minutes)
+    outage_columns = ["Outage ID", "Type", "Gateway ID", "Sink ID", "Meters", "Gateway Meters",
+                      "Share Of Gateway %", "First Last Seen", "Last Last Seen"]
+    if work.empty:
+        return remarks, pd.DataFrame(columns=outage_columns)
+
+    remarks[work.index] = INDIVIDUAL_FAULT
+
+    clusters = work.groupby("Cluster").agg(
+        **{"Gateway ID": ("Gateway ID", "first"),
+           "Meters": ("Gateway ID", "size"),
+           "Sinks": ("Sink ID", "nunique"),
+           "Sink ID": ("Sink ID", "first"),
+           "First Last Seen": ("Last Seen", "min"),
+           "Last Last Seen": ("Last Seen", "max")})
+    clusters = clusters[clusters["Meters"] >= min_meters]
+    if clusters.empty:
+        return remarks, pd.DataFrame(columns=outage_columns)
+
+    # A cluster confined to one sink of a multi-sink gateway points at the sink
+    gateway_all = df_final["Gateway ID"].astype(str).str.strip()
+    sinks_per_gateway = df_final.assign(_gw=gateway_all).groupby("_gw")["Sink ID"].nunique() \
+        if "Sink ID" in df_final.columns else pd.Series(dtype=np.int64)
+    meters_per_gateway = gateway_all.value_counts()
+    gateway_sinks = clusters["Gateway ID"].map(sinks_per_gateway).fillna(1)
+    is_sink = (clusters["Sinks"] == 1) & (gateway_sinks > 1)
+
+    clusters["Type"] = np.where(is_sink, "Probable sink outage", "Probable gateway outage")
+    clusters["Sink ID"] = np.where(is_sink, clusters["Sink ID"], "")
+    clusters["Gateway Meters"] = clusters["Gateway ID"].map(meters_per_gateway).fillna(0).astype(int)
+    clusters["Share Of Gateway %"] = np.round(100 * clusters["Meters"] / clusters["Gateway Meters"].where(clusters["Gateway Meters"] > 0), 2)
+    clusters = clusters.sort_values(["Meters", "First Last Seen"], ascending=[False, True])
+    clusters["Outage ID"] = [f"OUT-{i + 1:04d}" for i in range(len(clusters))]
+
+    def describe(row):
+        where = f"{row['Gateway ID']}/{row['Sink ID']}" if row["Sink ID"] else row["Gateway ID"]
+        first = row["First Last Seen"].strftime("%d-%m-%Y %H:%M")
+        last = row["Last Last Seen"].strftime("%H:%M")
+        return f"{row['Type']} {where} ({row['Outage ID']}: {row['Meters']} meters last seen {first}-{last})"
+
+    labels = clusters.apply(describe, axis=1)
+    in_outage = work["Cluster"].isin(clusters.index)
+    remarks[work.index[in_outage]] = work.loc[in_outage, "Cluster"].map(labels).to_numpy()
+
+    return remarks, clusters[outage_columns].reset_index(drop=True)
+
+
+def summarise_outages(remarks, df_outages):
+    """Compact JSON view of the attribution"""
+    return {
+        "probable_outages": int(len(df_outages)),
+        "meters_in_outages": int(df_outages["Meters"].sum()) if len(df_outages) else 0,
+        "individual_meter_faults": int((remarks == INDIVIDUAL_FAULT).sum()),
+        "non_comm_without_routing": int((remarks == NO_ROUTING).sum()),
+        "top_outages": [
+            {
+                "outage_id": row["Outage ID"],
+                "type": row["Type"],
+                "gateway_id": str(row["Gateway ID"]),
+                "sink_id": str(row["Sink ID"]),
+                "meters": int(row["Meters"]),
+                "first_last_seen": str(row["First Last Seen"]),
+                "last_last_seen": str(row["Last Last Seen"]),
+            }
+            for _, row in df_outages.head(TOP_OUTAGES_IN_SUMMARY).iterrows()
+        ],
+    }
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Output Archive
+Compacts older days' Master / Intermediate / Final reports into one Parquet dataset per
+report, partitioned by date and DG (zstd-compressed, dictionary-encoded columns), with an
+optional retention policy for the compacted CSVs and a reader that prunes partitions by
+date range and DG from the folder names alone.
+
+Layout of the archive (under the base path):
+    _archive/[REPORT]/[Table]/date=YYYY-MM-DD/dg=DGx/part-0.parquet
+                                                   /_source.json   fingerprint of the CSV it came from
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from atomic_io import LockTimeout, atomic_path, dg_lock, write_json
+from sla_utils import DATE_FOLDER_PATTERN, REPORT_NAME
+from stage_checkpoints import fingerprint_files
+
+ARCHIVE_FOLDER = "_archive"
+ARCHIVE_TABLES = {
+    "Master": "Master_SLA_Report_{date}.csv",
+    "Intermediate": "Intermediate_SLA_Report_{date}.csv",
+    "Final": "Final_SLA_Report_{date}.csv",
+}
+PARTITION_FILE = "part-0.parquet"
+SOURCE_FILE = "_source.json"
+COMPRESSION = "zstd"
+DEFAULT_MIN_AGE_DAYS = 7    # days kept as CSV only before they are compacted
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("The output archive needs pyarrow: pip install pyarrow") from None
+    return pa, pq
+
+
+def table_dir(base_path, table, report_name=REPORT_NAME):
+    return Path(base_path) / ARCHIVE_FOLDER / report_name / table
+
+
+def partition_dir(base_path, table, date, dg_name, report_name=REPORT_NAME):
+    return table_dir(base_path, table, report_name) / f"date={date}" / f"dg={dg_name}"
+
+
+def report_csv(base_path, table, date, dg_name, report_name=REPORT_NAME):
+    return Path(base_path) / date / report_name / dg_name / "output" / ARCHIVE_TABLES[table].format(date=date)
+
+
+def read_source_meta(part_dir):
+    try:
+        with open(Path(part_dir) / SOURCE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_archived(csv_path, part_dir):
+    """True when the partition was compacted from this exact CSV (same size and modified time)"""
+    meta = read_source_meta(part_dir)
+    return (meta is not None and (Path(part_dir) / PARTITION_FILE).exists()
+            and meta.get("fingerprint") == fingerprint_files([csv_path]).get(Path(csv_path).name))
+
+
+def read_report_csv(csv_path):
+    """Every column as text, only empty cells as nulls, so the archive holds the CSV's values as written"""
+    return pd.read_csv(csv_path, dtype=str, keep_default_na=False, na_values=[""])
+
+
+def compact_file(csv_path, part_dir):
+    """Write one CSV as a partition; returns (rows, csv bytes, parquet bytes)"""
+    pa, pq = _require_pyarrow()
+    df = read_report_csv(csv_path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    part_dir.mkdir(parents=True, exist_ok=True)
+    parquet_path = part_dir / PARTITION_FILE
+    with atomic_path(parquet_path) as tmp_path:
+        pq.write_table(table, tmp_path, compression=COMPRESSION, use_dictionary=True)
+        written = pq.read_metadata(tmp_path).num_rows
+        if written != len(df):
+            raise ValueError(f"{parquet_path} holds {written} rows, expected {len(df)}")
+    write_json({
+        "file": Path(csv_path).name,
+        "fingerprint": fingerprint_files([csv_path])[Path(csv_path).name],
+        "rows": int(len(df)),
+        "columns": list(df.columns),
+        "compacted_at": datetime.now().isoformat(timespec="seconds"),
+    }, part_dir / SOURCE_FILE, indent=2)
+    return len(df), Path(csv_path).stat().st_size, parquet_path.stat().st_size
+
+
+def list_dates(base_path):
+    base_path = Path(base_path)
+    if not base_path.exists():
+        return []
+    return sorted(d.name for d in base_path.iterdir() if d.is_dir() and DATE_FOLDER_PATTERN.match(d.name))
+
+
+def list_dgs(base_path, date, report_name=REPORT_NAME):
+    report_folder = Path(base_path) / date / report_name
+    if not report_folder.exists():
+        return []
+    return sorted(d.name for d in report_folder.iterdir() if (d / "output").is_dir())
+
+
+def compact_outputs(base_path, before_date, dgs=None, tables=None, report_name=REPORT_NAME, lock_timeout=None):
+    """Compact every report CSV of the dates before `before_date` that is not archived yet.
+
+    Each DG/date is compacted under its DG lock, so a run writing that folder is never read
+    half way. Returns one row per compacted file.
+    """
+    tables = tables or list(ARCHIVE_TABLES)
+    rows = []
+    for date in list_dates(base_path):
+        if date >= before_date:
+            continue
+        for dg_name in list_dgs(base_path, date, report_name):
+            if dgs and dg_name not in dgs:
+                continue
+            pending = [t for t in tables if report_csv(base_path, t, date, dg_name, report_name).exists()
+                       and not is_archived(report_csv(base_path, t, date, dg_name, report_name),
+                                           partition_dir(base_path, t, date, dg_name, report_name))]
+            if not pending:
+                continue
+            try:
+                with dg_lock(base_path, date, report_name, dg_name, lock_timeout):
+                    for table in pending:
+                        csv_path = report_csv(base_path, table, date, dg_name, report_name)
+                        n, csv_bytes, parquet_bytes = compact_file(
+                            csv_path, partition_dir(base_path, table, date, dg_name, report_name))
+                        print(f"🗜️ {date} {dg_name} {table}: {n} rows, {csv_bytes / 1024 ** 2:.1f} MB CSV → "
+                              f"{parquet_bytes / 1024 ** 2:.1f} MB Parquet")
+                        rows.append({"Date": date, "DG": dg_name, "Table": table, "Rows": n,
+                                     "CSV Bytes": csv_bytes, "Parquet Bytes": parquet_bytes})
+            except LockTimeout as e:
+                print(f"⚠️ Skipping {date} {dg_name}: {e}")
+    return pd.DataFrame(rows, columns=["Date", "DG", "Table", "Rows", "CSV Bytes", "Parquet Bytes"])
+
+
+def apply_retention(base_path, keep_before_date, dgs=None, tables=None, report_name=REPORT_NAME, lock_timeout=None):
+    """Delete report CSVs of dates before `keep_before_date`, but only those the archive holds unchanged"""
+    tables = tables or list(ARCHIVE_TABLES)
+    removed, freed = [], 0
+    for date in list_dates(base_path):
+        if date >= keep_before_date:
+            continue
+        for dg_name in list_dgs(base_path, date, report_name):
+            if dgs and dg_name not in dgs:
+                continue
+            try:
+                with dg_lock(base_path, date, report_name, dg_name, lock_timeout):
+                    for table in tables:
+                        csv_path = report_csv(base_path, table, date, dg_name, report_name)
+                        part_dir = partition_dir(base_path, table, date, dg_name, report_name)
+                        if csv_path.exists() and is_archived(csv_path, part_dir):
+                            freed += csv_path.stat().st_size
+                            csv_path.unlink()
+                            removed.append(csv_path)
+            except LockTimeout as e:
+                print(f"⚠️ Keeping {date} {dg_name} CSVs: {e}")
+    if removed:
+        print(f"🧹 Removed {len(removed)} archived CSV(s), {freed / 1024 ** 2:.1f} MB freed")
+    return removed
+
+
+def archived_partitions(base_path, table="Final", start_date=None, end_date=None, dgs=None, report_name=REPORT_NAME):
+    """[(date, dg, parquet path)] in [start_date, end_date], pruned on the partition folder names"""
+    root = table_dir(base_path, table, report_name)
+    if not root.exists():
+        return []
+    partitions = []
+    for date_dir in sorted(root.glob("date=*")):
+        date = date_dir.name[len("date="):]
+        if (start_date and date < start_date) or (end_date and date > end_date):
+            continue
+        for dg_dir in sorted(date_dir.glob("dg=*")):
+            dg_name = dg_dir.name[len("dg="):]
+            if (dgs and dg_name not in dgs) or not (dg_dir / PARTITION_FILE).exists():
+                continue
+            partitions.append((date, dg_name, dg_dir / PARTITION_FILE))
+    return partitions
+
+
+def read_partition(path, columns=None):
+    """One partition as a DataFrame; requested columns an older partition lacks are skipped"""
+    _, pq = _require_pyarrow()
+    if columns is not None:
+        available = set(pq.read_schema(path).names)
+        columns = [c for c in columns if c in available]
+    return pd.read_parquet(path, columns=columns)
+
+
+def read_archive(base_path, table="Final", start_date=None, end_date=None, dgs=None, columns=None,
+                 report_name=REPORT_NAME):
+    """Archived rows of a date range / DGs as one DataFrame with 'Date' and 'DG' columns in front.
+
+    Only the partitions in range are opened and only the requested columns are read from them.
+    """
+    frames = []
+    for date, dg_name, path in archived_partitions(base_path, table, start_date, end_date, dgs, report_name):
+        df = read_partition(path, columns)
+        df.insert(0, "DG", dg_name)
+        df.insert(0, "Date", date)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["Date", "DG"] + list(columns or []))
+    result = pd.concat(frames, ignore_index=True)
+    result["Date"] = result["Date"].astype("category")
+    result["DG"] = result["DG"].astype("category")
+    return result
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--base-path", default='/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting')
+    common.add_argument("--dg", nargs="+", help="Only these DG folders (default: all)")
+    common.add_argument("--tables", nargs="+", choices=list(ARCHIVE_TABLES),
+                        help="Reports to compact (default: all three) or read (default: Final)")
+    parser = argparse.ArgumentParser(description="Compact older report CSVs into a Parquet archive, or read from it")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    compact = sub.add_parser("compact", parents=[common], help="Compact report CSVs of days older than --older-than")
+    compact.add_argument("--older-than", type=int, default=DEFAULT_MIN_AGE_DAYS,
+                         help=f"Compact days at least this many days old (default {DEFAULT_MIN_AGE_DAYS})")
+    compact.add_argument("--retain-csv-days", type=int,
+                         help="Also delete the compacted CSVs of days older than this (default: keep every CSV)")
+
+    read = sub.add_parser("read", parents=[common], help="Print rows and Comm Status counts per date/DG from the archive")
+    read.add_argument("--start", help="First date (YYYY-MM-DD)")
+    read.add_argument("--end", help="Last date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    today = datetime.now()
+    if args.command == "compact":
+        before = (today - timedelta(days=args.older_than)).strftime("%Y-%m-%d")
+        df = compact_outputs(args.base_path, before, args.dg, args.tables)
+        if len(df):
+            print(f"✅ Compacted {len(df)} file(s): {df['CSV Bytes'].sum() / 1024 ** 2:.1f} MB CSV → "
+                  f"{df['Parquet Bytes'].sum() / 1024 ** 2:.1f} MB Parquet")
+        else:
+            print(f"ℹ️ Nothing to compact before {before}")
+        if args.retain_csv_days is not None:
+            if args.retain_csv_days < args.older_than:
+                parser.error("--retain-csv-days must be at least --older-than")
+            apply_retention(args.base_path, (today - timedelta(days=args.retain_csv_days)).strftime("%Y-%m-%d"),
+                            args.dg, args.tables)
+    else:
+        for table in args.tables or ["Final"]:
+            df = read_archive(args.base_path, table, args.start, args.end, args.dg,
+                              columns=["Comm Status"] if table == "Final" else ["Meter Serial No"])
+            print(f"\n📚 {table}: {len(df)} rows")
+            if len(df) and "Comm Status" in df.columns:
+                print(pd.crosstab([df["Date"], df["DG"]], df["Comm Status"], margins=True, margins_name="Total").to_string())
+            elif len(df):
+                print(df.groupby(["Date", "DG"], observed=True).size().rename("Rows").to_string())
+
+
+if __name__ == "__main__":
+    main()
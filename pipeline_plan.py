@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Pipeline Plan
+Compiles pipeline_spec.json (sources, joins, coalesce rules and Final report columns)
+into the Master/Final build. The joins run on a narrow skeleton of join keys and row
+positions, smallest source first, and every source's columns are then taken once into
+the Master in the legacy row and column order. With the Master report switched off in
+the spec, only the columns the Final report needs are parsed from the raw files
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SPEC_PATH = Path(__file__).with_name("pipeline_spec.json")
+
+
+def clean_node_id(val):
+    """NodeId as written in Routings: float-looking ids lose their .0, blanks become ''"""
+    if pd.isna(val):
+        return ""
+    try:
+        return str(int(float(val)))
+    except (TypeError, ValueError, OverflowError):
+        return str(val).strip()
+
+
+# Left key transforms a join may name in the spec
+KEY_TRANSFORMS = {"node_id": clean_node_id}
+
+
+@lru_cache(maxsize=None)
+def _load(path):
+    with open(path) as f:
+        spec = json.load(f)
+    sources = spec["sources"]
+    if spec["base"] not in sources:
+        raise ValueError(f"Base source {spec['base']} is not defined in {path}")
+    for join in spec["joins"]:
+        if join["source"] not in sources:
+            raise ValueError(f"Join source {join['source']} is not defined in {path}")
+        if join.get("left_transform") and join["left_transform"] not in KEY_TRANSFORMS:
+            raise ValueError(f"Unknown left_transform {join['left_transform']}, expected one of {list(KEY_TRANSFORMS)}")
+    return spec
+
+
+def load_pipeline_spec(path=SPEC_PATH):
+    """Parsed spec (cached per path - treat as read-only)"""
+    return _load(str(path))
+
+
+def spec_version(spec):
+    return json.dumps(spec, sort_keys=True)
+
+
+def expected_files(spec):
+    return [name for source in spec["sources"].values() for name in source["expected_files"]]
+
+
+def expected_columns(spec):
+    """{expected file name: required columns}"""
+    return {name: list(source["columns"]) for source in spec["sources"].values() for name in source["expected_files"]}
+
+
+def source_specs(spec):
+    """What SourceCache needs per source: file patterns, reader, join key, de-duplication"""
+    return {name: {k: source[k] for k in ("files", "reader", "key", "drop_duplicates") if k in source}
+            for name, source in spec["sources"].items()}
+
+
+def _suffixed(names, right_columns, suffixes):
+    """pandas merge naming: overlapping columns get the left/right suffix (an empty suffix keeps the name)"""
+    overlap = set(names) & set(right_columns)
+    left, right = suffixes
+    return ({n: n + left if n in overlap else n for n in names},
+            [c + right if c in overlap else c for c in right_columns])
+
+
+def resolve_joins(spec, columns_by_source):
+    """Replay the joins in spec order over column lists only.
+
+    Returns the joins that can run, each with the (source, column) its left key comes from,
+    and the Master name of every source column ({source: {column: master name}}).
+    """
+    base = spec["base"]
+    names = {base: {c: c for c in columns_by_source[base]}}
+    joins = []
+    for join in spec["joins"]:
+        source = join["source"]
+        if source not in columns_by_source:
+            continue
+        producer = next(((s, c) for s, cols in names.items() for c, n in cols.items() if n == join["left_on"]), None)
+        if producer is None:
+            print(f"⚠️ Skipping {join['label']} merge: {join['left_on']} not found in master data")
+            continue
+        current = [n for cols in names.values() for n in cols.values()]
+        renamed, right_names = _suffixed(current, columns_by_source[source], join["suffixes"])
+        names = {s: {c: renamed[n] for c, n in cols.items()} for s, cols in names.items()}
+        names[source] = dict(zip(columns_by_source[source], right_names))
+        joins.append((join, producer))
+    return joins, names
+
+
+def column_projections(spec):
+    """{source: columns to parse, or None for every column} for the report definition"""
+    if spec.get("master_report", True):
+        return {name: None for name in spec["sources"]}
+    declared = {name: list(s["columns"]) + list(s.get("optional_columns", [])) for name, s in spec["sources"].items()}
+    joins, names = resolve_joins(spec, declared)
+    wanted = set(final_inputs(spec)) | {join["left_on"] for join, _ in joins}
+    projections = {}
+    for source, cols in names.items():
+        projections[source] = sorted({spec["sources"][source]["key"]} | {c for c, n in cols.items() if n in wanted})
+    return projections
+
+
+def final_inputs(spec):
+    """Master columns read by the coalesce rules and the Final report column mapping"""
+    columns = []
+    for inputs in spec["coalesce"].values():
+        columns.extend(inputs)
+    columns.extend(c for c in spec["final_columns"].values() if c not in spec["coalesce"])
+    return list(dict.fromkeys(columns))
+
+
+def _take(values, positions, fill=np.nan):
+    """values[positions], with `fill` for the -1 (no match) positions"""
+    return np.append(np.asarray(values, dtype=object), np.array([fill], dtype=object))[positions]
+
+
+def _count_matches(keys, values):
+    """How many keys are in values (a set lookup; Series.isin is slow for large string sets)"""
+    lookup = set(values)
+    return sum(1 for key in keys if key in lookup)
+
+
+def build_master(spec, sources, report_mask=None):
+    """Join every available source onto the base; returns (df_master, stats).
+
+    stats holds the base row count and, per joined source, how many of its rows match a
+    key of the report rows (report_mask over the base rows, default every row).
+    """
+    base = spec["base"]
+    df_base = sources[base].reset_index(drop=True)
+    if report_mask is None:
+        report_mask = np.ones(len(df_base), dtype=bool)
+    report_mask = np.asarray(report_mask, dtype=bool)
+    frames = {name: df.reset_index(drop=True) for name, df in sources.items() if df is not None}
+    frames[base] = df_base
+    joins, names = resolve_joins(spec, {name: list(df.columns) for name, df in frames.items()})
+
+    # Smallest source first, but never before the source its left key comes from
+    pending = sorted(joins, key=lambda j: len(frames[j[0]["source"]]))
+    ordered, joined = [], {base}
+    while pending:
+        step = next(j for j in pending if j[1][0] in joined)
+        pending.remove(step)
+        ordered.append(step)
+        joined.add(step[0]["source"])
+
+    stats = {base: {"total": int(report_mask.sum())}}
+    join_stats = {}
+    skeleton = pd.DataFrame({base: np.arange(len(df_base))})
+    for join, (producer, column) in ordered:
+        source = join["source"]
+        print(f"🔗 Merging {join['label']}...")
+        # The key transform runs once per producer row; rows without a producer match get the transform of NaN
+        left_values, fill = frames[producer][column], np.nan
+        if join.get("left_transform"):
+            transform = KEY_TRANSFORMS[join["left_transform"]]
+            left_values, fill = left_values.map(transform), transform(np.nan)
+        left_key = _take(left_values, skeleton[producer].to_numpy(), fill)
+
+        right_key = frames[source][spec["sources"][source]["key"]]
+        report_keys = left_key[report_mask[skeleton[base].to_numpy()]]
+        matched = _count_matches(right_key, report_keys)
+        join_stats[source] = {"total": len(right_key), "mapped": matched, "unmapped": len(right_key) - matched}
+
+        right = pd.DataFrame({"_key": right_key.to_numpy(dtype=object), source: np.arange(len(right_key))})
+        skeleton = skeleton.assign(_key=left_key).merge(right, on="_key", how="left").drop(columns="_key")
+        skeleton[source] = skeleton[source].fillna(-1).astype(np.int64)
+
+    # Legacy row order: base row, then each join's matches in spec order and source order
+    sequence = [base] + [join["source"] for join, _ in joins]
+    order = np.lexsort([skeleton[name].to_numpy() for name in reversed(sequence)])
+    skeleton = skeleton.take(order)
+
+    blocks = []
+    for name in sequence:
+        positions = skeleton[name].to_numpy()
+        frame = frames[name]
+        block = frame.take(positions) if (positions >= 0).all() else frame.reindex(positions)
+        block.columns = [names[name][c] for c in frame.columns]
+        blocks.append(block.reset_index(drop=True))
+    df_master = pd.concat(blocks, axis=1) if len(blocks) > 1 else blocks[0]
+
+    for name in sequence[1:]:
+        stats[name] = join_stats[name]
+    print(f"✅ {len(ordered)} source(s) joined (order: {', '.join(j['source'] for j, _ in ordered) or '-'})")
+    return df_master, stats
+
+
+def column_codes(spec):
+    """Master column -> code of the source it comes from (resolved from the declared columns)"""
+    declared = {name: list(s["columns"]) + list(s.get("optional_columns", [])) for name, s in spec["sources"].items()}
+    _, names = resolve_joins(spec, declared)
+    return {master: spec["sources"][source].get("code", source) for source, cols in names.items() for master in cols.values()}
+
+
+def coalesce(df, columns):
+    """First non-null value across a column block; returns (values, position of the column used or -1).
+
+    The first valid column per row is found with one argmax over the block's null mask and the
+    values are gathered from the stacked block with one take (missing columns are skipped).
+    """
+    present = [c for c in columns if c in df.columns]
+    if not present:
+        return pd.Series([pd.NA] * len(df), index=df.index), np.full(len(df), -1, dtype=np.int8)
+    block = [df[c] for c in present]
+    valid = np.column_stack([s.notna().to_numpy() for s in block])
+    first = valid.argmax(axis=1)
+    found = valid[np.arange(len(df)), first]
+
+    # Rows where every column is blank point at the first column, which is blank there too
+    stacked = pd.concat(block, ignore_index=True)
+    values = stacked.take(first * len(df) + np.arange(len(df)))
+    values.index, values.name = df.index, present[0]
+    positions = np.where(found, np.array([columns.index(c) for c in present])[first], -1).astype(np.int8)
+    return values, positions
+
+
+def build_intermediate(spec, df_master):
+    """Coalesce on the needed Master columns only, then select/rename to the Final report columns.
+
+    Returns (df_intermediate, df_provenance): one '<field> Source' column per coalesced field with
+    the code of the source each value came from ('' when every source was blank).
+    """
+    # A copy, not a slice of the Master: the coalesced columns are added to it
+    work = df_master[[c for c in final_inputs(spec) if c in df_master.columns]].copy()
+    codes = column_codes(spec)
+    provenance = {}
+    for name, inputs in spec["coalesce"].items():
+        work[name], positions = coalesce(work, inputs)
+        labels = np.array([codes.get(c, c) for c in inputs] + [""], dtype=object)
+        provenance[name] = pd.Categorical(labels[positions], categories=list(dict.fromkeys(labels)))
+
+    final_cols, rename_dict, missing_columns = [], {}, []
+    for requested, actual in spec["final_columns"].items():
+        if actual in work.columns:
+            final_cols.append(actual)
+            rename_dict[actual] = requested
+        else:
+            missing_columns.append(requested)
+            print(f"⚠️ Column {requested} ({actual}) not found")
+
+    df_intermediate = work[final_cols].rename(columns=rename_dict)
+    for missing_col in missing_columns:
+        df_intermediate[missing_col] = ""
+    df_provenance = pd.DataFrame({f"{requested} Source": provenance[actual]
+                                  for requested, actual in spec["final_columns"].items() if actual in provenance},
+                                 index=df_intermediate.index)
+    return df_intermediate, df_provenance
+
+
+def provenance_counts(df_provenance):
+    """{field: {source code: rows}} with blanks counted under 'none'"""
+    return {column[:-len(" Source")]: {(code or "none"): int(n) for code, n in values.value_counts(sort=False).items()}
+            for column, values in df_provenance.items()}
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Preview Estimate (--preview)
+Rough Comm Status shares per Circle/Division within seconds of an upload: a stratified
+sample of Warehouse meters is looked up in Node ID and Routings (streamed, keeping only
+the sampled keys) and the shares are estimated with 95% confidence intervals.
+The output is an ESTIMATE, not the Comm_Status_Summary of a full run
+"""
+
+import numpy as np
+import pandas as pd
+
+from pipeline_plan import clean_node_id
+from sla_utils import COMM_STATUSES, parse_datetimes
+from source_cache import read_csv_source, source_files
+
+DEFAULT_SAMPLE_SIZE = 2000      # meters per DG
+MIN_PER_STRATUM = 30
+STRATA = ["Circle", "Division"]
+Z_95 = 1.96
+
+
+def stratified_sample(df, sample_size=DEFAULT_SAMPLE_SIZE, strata=STRATA, seed=0):
+    """Proportional allocation (at least MIN_PER_STRATUM, or the whole stratum if smaller)"""
+    sizes = df.groupby(strata, dropna=False).size()
+    allocation = np.maximum(np.round(sizes * sample_size / max(len(df), 1)), MIN_PER_STRATUM)
+    allocation = np.minimum(allocation, sizes).astype(int)
+    rng = np.random.default_rng(seed)
+    picks = []
+    for key, rows in df.groupby(strata, dropna=False).indices.items():
+        picks.append(rng.choice(rows, size=allocation[key], replace=False))
+    sample = df.iloc[np.sort(np.concatenate(picks))] if picks else df.iloc[:0]
+    return sample, sizes.rename("N").reset_index()
+
+
+def stream_lookup(paths, key_column, value_column, keys, clean_key=None):
+    """{key: first value} for the wanted keys only, streaming the sheets row by row"""
+    from openpyxl import load_workbook
+
+    found = {}
+    for path in paths:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [str(c).strip() if c is not None else "" for c in next(rows, [])]
+            if key_column not in header or value_column not in header:
+                continue
+            k, v = header.index(key_column), header.index(value_column)
+            for row in rows:
+                if k >= len(row) or row[k] is None:
+                    continue
+                key = clean_key(row[k]) if clean_key else str(row[k]).strip()
+                if key in keys and key not in found:
+                    found[key] = row[v] if v < len(row) else None
+        finally:
+            workbook.close()
+    return found
+
+
+def comm_status(comm_at, today_date):
+    """Vectorised Final report rule: today -> Communicating, earlier -> Non Comm, else Never Comm"""
+    days = parse_datetimes(comm_at).dt.strftime("%Y-%m-%d")
+    return pd.Series(np.select([days == today_date, days < today_date], ["Communicating", "Non Comm"], "Never Comm"),
+                     index=comm_at.index)
+
+
+def estimate_group(strata_rows):
+    """Stratified share estimate and normal-approximation 95% CI for each status"""
+    N = strata_rows["N"].sum()
+    weights = strata_rows["N"] / N
+    fpc = 1 - strata_rows["n"] / strata_rows["N"]
+    result = {"Total": int(N), "Sampled": int(strata_rows["n"].sum())}
+    for status in COMM_STATUSES:
+        p = strata_rows[status] / strata_rows["n"]
+        variance = (weights**2 * fpc * p * (1 - p) / np.maximum(strata_rows["n"] - 1, 1)).sum()
+        share = float((weights * p).sum())
+        half_width = Z_95 * np.sqrt(variance)
+        result[status] = int(round(share * N))
+        result[f"{status} %"] = round(100 * share, 2)
+        result[f"{status} % Low"] = round(100 * max(share - half_width, 0), 2)
+        result[f"{status} % High"] = round(100 * min(share + half_width, 1), 2)
+    return result
+
+
+def preview_dg(raw_dir, today_date, sample_size=DEFAULT_SAMPLE_SIZE, seed=0, aliases=None):
+    """Estimated Comm_Status_Summary rows (Overall, By Circle, By Division) for one DG.
+
+    With a HierarchyAliases map the strata are the canonical names a full run groups by
+    (the map is only read; new spellings are not saved).
+    """
+    warehouse_files = source_files(raw_dir, "Warehouse")
+    if not warehouse_files:
+        return None
+    df = read_csv_source(warehouse_files[0], {"Meter Serial No", "Manufacturer", *STRATA})
+    if "Manufacturer" in df.columns:
+        df = df[df["Manufacturer"].str.contains("KIMBAL", case=False, na=False)]
+    for column in STRATA:
+        if column not in df.columns:
+            df[column] = ""
+        elif aliases is not None:
+            df[column] = aliases.resolve(df[column], column).astype(object).fillna("")
+        else:
+            df[column] = df[column].fillna("").astype(str)
+    df = df.reset_index(drop=True)
+    df["Meter Serial No"] = df["Meter Serial No"].astype(str).str.strip()
+
+    sample, population = stratified_sample(df, sample_size, seed=seed)
+    serials = set(sample["Meter Serial No"])
+    node_ids = stream_lookup(source_files(raw_dir, "Node_ID"), "Meter Number", "NodeId", serials)
+    node_keys = {s: clean_node_id(v) for s, v in node_ids.items() if v is not None}
+    comm_at = stream_lookup(source_files(raw_dir, "Routings"), "Node ID", "Communicated At",
+                            set(node_keys.values()), clean_key=lambda v: str(v).strip())
+
+    sample = sample.assign(**{"Communicated At": sample["Meter Serial No"].map(
+        lambda s: comm_at.get(node_keys.get(s)))})
+    sample["Comm Status"] = comm_status(sample["Communicated At"].astype(object), today_date)
+
+    counts = pd.crosstab([sample[c] for c in STRATA], sample["Comm Status"])
+    counts = counts.reindex(columns=COMM_STATUSES, fill_value=0)
+    counts["n"] = counts.sum(axis=1)
+    strata_rows = population.merge(counts.reset_index(), on=STRATA, how="left").fillna(0)
+
+    rows = [{"Category": "Overall", "Circle": "", "Division": "", **estimate_group(strata_rows)}]
+    for circle, group in strata_rows.groupby("Circle", sort=True):
+        rows.append({"Category": "By Circle", "Circle": str(circle), "Division": "", **estimate_group(group)})
+    for (circle, division), group in strata_rows.groupby(STRATA, sort=True):
+        rows.append({"Category": "By Division", "Circle": str(circle), "Division": str(division), **estimate_group(group)})
+
+    # Comm_Status_Summary layout first, then the intervals and sample sizes
+    df_preview = pd.DataFrame(rows)
+    df_preview.insert(3, "Subdivision", "")
+    df_preview["Estimate"] = "ESTIMATE (stratified sample, 95% CI)"
+    columns = (["Category", "Circle", "Division", "Subdivision", "Communicating", "Never Comm", "Non Comm",
+                "Total", "Communicating %"]
+               + [f"{s} % {b}" for s in COMM_STATUSES for b in ["Low", "High"]]
+               + [f"{s} %" for s in COMM_STATUSES if s != "Communicating"] + ["Sampled", "Estimate"])
+    return df_preview[columns]
+
+
+def print_preview(df_preview, dg_name):
+    print(f"\n{'='*78}")
+    print(f"⚠️ ESTIMATE ONLY - {dg_name} Communicating % from a stratified sample (95% CI)")
+    print(f"{'='*78}")
+    for _, row in df_preview.iterrows():
+        label = row["Category"] if row["Category"] == "Overall" else f"{row['Circle']} / {row['Division']}".strip(" /")
+        print(f"  {label:<30} {row['Communicating %']:6.2f}%  "
+              f"[{row['Communicating % Low']:6.2f} - {row['Communicating % High']:6.2f}]  "
+              f"({row['Sampled']:,} of {row['Total']:,} meters sampled)")
@@ -3,6 +3,7 @@
 Process data from 2026-02-06 in SharePoint
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -10,24 +11,22 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from daily_reporter import DailyReporter
 
-class CustomDateReporter(DailyReporter):
-    def __init__(self, base_path, date):
-        """Initialize with specific date and path"""
-        self.base_path = Path(base_path)
-        self.today_date = date
-        self.report_date_folder = self.base_path / self.today_date
-
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--profile", action="store_true", help="Profile each DG (cProfile + tracemalloc)")
+    args = parser.parse_args()
+    
     print("🚀 Processing SharePoint data from 2026-02-06")
     
     base_path = Path("/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting")
-    reporter = CustomDateReporter(base_path=base_path, date="2026-02-06")
+    reporter = DailyReporter(base_path=base_path)
+    reporter.set_date("2026-02-06")
     
     print(f"\n{'='*70}")
     print(f"Processing Report_1_Comms_Reporting for 2026-02-06")
     print(f"{'='*70}\n")
     
-    success = reporter.process_comms_reporting()
+    success = reporter.process_comms_reporting(profile=args.profile)
     
     if success:
         print(f"\n✅ Processing completed!")
@@ -3,10 +3,16 @@
 Process 2026-02-12 data for DG2 only
 """
 
+import argparse
+
 from daily_reporter import DailyReporter
 from pathlib import Path
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--profile", action="store_true", help="Profile DG2 (cProfile + tracemalloc)")
+    args = parser.parse_args()
+    
     # Override date and path for historical processing
     base_path = Path("/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting")
     date = "2026-02-12"
@@ -19,18 +25,7 @@ if __name__ == "__main__":
     reporter = DailyReporter(base_path=str(base_path))
     
     # Override the date to process historical data
-    reporter.today_date = date
-    reporter.report_date_folder = reporter.base_path / date
-    
-    # Temporarily modify the get_dg_report_structures to only return DG2
-    original_get_dg = reporter.get_dg_report_structures
-    
-    def get_dg2_only(report_name="Report_1_Comms_Reporting", dg_pattern="DG*"):
-        all_dgs = original_get_dg(report_name, dg_pattern)
-        # Filter to only DG2
-        return {k: v for k, v in all_dgs.items() if k == "DG2"}
-    
-    reporter.get_dg_report_structures = get_dg2_only
+    reporter.set_date(date)
     
-    # Process (will only process DG2 now)
-    reporter.process_comms_reporting()
+    # Process DG2 only
+    reporter.process_comms_reporting(profile=args.profile, dg_names=["DG2"])
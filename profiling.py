@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Profiling
+cProfile + tracemalloc around one DG's processing (enabled with --profile). Writes a
+.prof file and a top-allocations report into the DG output folder and prints the
+hottest functions. Nothing here is imported or run unless profiling is requested
+"""
+
+import cProfile
+import pstats
+import time
+import tracemalloc
+from pathlib import Path
+
+from atomic_io import atomic_open, atomic_path
+
+TOP_FUNCTIONS = 10
+TOP_ALLOCATIONS = 25
+
+
+class DGProfiler:
+    """Profiles every DAG task of a DG through wrap(); the DAG must use a single worker"""
+
+    def __init__(self, output_dir, dg_name, date):
+        self.output_dir = Path(output_dir)
+        self.dg_name = dg_name
+        self.date = date
+        self.profiler = cProfile.Profile()
+        self.started = None
+
+    def start(self):
+        tracemalloc.start()
+        self.started = time.perf_counter()
+
+    def wrap(self, func):
+        """Run func under the shared profiler (only one profiler may be active at a time on Python 3.12+)"""
+        def profiled(*args):
+            self.profiler.enable()
+            try:
+                return func(*args)
+            finally:
+                self.profiler.disable()
+        return profiled
+
+    def stop(self):
+        """Stop tracing, write the reports and print the hot-function summary"""
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        elapsed = time.perf_counter() - self.started
+
+        prof_path = self.output_dir / f"Profile_{self.dg_name}_{self.date}.prof"
+        with atomic_path(prof_path) as tmp_path:
+            self.profiler.dump_stats(tmp_path)
+
+        alloc_path = self.output_dir / f"Profile_Allocations_{self.dg_name}_{self.date}.txt"
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        top = snapshot.statistics("lineno")
+        with atomic_open(alloc_path) as f:
+            f.write(f"Memory allocations for {self.dg_name} on {self.date}\n")
+            f.write(f"Traced peak: {peak / 1024 ** 2:.1f} MiB, still allocated at end: {current / 1024 ** 2:.1f} MiB\n\n")
+            for i, stat in enumerate(top[:TOP_ALLOCATIONS], 1):
+                frame = stat.traceback[0]
+                f.write(f"{i:3d}. {frame.filename}:{frame.lineno}  {stat.size / 1024 ** 2:.2f} MiB in {stat.count} blocks\n")
+
+        try:
+            stats = pstats.Stats(self.profiler)
+        except TypeError:  # nothing was profiled (e.g. the DG stopped before its first stage)
+            print(f"⚠️ No profile data collected for {self.dg_name}")
+            return None, alloc_path
+
+        print(f"\n🔬 PROFILE FOR {self.dg_name} ({elapsed:.2f}s, traced peak {peak / 1024 ** 2:.1f} MiB)")
+        for func_key, (_, ncalls, tottime, cumtime, _) in sorted(
+                stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:TOP_FUNCTIONS]:
+            filename, lineno, name = func_key
+            where = f"{Path(filename).name}:{lineno}" if lineno else filename
+            print(f"   {tottime:7.2f}s self {cumtime:7.2f}s total {ncalls:>9} calls  {name} ({where})")
+        print(f"   Full profile: {prof_path.name} (open with snakeviz or python -m pstats)")
+        print(f"   Allocations: {alloc_path.name}")
+        return prof_path, alloc_path
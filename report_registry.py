@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Report Registry
+Reports register here with the folder they write to, the sources/columns they need
+and a factory for their processing stages. DailyReporter runs every registered report
+for a date/DG off one shared SourceCache
+"""
+
+REPORTS = {}
+
+
+class ReportDefinition:
+    """One report plugin.
+
+    folder:  report folder under the date folder (outputs go to folder/DG/output)
+    sources: {source name: [columns] or None for every column} - see source_cache.SOURCE_SPECS
+    stages:  callable(reporter) -> [(name, function, checkpointed)], each function taking
+             (dg_name, report_name, paths, state) like DailyReporter's comms stages
+    """
+
+    def __init__(self, name, folder, sources, stages, description=""):
+        self.name = name
+        self.folder = folder
+        self.sources = sources
+        self.stages = stages
+        self.description = description
+
+
+def register_report(definition):
+    if definition.name in REPORTS:
+        raise ValueError(f"Report {definition.name} is already registered")
+    REPORTS[definition.name] = definition
+    return definition
+
+
+def get_reports(names=None):
+    """Registered reports in registration order, optionally limited to `names`"""
+    if names is None:
+        return list(REPORTS.values())
+    unknown = [n for n in names if n not in REPORTS]
+    if unknown:
+        raise ValueError(f"Unknown report(s): {unknown}. Registered: {list(REPORTS)}")
+    return [REPORTS[n] for n in names]
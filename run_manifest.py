@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Run Manifest
+Records, per DG output folder, the fingerprints of every input file, the code/config
+version and the produced outputs, so a rerun with nothing changed can be skipped
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+from atomic_io import write_json
+from stage_checkpoints import fingerprint_files
+
+MANIFEST_NAME = "run_manifest.json"
+
+
+def manifest_path(output_dir):
+    return Path(output_dir) / MANIFEST_NAME
+
+
+def read_manifest(output_dir):
+    """Return the stored manifest dict, or None if missing/unreadable"""
+    try:
+        with open(manifest_path(output_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def input_fingerprints(raw_dir, extra_files=()):
+    """Fingerprints of every raw input file plus any extra dependencies (e.g. the previous Final report)"""
+    raw_files = [f for f in Path(raw_dir).iterdir() if f.is_file() and not f.name.startswith('.')]
+    fingerprints = {f"raw_data/{name}": fp for name, fp in fingerprint_files(raw_files).items()}
+    for label, path in extra_files:
+        fingerprints[label] = fingerprint_files([path])[Path(path).name] if path else None
+    return fingerprints
+
+
+def output_fingerprints(output_dir):
+    """Fingerprints of everything in the output folder except the manifest itself"""
+    files = [f for f in Path(output_dir).iterdir() if f.is_file() and f.name != MANIFEST_NAME]
+    return fingerprint_files(files)
+
+
+def compare_manifest(manifest, inputs, code_version, output_dir):
+    """Return a list of human-readable reasons the DG must be rebuilt (empty = up to date)"""
+    if manifest is None:
+        return ["no previous run manifest"]
+
+    reasons = []
+    if manifest.get("code_version") != code_version:
+        reasons.append("code/config version changed")
+
+    old_inputs = manifest.get("inputs", {})
+    for name in sorted(set(old_inputs) | set(inputs)):
+        if name not in old_inputs:
+            reasons.append(f"new input: {name}")
+        elif name not in inputs:
+            reasons.append(f"removed input: {name}")
+        elif old_inputs[name] != inputs[name]:
+            reasons.append(f"changed input: {name}")
+
+    old_outputs = manifest.get("outputs", {})
+    current = fingerprint_files(Path(output_dir) / name for name in old_outputs)
+    for name in sorted(old_outputs):
+        if current.get(name) is None:
+            reasons.append(f"missing output: {name}")
+        elif current[name] != old_outputs[name]:
+            reasons.append(f"modified output: {name}")
+    return reasons
+
+
+def write_manifest(output_dir, date, dg_name, inputs, code_version):
+    """Write the manifest after a successful run (temp file + fsync + rename)"""
+    manifest = {
+        "date": date,
+        "dg_name": dg_name,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "code_version": code_version,
+        "inputs": inputs,
+        "outputs": output_fingerprints(output_dir),
+    }
+    write_json(manifest, manifest_path(output_dir), indent=2)
+    return manifest
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+SLA API
+Runs the Comms pipeline for a date in-process and returns the Master/Intermediate/Final
+DataFrames, summary tables and stats in memory, for notebooks, backfills and downstream
+reports. Nothing is written by default; write=True also writes every output a
+daily_reporter run does (the disk is then just one more sink of the same results).
+
+    from sla_api import run_sla
+    run = run_sla("2026-02-12", dgs=["DG2"], base_path=...)
+    run["DG2"].df_final, run["DG2"].summary, run.status_summary()
+"""
+
+import argparse
+
+import pandas as pd
+
+from daily_reporter import DailyReporter
+from source_cache import CSV_ENGINES, SourceCache
+
+# DGResult attribute -> key of the summary table in the reports stage's aggregates
+AGGREGATES = {
+    "status_summary": "status_summary",
+    "ageing": "ageing",
+    "network_health": "network_health",
+    "data_quality": "data_quality",
+    "status_transitions": "status_transitions",
+    "status_changes": "status_changes",
+}
+
+
+class DGResult:
+    """One DG's results for a date.
+
+    df_master / df_intermediate / df_final: the reports of record (Kimbal-only)
+    df_final_all: Final rows of every manufacturer (all_manufacturers runs, else None)
+    df_outages:   probable infrastructure outages behind the Final report's Remarks
+    stats:        per-source row/mapping counts; provenance: coalesce source counts per field
+    summary:      the SLA_Summary JSON as a dict; timings: stage/task durations
+    status_summary, ageing, network_health, data_quality, status_transitions, status_changes:
+                  the summary tables as DataFrames (None when not built, e.g. no earlier
+                  Final report for the transitions)
+    A run resumed from a checkpoint has no frames of the stages it skipped (None).
+    """
+
+    def __init__(self, date, dg_name, results):
+        self.date = date
+        self.dg_name = dg_name
+        reports = results.get("reports", {})
+        self.df_master = results.get("df_master")
+        self.df_intermediate = reports.get("Intermediate report")
+        self.df_final = results.get("df_final")
+        self.df_final_all = results.get("df_final_all")
+        self.df_outages = results.get("df_outages")
+        self.stats = results.get("stats")
+        self.provenance = results.get("provenance")
+        self.summary = results.get("summary")
+        self.timings = results.get("timings")
+        aggregates = results.get("aggregates", {})
+        for attribute, key in AGGREGATES.items():
+            setattr(self, attribute, aggregates.get(key))
+
+    def __repr__(self):
+        rows = None if self.df_final is None else len(self.df_final)
+        return f"DGResult({self.date}, {self.dg_name}, {rows} Final rows)"
+
+
+class SLARun:
+    """Results of one date: run[dg_name] is a DGResult; DataFrames of every DG can be stacked"""
+
+    def __init__(self, date, dgs, success):
+        self.date = date
+        self.dgs = dgs
+        self.success = success
+
+    def __getitem__(self, dg_name):
+        return self.dgs[dg_name]
+
+    def __iter__(self):
+        return iter(self.dgs.items())
+
+    def __len__(self):
+        return len(self.dgs)
+
+    def __repr__(self):
+        return f"SLARun({self.date}, DGs {list(self.dgs)})"
+
+    def concat(self, attribute):
+        """One DataFrame attribute of every DG stacked, with a categorical 'DG' column in front"""
+        frames = []
+        for dg_name, result in self.dgs.items():
+            df = getattr(result, attribute)
+            if df is None:
+                continue
+            df = df.copy(deep=False)
+            df.insert(0, "DG", dg_name)
+            frames.append(df)
+        if not frames:
+            return pd.DataFrame(columns=["DG"])
+        stacked = pd.concat(frames, ignore_index=True)
+        stacked["DG"] = stacked["DG"].astype("category")
+        return stacked
+
+    def final(self):
+        return self.concat("df_final")
+
+    def status_summary(self):
+        return self.concat("status_summary")
+
+    def ageing(self):
+        return self.concat("ageing")
+
+
+def run_sla(date, dgs=None, base_path=None, write=False, force=False, resume=False, all_manufacturers=False,
+            extracts="subdivision", csv_engine=None, workers=None, lock_timeout=None):
+    """Run the Comms pipeline for `date` on the DG folders in `dgs` (default all); returns an SLARun.
+
+    write=False reads the raw_data folders only: no reports, history, checkpoints, run
+    manifest, metrics or alias-map updates are written, and every DG is built. write=True
+    runs like daily_reporter; DGs its run manifest shows as up to date are then skipped
+    (unless force) and have no result. extracts only applies to written runs.
+    """
+    reporter = DailyReporter(base_path=base_path)
+    reporter.set_date(date)
+    reporter.write_outputs = write
+    reporter.all_manufacturers = all_manufacturers
+    reporter.extract_partition = extracts
+    reporter.lock_timeout = lock_timeout
+    if workers is not None:
+        reporter.dag_workers = workers
+
+    results = {}
+    previous_engine = SourceCache.csv_engine
+    if csv_engine:
+        SourceCache.csv_engine = csv_engine
+    try:
+        success = reporter.process_comms_reporting(resume=resume, force=force, dg_names=dgs, results=results)
+    finally:
+        SourceCache.csv_engine = previous_engine
+    return SLARun(date, {dg_name: DGResult(date, dg_name, by_report["comms"])
+                         for dg_name, by_report in results.items()}, success)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a date's SLA reports in memory and print each DG's Comm Status counts")
+    parser.add_argument("--base-path", default='/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting')
+    parser.add_argument("--date", required=True)
+    parser.add_argument("--dg", nargs="+", help="Only these DG folders (default: all)")
+    parser.add_argument("--write", action="store_true", help="Also write every output, like daily_reporter")
+    parser.add_argument("--csv-engine", choices=CSV_ENGINES)
+    args = parser.parse_args()
+
+    run = run_sla(args.date, args.dg, args.base_path, write=args.write, csv_engine=args.csv_engine)
+    df_final = run.final()
+    if len(df_final):
+        print(f"\n📊 Comm Status for {args.date}")
+        print(pd.crosstab(df_final["DG"], df_final["Comm Status"], margins=True, margins_name="Total").to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+SLA Uptime Metrics
+Rolling-window availability per meter and per hierarchy level, computed from the
+array-backed meter status history (see status_history.py)
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import write_csv
+from status_history import MeterStatusHistory, STATUS_CODES, history_lock
+
+WINDOWS = (7, 30, 90)
+OUTAGE_ALERT_DAYS = 7
+ROLLUP_LEVELS = ["Circle", "Division", "Subdivision"]
+
+COMMUNICATING = STATUS_CODES["Communicating"]
+
+
+def window_start(as_of_date, days):
+    """First calendar date of a window of `days` ending on as_of_date"""
+    return (datetime.strptime(as_of_date, "%Y-%m-%d") - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+
+
+def compute_meter_uptime(history, as_of_date, windows=WINDOWS):
+    """Per-meter uptime for the meters reported on as_of_date.
+
+    Ratios are communicating days / reported days within each calendar window.
+    Streak and outage lengths count consecutive recorded days with Non Comm or
+    Never Comm status; a day the meter was missing from the report ends a run.
+    """
+    dates, matrix = history.status_matrix(window_start(as_of_date, max(windows)), as_of_date)
+    if not dates or dates[-1] != as_of_date:
+        raise ValueError(f"{as_of_date} is not recorded in the status history")
+
+    ids = np.flatnonzero(np.asarray(matrix[-1]) > 0)
+    n = len(ids)
+
+    df = pd.DataFrame({"Meter Serial No": history.serials[ids]})
+    attributes = history.attributes.reindex(ids)
+    for col in ROLLUP_LEVELS:
+        df[col] = attributes[col].to_numpy() if col in attributes.columns else np.nan
+
+    # One pass over the days: windows are suffixes of the longest one, so each
+    # day adds to every window it falls in. Runs of out days give both the
+    # longest outage and (at the last day) the current streak.
+    starts = {days: window_start(as_of_date, days) for days in windows}
+    reported_days = {days: np.zeros(n, dtype=np.int32) for days in windows}
+    comm_days = {days: np.zeros(n, dtype=np.int32) for days in windows}
+    run = np.zeros(n, dtype=np.int32)
+    longest = np.zeros(n, dtype=np.int32)
+
+    for date, row in zip(dates, matrix):
+        day = np.asarray(row)[ids]
+        reported = day > 0
+        communicating = day == COMMUNICATING
+        for days in windows:
+            if date >= starts[days]:
+                reported_days[days] += reported
+                comm_days[days] += communicating
+        run = (run + 1) * (reported & ~communicating)
+        np.maximum(longest, run, out=longest)
+    streak = run
+
+    for days in windows:
+        df[f"Days Reported {days}d"] = reported_days[days]
+        df[f"Days Communicating {days}d"] = comm_days[days]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            df[f"Comm % {days}d"] = np.round(
+                np.where(reported_days[days] > 0, 100 * comm_days[days] / reported_days[days], np.nan), 2)
+
+    df["Current Non Comm Streak"] = streak
+    df[f"Longest Outage {max(windows)}d"] = longest
+    df["Last Communicated At"] = history.last_communicated(ids)
+    return df
+
+
+def rollup_uptime(df_meters, dg_name, windows=WINDOWS):
+    """Pool meter-level days into DG / Circle / Division / Subdivision rows"""
+    longest_col = f"Longest Outage {max(windows)}d"
+    sum_cols = []
+    for days in windows:
+        sum_cols += [f"Days Reported {days}d", f"Days Communicating {days}d"]
+
+    work = df_meters[ROLLUP_LEVELS + sum_cols].copy()
+    for level in ROLLUP_LEVELS:
+        work[level] = work[level].astype("category")
+    work["Meters"] = 1
+    work[f"Meters Out {OUTAGE_ALERT_DAYS}+ Days"] = (df_meters["Current Non Comm Streak"] >= OUTAGE_ALERT_DAYS).astype(int)
+    work["Streak Sum"] = df_meters["Current Non Comm Streak"]
+    work["Longest Sum"] = df_meters[longest_col]
+    work["Longest Max"] = df_meters[longest_col]
+
+    def finish(agg):
+        rows = pd.DataFrame(index=agg.index)
+        rows["Meters"] = agg["Meters"]
+        for days in windows:
+            reported = agg[f"Days Reported {days}d"]
+            rows[f"Comm % {days}d"] = np.round(
+                np.where(reported > 0, 100 * agg[f"Days Communicating {days}d"] / reported.where(reported > 0, 1), 0), 2)
+        rows[f"Meters Out {OUTAGE_ALERT_DAYS}+ Days"] = agg[f"Meters Out {OUTAGE_ALERT_DAYS}+ Days"]
+        rows["Avg Current Non Comm Streak"] = np.round(agg["Streak Sum"] / agg["Meters"], 2)
+        rows[f"Avg {longest_col}"] = np.round(agg["Longest Sum"] / agg["Meters"], 2)
+        rows[f"Max {longest_col}"] = agg["Longest Max"]
+        return rows
+
+    agg_spec = {c: "sum" for c in work.columns if c not in ROLLUP_LEVELS}
+    agg_spec["Longest Max"] = "max"
+
+    overall = finish(work.agg(agg_spec).to_frame().T)
+    overall.insert(0, "Category", "Overall")
+    overall.insert(1, "DG", dg_name)
+    for col in ROLLUP_LEVELS:
+        overall.insert(overall.columns.get_loc("Meters"), col, "")
+    frames = [overall]
+
+    for depth, level in enumerate(ROLLUP_LEVELS):
+        if work[level].isna().all():
+            continue
+        rows = finish(work.groupby(level, observed=True).agg(agg_spec)).reset_index()
+        rows[level] = rows[level].astype(object)
+        # Parents come from the most common value (smallest on ties), as in Comm_Status_Summary
+        for parent in ROLLUP_LEVELS[:depth]:
+            counts = work.groupby([level, parent], observed=True).size().rename("n").reset_index()
+            counts = counts.sort_values([level, "n", parent], ascending=[True, False, True])
+            parent_mode = counts.drop_duplicates(level).set_index(level)[parent].astype(object)
+            rows[parent] = rows[level].map(parent_mode).fillna("")
+        for other in ROLLUP_LEVELS[depth + 1:]:
+            rows[other] = ""
+        rows.insert(0, "Category", f"By {level}")
+        rows.insert(1, "DG", dg_name)
+        frames.append(rows)
+
+    columns = ["Category", "DG"] + ROLLUP_LEVELS + [c for c in overall.columns if c not in ["Category", "DG"] + ROLLUP_LEVELS]
+    return pd.concat([f[columns] for f in frames], ignore_index=True)
+
+
+def write_uptime_reports(history, dg_name, as_of_date, output_dir, windows=WINDOWS):
+    """Write per-meter and rolled-up uptime CSVs; returns the Overall row as a dict"""
+    df_meters = compute_meter_uptime(history, as_of_date, windows)
+    df_rollup = rollup_uptime(df_meters, dg_name, windows)
+
+    meters_path = output_dir / f"SLA_Uptime_Meters_{dg_name}_{as_of_date}.csv"
+    write_csv(df_meters, meters_path, index=False)
+    rollup_path = output_dir / f"SLA_Uptime_Summary_{dg_name}_{as_of_date}.csv"
+    write_csv(df_rollup, rollup_path, index=False)
+    print(f"✨ Uptime reports: {meters_path.name}, {rollup_path.name}")
+
+    overall = df_rollup.iloc[0]
+    return {
+        "days_in_history": len(history.day_positions(window_start(as_of_date, max(windows)), as_of_date)),
+        "meters": int(overall["Meters"]),
+        **{f"comm_pct_{days}d": float(overall[f"Comm % {days}d"]) for days in windows},
+        f"meters_out_{OUTAGE_ALERT_DAYS}_plus_days": int(overall[f"Meters Out {OUTAGE_ALERT_DAYS}+ Days"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute rolling-window SLA uptime for one DG")
+    parser.add_argument("--base-path", default='/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting')
+    parser.add_argument("--dg", required=True)
+    parser.add_argument("--date", help="As-of date (default: latest recorded day)")
+    args = parser.parse_args()
+
+    with history_lock(args.base_path, args.dg):
+        history = MeterStatusHistory.open(args.base_path, args.dg)
+    if not history.dates:
+        print(f"❌ No Final_SLA_Report history found for {args.dg}")
+        return
+    as_of_date = args.date or history.dates[-1]
+    df_meters = compute_meter_uptime(history, as_of_date)
+    print(rollup_uptime(df_meters, args.dg).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for SLA report processing
+"""
+
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+import pandas as pd
+
+REPORT_NAME = "Report_1_Comms_Reporting"
+DATE_FOLDER_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+COMM_STATUSES = ["Communicating", "Non Comm", "Never Comm"]
+
+
+def parse_datetimes(values, dayfirst=True):
+    """Parse date strings once per unique value instead of once per row.
+
+    Matches the per-row ``pd.to_datetime(value, dayfirst=True, errors='coerce')``
+    calls used by the reports: the fast vectorised parse handles the common
+    format and anything it rejects is retried one value at a time.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    codes, uniques = pd.factorize(series)
+    if len(uniques) == 0:
+        return pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+
+    texts = pd.Series(uniques).astype(str).str.strip()
+    parsed = pd.to_datetime(texts, dayfirst=dayfirst, errors="coerce")
+
+    retry = parsed.isna() & (texts != "")
+    for pos in np.flatnonzero(retry.to_numpy()):
+        parsed.iloc[pos] = pd.to_datetime(texts.iloc[pos], dayfirst=dayfirst, errors="coerce")
+
+    values_ns = parsed.to_numpy(dtype="datetime64[ns]")
+    result = np.where(codes >= 0, values_ns[np.maximum(codes, 0)], np.datetime64("NaT"))
+    return pd.Series(result, index=series.index, dtype="datetime64[ns]")
+
+
+def status_counts(df, level, sort=True):
+    """Comm Status counts and row totals per `level` value in one groupby (observed values only).
+
+    Rows are in sorted order, or in order of appearance with sort=False (like .unique()).
+    """
+    groups = df.groupby(level, observed=True, sort=sort)
+    counts = groups["Comm Status"].value_counts().unstack(fill_value=0)
+    counts = counts.reindex(index=groups.size().index, columns=COMM_STATUSES, fill_value=0)
+    counts["Total"] = groups.size()
+    return counts
+
+
+def most_common(df, level, column):
+    """{level value: most common `column` value}, ties to the smallest like Series.mode()[0]"""
+    pairs = df.groupby([level, column], observed=True).size().rename("n").reset_index()
+    pairs = pairs.sort_values(["n", column], ascending=[False, True], kind="stable")
+    return pairs.drop_duplicates(level).set_index(level)[column].to_dict()
+
+
+class LocalWebhookReceiver(BaseHTTPRequestHandler):
+    def do_POST(self):
+        content_length = int(self.headers['Content-Length'])
+        post_data = self.rfile.read(content_length)
+        
+        try:
+            data = json.loads(post_data.decode('utf-8'))
+            print(f"📥 Received webhook: {data}")
+            
+            # Handle different types of commands
+            if 'text' in data:
+                message = data['text']
+                if 'process' in message.lower() or 'run' in message.lower():
+                    print("🎯 Processing command received!")
+                    # Here we would trigger the actual processing
+                    
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps({"status": "received"}).encode())
+            
+        except Exception as e:
+            print(f"❌ Webhook error: {e}")
+            self.send_response(500)
+            self.end_headers()
+    
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-type', 'text/html')
+        self.end_headers()
+        self.wfile.write(b"<html><body><h1>Webhook Receiver Active</h1></body></html>")
+
+
+class WebhookManager:
+    def __init__(self, port=8080, handler_class=LocalWebhookReceiver, host='localhost'):
+        self.port = port
+        self.host = host
+        self.handler_class = handler_class
+        self.server = None
+        self.thread = None
+    
+    def start_server(self):
+        """Start local webhook server in background thread"""
+        try:
+            self.server = HTTPServer((self.host, self.port), self.handler_class)
+            self.thread = threading.Thread(target=self.server.serve_forever)
+            self.thread.daemon = True
+            self.thread.start()
+            print(f"🌐 Webhook server started on port {self.port}")
+            return True
+        except Exception as e:
+            print(f"❌ Failed to start webhook server: {e}")
+            return False
+    
+    def stop_server(self):
+        """Stop the webhook server"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            print("🛑 Webhook server stopped")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Source Cache
+Loads each raw source file of a DG once (with its join key cleaned) and shares the
+parsed DataFrame between every report that needs it. Only the union of the columns
+the active reports ask for is parsed
+"""
+
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline_plan import load_pipeline_spec, source_specs
+from stage_checkpoints import fingerprint_files
+
+# CSV parser: "auto" uses pyarrow's multi-threaded reader when installed, "pyarrow" insists on it
+# (still falling back if a file cannot be parsed), "pandas" always uses the pandas C parser
+CSV_ENGINE_ENV = "SLA_CSV_ENGINE"
+CSV_ENGINES = ["auto", "pyarrow", "pandas"]
+
+# name: file pattern(s), reader, join key column cleaned with str.strip() - from pipeline_spec.json
+SOURCE_SPECS = source_specs(load_pipeline_spec())
+
+
+def source_files(raw_dir, name):
+    """Files backing a source, using the first pattern that matches anything"""
+    for pattern in SOURCE_SPECS[name]["files"]:
+        files = sorted(Path(raw_dir).glob(pattern))
+        if files:
+            return files
+    return []
+
+
+def _read_csv_pyarrow(path, columns=None):
+    """Multi-threaded read of a memory-mapped csv; only the projected columns are converted to pandas"""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    convert_options = pacsv.ConvertOptions(
+        # Keep pandas semantics: empty strings are NaN and date-like text stays text
+        strings_can_be_null=True,
+        timestamp_parsers=[],
+    )
+    if columns is not None:
+        header = pd.read_csv(path, nrows=0).columns
+        convert_options.include_columns = [c for c in header if c in columns]
+    with pa.memory_map(str(path), "r") as source:
+        table = pacsv.read_csv(source, read_options=pacsv.ReadOptions(use_threads=True),
+                               convert_options=convert_options)
+    return table.to_pandas()
+
+
+def read_csv_source(path, columns=None, engine=None):
+    """Read a raw csv with the configured engine, falling back to pandas if pyarrow is missing or fails"""
+    engine = engine or os.environ.get(CSV_ENGINE_ENV, "auto")
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Unknown CSV engine {engine}, expected one of {CSV_ENGINES}")
+    if engine != "pandas":
+        try:
+            return _read_csv_pyarrow(path, columns)
+        except ImportError:
+            if engine == "pyarrow":
+                print(f"⚠️ pyarrow is not installed, reading {Path(path).name} with pandas")
+        except Exception as e:
+            print(f"⚠️ pyarrow could not parse {Path(path).name} ({e}), reading with pandas")
+    usecols = None if columns is None else (lambda c: c in columns)
+    return pd.read_csv(path, usecols=usecols)
+
+
+class SourceCache:
+    """Per raw_data folder cache; use SourceCache.for_folder() so every report shares one instance"""
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+    csv_engine = None            # None -> $SLA_CSV_ENGINE or "auto"
+
+    def __init__(self, raw_dir):
+        self.raw_dir = Path(raw_dir)
+        self.columns = {}        # source -> set of requested columns, or None for all
+        self._frames = {}        # source -> (fingerprint, DataFrame)
+        self._locks = {name: threading.Lock() for name in SOURCE_SPECS}
+
+    @classmethod
+    def for_folder(cls, raw_dir):
+        key = str(Path(raw_dir).resolve())
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(raw_dir)
+            return cls._instances[key]
+
+    @classmethod
+    def release(cls, raw_dir):
+        """Drop a folder's cached frames once every report for that DG has run"""
+        with cls._instances_lock:
+            cls._instances.pop(str(Path(raw_dir).resolve()), None)
+
+    def require(self, sources):
+        """Register the columns a report needs: {source: [columns] or None for every column}"""
+        for name, columns in sources.items():
+            if name not in SOURCE_SPECS:
+                raise ValueError(f"Unknown source {name}")
+            if columns is None or self.columns.get(name, set()) is None:
+                self.columns[name] = None
+            else:
+                self.columns[name] = self.columns.get(name, set()) | set(columns) | {SOURCE_SPECS[name]["key"]}
+
+    def available(self, name):
+        return bool(source_files(self.raw_dir, name))
+
+    def get(self, name):
+        """Parsed source (shared - do not modify in place), or None if its file is missing"""
+        with self._locks[name]:
+            files = source_files(self.raw_dir, name)
+            if not files:
+                return None
+            fingerprint = fingerprint_files(files)
+            cached = self._frames.get(name)
+            if cached is not None and cached[0] == fingerprint:
+                return cached[1]
+            df = self._read(name, files)
+            self._frames[name] = (fingerprint, df)
+            return df
+
+    def _read(self, name, files):
+        spec = SOURCE_SPECS[name]
+        wanted = self.columns.get(name)
+        if spec["reader"] == "excel":
+            usecols = None if wanted is None else (lambda c: c in wanted)
+            frames = [pd.read_excel(f, usecols=usecols) for f in files]
+        else:
+            frames = [read_csv_source(f, wanted, self.csv_engine) for f in files]
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        if spec.get("drop_duplicates"):
+            df = df.drop_duplicates()
+        df[spec["key"]] = df[spec["key"]].astype(str).str.strip()
+        return df
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Stage Checkpoints
+Persists the intermediate artifacts of each named processing stage so that a
+re-run with --resume can restart from the first stage whose inputs or code changed
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+from atomic_io import atomic_open, write_json
+
+PIPELINE_VERSION = 1  # bump to invalidate every checkpoint (e.g. when a shared helper changes)
+CHECKPOINT_FOLDER = "_checkpoints"
+CHECKPOINT_DIR_ENV = "SLA_CHECKPOINT_DIR"
+
+
+def checkpoint_root(base_path):
+    """Local checkpoint folder of a base path: under $SLA_CHECKPOINT_DIR, else the user's cache folder.
+
+    Never inside the (OneDrive-synced) base path itself; one subfolder per base path so
+    sandboxes and other data folders do not share checkpoints.
+    """
+    base_path = Path(base_path).resolve()
+    root = os.environ.get(CHECKPOINT_DIR_ENV)
+    root = Path(root) if root else Path.home() / ".cache" / "sla_reporting" / CHECKPOINT_FOLDER
+    return root / f"{base_path.name}-{hashlib.sha1(str(base_path).encode('utf-8')).hexdigest()[:10]}"
+
+
+def fingerprint_files(paths):
+    """Cheap change detection: {file name: [size, mtime_ns]} for the given files"""
+    fingerprint = {}
+    for path in sorted(Path(p) for p in paths):
+        if path.exists():
+            st = path.stat()
+            fingerprint[path.name] = [st.st_size, st.st_mtime_ns]
+        else:
+            fingerprint[path.name] = None
+    return fingerprint
+
+
+def stage_code_version(func):
+    """Hash of a stage function's source, so editing a stage invalidates its checkpoint"""
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = getattr(func, "__qualname__", repr(func))
+    return hashlib.sha1(f"{PIPELINE_VERSION}:{source}".encode("utf-8")).hexdigest()
+
+
+def stage_key(stage_name, code_version, upstream_key=None, inputs=None):
+    """Chain a stage's identity to its upstream stage, so a change anywhere above invalidates it"""
+    payload = json.dumps({
+        "stage": stage_name,
+        "code": code_version,
+        "upstream": upstream_key,
+        "inputs": inputs,
+    }, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class StageCheckpoints:
+    """Pickled stage state plus a small JSON meta file per stage in one checkpoint folder"""
+
+    def __init__(self, checkpoint_dir, root=None):
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.root = Path(root) if root else self.checkpoint_dir.parent   # clear() prunes empty folders up to here
+
+    def _artifact_path(self, stage_name):
+        return self.checkpoint_dir / f"{stage_name}.pkl"
+
+    def _meta_path(self, stage_name):
+        return self.checkpoint_dir / f"{stage_name}.json"
+
+    def read_meta(self, stage_name):
+        try:
+            with open(self._meta_path(stage_name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_valid(self, stage_name, key):
+        """True when the stored checkpoint matches `key` and the files it wrote are untouched"""
+        meta = self.read_meta(stage_name)
+        if meta is None or meta.get("key") != key or not self._artifact_path(stage_name).exists():
+            return False
+        outputs = meta.get("outputs", {})
+        return fingerprint_files(outputs.keys()) == {Path(p).name: v for p, v in outputs.items()}
+
+    def load(self, stage_name):
+        with open(self._artifact_path(stage_name), "rb") as f:
+            return pickle.load(f)
+
+    def save(self, stage_name, key, state, outputs=()):
+        """Write the artifact to a temp file and rename it, then record the meta"""
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        with atomic_open(self._artifact_path(stage_name), "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        fingerprints = fingerprint_files(outputs)
+        meta = {
+            "stage": stage_name,
+            "key": key,
+            "outputs": {str(p): fingerprints[Path(p).name] for p in outputs},
+        }
+        write_json(meta, self._meta_path(stage_name), indent=2)
+
+    def clear(self, stage_name=None):
+        """Delete one stage's checkpoint, or the whole folder (and parents below root it leaves empty) without a name"""
+        if stage_name is not None:
+            for path in (self._artifact_path(stage_name), self._meta_path(stage_name)):
+                if path.exists():
+                    path.unlink()
+            return
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+        for parent in self.checkpoint_dir.parents:
+            if parent == self.root or self.root not in parent.parents:
+                break
+            try:
+                parent.rmdir()
+            except OSError:
+                break
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Stage DAG
+A small dependency-driven executor: each task declares the tasks it needs, and runs
+on a thread pool as soon as those have finished. Used to overlap the large CSV writes
+and the independent report stages once the Final report exists
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_WORKERS = 4  # the big tasks are file writes, so threads help even on small machines
+
+
+class StageDag:
+    """Add tasks in dependency order with add(); results are passed to dependants positionally"""
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, task_wrapper=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage")
+        self._task_wrapper = task_wrapper  # e.g. a profiler hook; None adds no overhead
+        self._tasks = {}
+        self._order = []
+        self._closing = False
+        self._started = time.perf_counter()
+
+    def add(self, name, func, inputs=(), after=()):
+        """Schedule func(*results_of_inputs) once `inputs` and the ordering-only `after` tasks are done
+
+        Both must name tasks that were already added.
+        """
+        if name in self._tasks:
+            raise ValueError(f"Duplicate task name: {name}")
+        missing = [d for d in list(inputs) + list(after) if d not in self._tasks]
+        if missing:
+            raise ValueError(f"Task {name} depends on unknown task(s): {missing}")
+
+        task = {"name": name, "inputs": tuple(inputs) + tuple(d for d in after if d not in inputs),
+                "future": Future(), "start": None, "end": None}
+        self._tasks[name] = task
+        self._order.append(name)
+
+        if self._task_wrapper is not None:
+            func = self._task_wrapper(func)
+        deps = [self._tasks[d]["future"] for d in task["inputs"]]
+        n_args = len(inputs)
+        remaining = [len(deps)]
+        lock = threading.Lock()
+
+        def launch():
+            for dep in deps:
+                if dep.exception() is not None:
+                    task["future"].set_exception(dep.exception())
+                    return
+            args = [dep.result() for dep in deps[:n_args]]
+            if self._closing:
+                task["future"].set_exception(RuntimeError(f"Task {name} was not started, the DAG is closed"))
+                return
+            try:
+                self._executor.submit(self._run, task, func, args)
+            except RuntimeError as e:  # pool already shut down
+                task["future"].set_exception(e)
+
+        def on_dep_done(_):
+            with lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                launch()
+
+        if not deps:
+            launch()
+        for dep in deps:
+            dep.add_done_callback(on_dep_done)
+        return task["future"]
+
+    def _run(self, task, func, args):
+        task["start"] = time.perf_counter()
+        try:
+            result = func(*args)
+        except BaseException as e:
+            task["end"] = time.perf_counter()
+            task["future"].set_exception(e)
+            return
+        task["end"] = time.perf_counter()
+        task["future"].set_result(result)
+
+    def result(self, name):
+        """Block until a task finishes and return its result (re-raises its exception)"""
+        return self._tasks[name]["future"].result()
+
+    def peek(self, name):
+        """Result of a task that finished successfully, else None (never blocks)"""
+        task = self._tasks.get(name)
+        if task is None or not task["future"].done() or task["future"].exception() is not None:
+            return None
+        return task["future"].result()
+
+    def wait(self):
+        """Wait for every task, shut the pool down and re-raise the first failure"""
+        error = None
+        for name in self._order:
+            exc = self._tasks[name]["future"].exception()
+            if exc is not None and error is None:
+                error = exc
+        self.close()
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Run every added task that still can, then release the pool (safe to call twice).
+
+        After a failure this still finishes the writes and checkpoints of the stages that
+        succeeded; tasks depending on the failed one fail with it.
+        """
+        for name in self._order:
+            self._tasks[name]["future"].exception()  # blocks until the task has run or failed
+        self._closing = True
+        self._executor.shutdown(wait=True)
+
+    def critical_path(self):
+        """Walk back from the last task to finish, always through the dependency that finished last"""
+        finished = [t for t in self._tasks.values() if t["end"] is not None]
+        if not finished:
+            return []
+        path = [max(finished, key=lambda t: t["end"])]
+        while True:
+            deps = [self._tasks[d] for d in path[-1]["inputs"] if self._tasks[d]["end"] is not None]
+            if not deps:
+                break
+            path.append(max(deps, key=lambda t: t["end"]))
+        return list(reversed(path))
+
+    def report(self, title="STAGE TIMINGS"):
+        """Print per-task durations, total wall time and the critical path"""
+        wall = time.perf_counter() - self._started
+        busy = sum(t["end"] - t["start"] for t in self._tasks.values() if t["end"] is not None)
+        print(f"\n⏱️ {title}")
+        for name in self._order:
+            t = self._tasks[name]
+            if t["end"] is None:
+                print(f"   {name:<44} not run")
+            else:
+                print(f"   {name:<44} {t['end'] - t['start']:7.2f}s  (starts +{t['start'] - self._started:.2f}s)")
+        print(f"   Wall time: {wall:.2f}s, task time: {busy:.2f}s ({busy / wall if wall > 0 else 0:.1f}x overlap)")
+        path = self.critical_path()
+        if path:
+            print(f"   Critical path: " + " → ".join(f"{t['name']} ({t['end'] - t['start']:.2f}s)" for t in path))
+        return {
+            "wall_seconds": round(wall, 3),
+            "task_seconds": {n: round(self._tasks[n]["end"] - self._tasks[n]["start"], 3)
+                             for n in self._order if self._tasks[n]["end"] is not None},
+            "critical_path": [t["name"] for t in path],
+        }
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Meter Status History
+Persistent cross-day Comm Status store built from the daily Final_SLA_Report outputs.
+
+Layout of a history folder (one per report/DG):
+    meta.json       dates covered, meter count and array capacities
+    meters.txt      meter serials, one per line; line number = dense meter id
+    status.u8       memory-mapped uint8 matrix [day, meter] of status codes
+    last_comm.i8    memory-mapped int64 [meter] latest Communicated At (epoch seconds)
+    attributes.pkl  latest Circle/Division/Subdivision per meter id
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import FileLock, atomic_path, write_json, write_text
+from output_archive import archived_partitions, read_partition
+from sla_utils import COMM_STATUSES, DATE_FOLDER_PATTERN, REPORT_NAME, parse_datetimes
+
+HISTORY_FOLDER = "_history"
+
+# 0 means the meter was not in that day's report
+STATUS_CODES = {status: code for code, status in enumerate(COMM_STATUSES, start=1)}
+STATUS_LABELS = np.array(["Not Reported"] + COMM_STATUSES, dtype=object)
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+ATTRIBUTE_COLUMNS = ["Circle", "Division", "Subdivision"]
+HISTORY_COLUMNS = ["Meter Serial No", "Comm Status", "Communicated At"] + ATTRIBUTE_COLUMNS
+
+FORMAT_VERSION = 1
+
+
+def list_final_reports(base_path, dg_name, report_name=REPORT_NAME):
+    """Return [(date, Final_SLA_Report path)] for a DG across all date folders, oldest first.
+
+    Days whose CSV was removed after compaction point at their Parquet archive partition.
+    """
+    base_path = Path(base_path)
+    reports = {}
+    if not base_path.exists():
+        return []
+    for date_folder in sorted(base_path.iterdir()):
+        if not (date_folder.is_dir() and DATE_FOLDER_PATTERN.match(date_folder.name)):
+            continue
+        date = date_folder.name
+        final_path = date_folder / report_name / dg_name / "output" / f"Final_SLA_Report_{date}.csv"
+        if final_path.exists():
+            reports[date] = final_path
+    for date, _, path in archived_partitions(base_path, "Final", dgs=[dg_name], report_name=report_name):
+        reports.setdefault(date, path)
+    return sorted(reports.items())
+
+
+def history_lock(base_path, dg_name, report_name=REPORT_NAME, timeout=None):
+    """Lock for a DG's history store; hold it while opening (which syncs) and appending"""
+    path = Path(base_path) / HISTORY_FOLDER / report_name / f"{dg_name}.lock"
+    return FileLock(path, timeout, label=f"{dg_name} status history")
+
+
+def read_final_for_history(final_path):
+    """Read only the columns the history store needs"""
+    if Path(final_path).suffix == ".parquet":
+        return read_partition(final_path, HISTORY_COLUMNS)
+    return pd.read_csv(final_path, usecols=lambda c: c in HISTORY_COLUMNS, dtype=str)
+
+
+class MeterStatusHistory:
+    """Array-backed per-meter Comm Status history for one DG"""
+
+    def __init__(self, history_dir):
+        self.history_dir = Path(history_dir)
+        self.meta_path = self.history_dir / "meta.json"
+        self.meters_path = self.history_dir / "meters.txt"
+        self.status_path = self.history_dir / "status.u8"
+        self.last_comm_path = self.history_dir / "last_comm.i8"
+        self.attributes_path = self.history_dir / "attributes.pkl"
+
+        self.dates = []
+        self.n_meters = 0
+        self.meter_capacity = 0
+        self.day_capacity = 0
+        self.serials = pd.Index([], dtype=object)
+        self.attributes = pd.DataFrame(columns=ATTRIBUTE_COLUMNS)
+        self.status = None
+        self.last_comm = None
+
+        if self.meta_path.exists():
+            self._load()
+
+    @classmethod
+    def open(cls, base_path, dg_name, report_name=REPORT_NAME, sync=True):
+        """Open a DG's history store, building or catching it up from the output folders"""
+        history = cls(Path(base_path) / HISTORY_FOLDER / report_name / dg_name)
+        if sync:
+            history.sync_from_outputs(base_path, dg_name, report_name)
+        return history
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        with open(self.meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported history format in {self.history_dir}; delete it to rebuild")
+
+        self.dates = meta["dates"]
+        self.n_meters = meta["n_meters"]
+        self.meter_capacity = meta["meter_capacity"]
+        self.day_capacity = meta["day_capacity"]
+
+        with open(self.meters_path, encoding="utf-8") as f:
+            lines = f.read().split("\n")
+        serials = lines[:self.n_meters] if self.n_meters else []
+        if len(lines) > len(serials) and lines != [""]:
+            # Serials appended by an interrupted run that never saved its meta
+            write_text(self.meters_path, "\n".join(serials))
+        self.serials = pd.Index(serials, dtype=object)
+
+        self.status = np.memmap(self.status_path, dtype=np.uint8, mode="r+",
+                                shape=(self.day_capacity, self.meter_capacity))
+        self.last_comm = np.memmap(self.last_comm_path, dtype=np.int64, mode="r+",
+                                   shape=(self.meter_capacity,))
+        if self.attributes_path.exists():
+            self.attributes = pd.read_pickle(self.attributes_path)
+
+    def _save_meta(self):
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "dates": self.dates,
+            "n_meters": self.n_meters,
+            "meter_capacity": self.meter_capacity,
+            "day_capacity": self.day_capacity,
+        }
+        write_json(meta, self.meta_path, indent=2)
+
+    def _allocate(self, day_capacity, meter_capacity):
+        """(Re)size the memory-mapped arrays, keeping existing data"""
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+
+        if meter_capacity != self.meter_capacity or self.status is None:
+            # Meter axis changed: rewrite the matrix with the wider row length
+            tmp_path = self.status_path.with_suffix(".tmp")
+            new_status = np.memmap(tmp_path, dtype=np.uint8, mode="w+", shape=(day_capacity, meter_capacity))
+            if self.status is not None:
+                new_status[:len(self.dates), :self.meter_capacity] = self.status[:len(self.dates)]
+            new_status.flush()
+            del new_status
+            self.status = None
+            tmp_path.replace(self.status_path)
+
+            tmp_path = self.last_comm_path.with_suffix(".tmp")
+            new_last = np.memmap(tmp_path, dtype=np.int64, mode="w+", shape=(meter_capacity,))
+            new_last[:] = NO_TIMESTAMP
+            if self.last_comm is not None:
+                new_last[:self.meter_capacity] = self.last_comm
+            new_last.flush()
+            del new_last
+            self.last_comm = None
+            tmp_path.replace(self.last_comm_path)
+        elif day_capacity != self.day_capacity:
+            # Day axis only: rows are contiguous, so just extend the file
+            self.status.flush()
+            self.status = None
+            with open(self.status_path, "r+b") as f:
+                f.truncate(day_capacity * meter_capacity)
+
+        self.day_capacity = day_capacity
+        self.meter_capacity = meter_capacity
+        self.status = np.memmap(self.status_path, dtype=np.uint8, mode="r+", shape=(day_capacity, meter_capacity))
+        self.last_comm = np.memmap(self.last_comm_path, dtype=np.int64, mode="r+", shape=(meter_capacity,))
+
+    def _ensure_capacity(self, n_days, n_meters):
+        day_capacity = self.day_capacity
+        meter_capacity = self.meter_capacity
+        if n_days > day_capacity:
+            day_capacity = max(n_days, day_capacity * 2, 32)
+        if n_meters > meter_capacity:
+            meter_capacity = max(n_meters, int(meter_capacity * 1.5), 1024)
+        if (day_capacity, meter_capacity) != (self.day_capacity, self.meter_capacity) or self.status is None:
+            self._allocate(day_capacity, meter_capacity)
+
+    def flush(self):
+        if self.status is not None:
+            self.status.flush()
+            self.last_comm.flush()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def meter_ids(self, serials, add_missing=False):
+        """Map serials to dense ids (-1 for unknown unless add_missing)"""
+        serials = pd.Index(pd.Series(serials, dtype=object).astype(str).str.strip())
+        ids = self.serials.get_indexer(serials) if len(self.serials) else np.full(len(serials), -1)
+        if add_missing and (ids < 0).any():
+            new_serials = pd.unique(serials[ids < 0])
+            first_id = self.n_meters
+            with open(self.meters_path, "a", encoding="utf-8") as f:
+                if first_id:
+                    f.write("\n")
+                f.write("\n".join(new_serials))
+            self.serials = self.serials.append(pd.Index(new_serials, dtype=object))
+            self.n_meters += len(new_serials)
+            ids = self.serials.get_indexer(serials)
+        return ids
+
+    def append_day(self, date, df_final):
+        """Record one day's statuses. Re-recording a known date overwrites it in place."""
+        if self.dates and date < self.dates[-1] and date not in self.dates:
+            raise ValueError(f"{date} is older than the latest recorded day {self.dates[-1]}; rebuild the history instead")
+
+        day = df_final.drop_duplicates(subset="Meter Serial No")
+        if self.n_meters == 0:
+            self.history_dir.mkdir(parents=True, exist_ok=True)
+            self.meters_path.write_text("", encoding="utf-8")
+        ids = self.meter_ids(day["Meter Serial No"], add_missing=True)
+
+        day_pos = self.dates.index(date) if date in self.dates else len(self.dates)
+        self._ensure_capacity(day_pos + 1, self.n_meters)
+
+        codes = day["Comm Status"].map(STATUS_CODES).fillna(0).to_numpy(dtype=np.uint8)
+        row = np.zeros(self.meter_capacity, dtype=np.uint8)
+        row[ids] = codes
+        self.status[day_pos] = row
+
+        if "Communicated At" in day.columns:
+            comm_at = parse_datetimes(day["Communicated At"])
+            seen = comm_at.notna().to_numpy()
+            seconds = comm_at[seen].to_numpy(dtype="datetime64[s]").astype(np.int64)
+            self.last_comm[ids[seen]] = np.maximum(self.last_comm[ids[seen]], seconds)
+
+        present = [c for c in ATTRIBUTE_COLUMNS if c in day.columns]
+        if present:
+            attrs = day[present].copy()
+            attrs.index = ids
+            self.attributes = attrs.combine_first(self.attributes.reindex(columns=present)) \
+                if len(self.attributes) else attrs
+            with atomic_path(self.attributes_path) as tmp_path:
+                self.attributes.to_pickle(tmp_path)
+
+        if day_pos == len(self.dates):
+            self.dates.append(date)
+        self.flush()
+        self._save_meta()
+        return day_pos
+
+    def sync_from_outputs(self, base_path, dg_name, report_name=REPORT_NAME):
+        """Append any Final reports newer than the last recorded day; rebuild if older days were added"""
+        reports = list_final_reports(base_path, dg_name, report_name)
+        known = set(self.dates)
+        pending = [(d, p) for d, p in reports if d not in known]
+        if not pending:
+            return 0
+
+        if self.dates and pending[0][0] < self.dates[-1]:
+            print(f"🔁 Older reports found for {dg_name}, rebuilding status history...")
+            self.rebuild(reports)
+            return len(reports)
+
+        for date, final_path in pending:
+            print(f"🗂️ Adding {date} to {dg_name} status history...")
+            self.append_day(date, read_final_for_history(final_path))
+        return len(pending)
+
+    def rebuild(self, reports):
+        """Drop the store and rebuild it from [(date, Final report path)]"""
+        self.status = None
+        self.last_comm = None
+        for path in (self.meta_path, self.meters_path, self.status_path, self.last_comm_path, self.attributes_path):
+            if path.exists():
+                path.unlink()
+        self.__init__(self.history_dir)
+        for date, final_path in reports:
+            self.append_day(date, read_final_for_history(final_path))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def day_positions(self, start_date=None, end_date=None):
+        """Row positions of recorded days within [start_date, end_date]"""
+        return [i for i, d in enumerate(self.dates)
+                if (start_date is None or d >= start_date) and (end_date is None or d <= end_date)]
+
+    def status_matrix(self, start_date=None, end_date=None):
+        """Return (dates, uint8 matrix [day, meter]) for the recorded days in range"""
+        positions = self.day_positions(start_date, end_date)
+        if not positions:
+            return [], np.zeros((0, self.n_meters), dtype=np.uint8)
+        matrix = self.status[positions[0]:positions[-1] + 1, :self.n_meters]
+        return [self.dates[i] for i in positions], matrix
+
+    def last_communicated(self, ids=None):
+        """Latest known Communicated At per meter id as datetimes (NaT when never seen)"""
+        values = np.asarray(self.last_comm[:self.n_meters] if ids is None else self.last_comm[ids])
+        result = values.astype("datetime64[s]").astype("datetime64[ns]")
+        result[values == NO_TIMESTAMP] = np.datetime64("NaT")
+        return result
+
+    def meter_history(self, serial, start_date=None, end_date=None):
+        """Per-day Comm Status for one meter"""
+        meter_id = self.meter_ids([serial])[0]
+        if meter_id < 0:
+            return pd.DataFrame(columns=["Date", "Comm Status"])
+        dates, matrix = self.status_matrix(start_date, end_date)
+        return pd.DataFrame({"Date": dates, "Comm Status": STATUS_LABELS[matrix[:, meter_id]]})
+
+    def meter_summary(self, serial, start_date=None, end_date=None):
+        """How many recorded days a meter communicated, plus its last communication"""
+        meter_id = self.meter_ids([serial])[0]
+        if meter_id < 0:
+            return None
+        dates, matrix = self.status_matrix(start_date, end_date)
+        column = np.asarray(matrix[:, meter_id])
+        last = self.last_communicated([meter_id])[0]
+        return {
+            "meter": str(serial),
+            "days_recorded": len(dates),
+            "days_reported": int((column > 0).sum()),
+            "days_communicating": int((column == STATUS_CODES["Communicating"]).sum()),
+            "days_non_comm": int((column == STATUS_CODES["Non Comm"]).sum()),
+            "days_never_comm": int((column == STATUS_CODES["Never Comm"]).sum()),
+            "last_communicated_at": None if pd.isna(last) else str(pd.Timestamp(last)),
+        }
+
+    def group_history(self, column="Subdivision", start_date=None, end_date=None):
+        """Per-day Comm Status counts for each value of a hierarchy column"""
+        if column not in self.attributes.columns:
+            raise ValueError(f"Column {column} not stored in history (available: {list(self.attributes.columns)})")
+        dates, matrix = self.status_matrix(start_date, end_date)
+        groups = self.attributes[column].reindex(range(self.n_meters))
+        group_codes, group_names = pd.factorize(groups)
+        valid = group_codes >= 0
+        n_groups = len(group_names)
+        n_codes = len(STATUS_LABELS)
+
+        rows = []
+        for date, day in zip(dates, matrix):
+            counts = np.bincount(group_codes[valid] * n_codes + day[valid], minlength=n_groups * n_codes)
+            counts = counts.reshape(n_groups, n_codes)
+            for g, name in enumerate(group_names):
+                row = {"Date": date, column: name}
+                for code, status in enumerate(COMM_STATUSES, start=1):
+                    row[status] = int(counts[g, code])
+                row["Total"] = int(counts[g, 1:].sum())
+                rows.append(row)
+        return pd.DataFrame(rows, columns=["Date", column] + COMM_STATUSES + ["Total"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the cross-day meter status history")
+    parser.add_argument("--base-path", default='/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting')
+    parser.add_argument("--dg", required=True, help="DG folder name, e.g. DG1")
+    parser.add_argument("--meter", help="Show history for one meter serial")
+    parser.add_argument("--group", choices=ATTRIBUTE_COLUMNS, help="Show per-day counts by hierarchy level")
+    parser.add_argument("--days", type=int, default=30, help="Look back this many recorded days")
+    args = parser.parse_args()
+
+    with history_lock(args.base_path, args.dg):
+        history = MeterStatusHistory.open(args.base_path, args.dg)
+    print(f"📚 {args.dg}: {history.n_meters} meters over {len(history.dates)} day(s)")
+    start_date = history.dates[-args.days] if len(history.dates) >= args.days else None
+
+    if args.meter:
+        print(json.dumps(history.meter_summary(args.meter, start_date=start_date), indent=2))
+        print(history.meter_history(args.meter, start_date=start_date).to_string(index=False))
+    if args.group:
+        print(history.group_history(args.group, start_date=start_date).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Status Transitions
+Day-over-day Comm Status transition matrix and changed-meter extracts, comparing a
+DG's Final_SLA_Report with the previous available day's
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import write_csv
+from output_archive import read_partition
+from sla_utils import COMM_STATUSES, REPORT_NAME
+from status_history import list_final_reports
+
+NEW_METER = "New Meter"
+FROM_STATUSES = COMM_STATUSES + [NEW_METER]
+HIERARCHY_LEVELS = ["Circle", "Division", "Subdivision"]
+EXTRACT_COLUMNS = ["Meter Serial No", "Circle", "Division", "Subdivision", "Gateway ID", "Sink ID", "Communicated At"]
+PREVIOUS_COLUMNS = ["Meter Serial No", "Comm Status", "Communicated At"]
+
+
+def find_previous_final_report(base_path, dg_name, date, report_name=REPORT_NAME):
+    """Return (date, path) of the latest Final report strictly before `date`, or (None, None)"""
+    earlier = [(d, p) for d, p in list_final_reports(base_path, dg_name, report_name) if d < date]
+    return earlier[-1] if earlier else (None, None)
+
+
+def read_previous_final(final_path):
+    """Read only the columns needed for the comparison (from the archive once the CSV was compacted away)"""
+    if Path(final_path).suffix == ".parquet":
+        return read_partition(final_path, PREVIOUS_COLUMNS)
+    return pd.read_csv(final_path, usecols=lambda c: c in PREVIOUS_COLUMNS, dtype=str)
+
+
+def join_previous_status(df_today, df_previous):
+    """Attach 'Previous Status' (NEW_METER when absent yesterday) via factorised serial keys"""
+    today_serials = df_today["Meter Serial No"].astype(str).str.strip()
+    previous = df_previous.drop_duplicates(subset="Meter Serial No")
+    previous_serials = previous["Meter Serial No"].astype(str).str.strip()
+
+    # Encode both days' serials into one integer key space, then join by array indexing
+    codes, uniques = pd.factorize(pd.concat([today_serials, previous_serials], ignore_index=True))
+    today_codes = codes[:len(today_serials)]
+    previous_codes = codes[len(today_serials):]
+
+    status_lookup = np.full(len(uniques), len(COMM_STATUSES), dtype=np.int8)  # default: NEW_METER
+    status_codes = pd.Categorical(previous["Comm Status"], categories=COMM_STATUSES).codes
+    known = status_codes >= 0
+    status_lookup[previous_codes[known]] = status_codes[known]
+
+    previous_status = np.array(FROM_STATUSES, dtype=object)[status_lookup[today_codes]]
+
+    comm_lookup = None
+    if "Communicated At" in previous.columns:
+        comm_lookup = np.full(len(uniques), None, dtype=object)
+        comm_lookup[previous_codes] = previous["Communicated At"].to_numpy(dtype=object)
+
+    result = df_today.copy()
+    result["Previous Status"] = previous_status
+    if comm_lookup is not None:
+        result["Previous Communicated At"] = comm_lookup[today_codes]
+    return result
+
+
+def build_transition_matrix(df_joined):
+    """3x3 (+ New Meter row) transition counts for Overall / Circle / Division / Subdivision"""
+    frames = []
+    keys = [("Overall", None)] + [(f"By {level}", level) for level in HIERARCHY_LEVELS if level in df_joined.columns]
+    for category, level in keys:
+        group_cols = ([level] if level else []) + ["Previous Status", "Comm Status"]
+        counts = df_joined.groupby(group_cols, observed=True).size().unstack("Comm Status", fill_value=0)
+        counts = counts.reindex(columns=COMM_STATUSES, fill_value=0)
+        if level:
+            full_index = pd.MultiIndex.from_product(
+                [counts.index.get_level_values(level).unique(), FROM_STATUSES], names=[level, "Previous Status"])
+        else:
+            full_index = pd.Index(FROM_STATUSES, name="Previous Status")
+        counts = counts.reindex(full_index, fill_value=0).reset_index()
+        counts["Total"] = counts[COMM_STATUSES].sum(axis=1)
+        counts.insert(0, "Category", category)
+        frames.append(counts)
+
+    matrix = pd.concat(frames, ignore_index=True)
+    for level in HIERARCHY_LEVELS:
+        if level not in matrix.columns:
+            matrix[level] = ""
+        matrix[level] = matrix[level].astype(object).fillna("")
+    matrix = matrix.rename(columns={"Previous Status": "From Status"})
+    return matrix[["Category"] + HIERARCHY_LEVELS + ["From Status"] + COMM_STATUSES + ["Total"]]
+
+
+def changed_meters(df_joined):
+    """Only meters whose status differs from the previous day, plus new meters"""
+    changed = df_joined[df_joined["Previous Status"] != df_joined["Comm Status"]]
+    cols = [c for c in EXTRACT_COLUMNS if c in changed.columns]
+    extract = changed[cols].copy()
+    extract.insert(len(cols), "Previous Status", changed["Previous Status"])
+    extract.insert(len(cols) + 1, "Comm Status", changed["Comm Status"])
+    if "Previous Communicated At" in changed.columns:
+        extract["Previous Communicated At"] = changed["Previous Communicated At"]
+    extract["Change"] = changed["Previous Status"] + " → " + changed["Comm Status"]
+    return extract.sort_values(["Change", "Meter Serial No"]).reset_index(drop=True)
+
+
+def build_transition_reports(df_final, df_previous, previous_date):
+    """(transition matrix, changed-meter extract, JSON-ready summary) against the previous day's statuses"""
+    df_joined = join_previous_status(df_final, df_previous)
+    matrix = build_transition_matrix(df_joined)
+    extract = changed_meters(df_joined)
+
+    overall = matrix[matrix["Category"] == "Overall"].set_index("From Status")
+    summary = {
+        "previous_date": previous_date,
+        "changed_meters": int(len(extract)),
+        "dropped_meters": int((~df_previous["Meter Serial No"].astype(str).str.strip()
+                               .isin(df_final["Meter Serial No"].astype(str).str.strip())).sum()),
+        "matrix": {status: {c: int(overall.loc[status, c]) for c in COMM_STATUSES} for status in FROM_STATUSES},
+    }
+    return matrix, extract, summary
+
+
+def save_transition_reports(matrix, extract, dg_name, date, previous_date, output_dir):
+    matrix_path = Path(output_dir) / f"Status_Transitions_{dg_name}_{date}.csv"
+    write_csv(matrix, matrix_path, index=False)
+    extract_path = Path(output_dir) / f"Status_Changes_{dg_name}_{date}.csv"
+    write_csv(extract, extract_path, index=False)
+    print(f"✨ Status transitions vs {previous_date}: {matrix_path.name}, {extract_path.name} ({len(extract)} changed)")
+    return matrix_path, extract_path
+
+
+def write_transition_reports(df_final, df_previous, dg_name, date, previous_date, output_dir):
+    """Write the transition matrix and changed-meter extract; returns a JSON-ready summary"""
+    matrix, extract, summary = build_transition_reports(df_final, df_previous, previous_date)
+    save_transition_reports(matrix, extract, dg_name, date, previous_date, output_dir)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a DG's Final report with the previous available day")
+    parser.add_argument("--base-path", default='/Users/rishubatra/Library/CloudStorage/OneDrive-SharedLibraries-SinhalUdyogpvtltd/Communication site - Daily_SLA_Reporting')
+    parser.add_argument("--date", required=True)
+    parser.add_argument("--dg", required=True)
+    args = parser.parse_args()
+
+    base_path = Path(args.base_path)
+    output_dir = base_path / args.date / REPORT_NAME / args.dg / "output"
+    final_path = output_dir / f"Final_SLA_Report_{args.date}.csv"
+    if not final_path.exists():
+        print(f"❌ Final_SLA_Report not found at {final_path}")
+        return
+
+    previous_date, previous_path = find_previous_final_report(base_path, args.dg, args.date)
+    if previous_path is None:
+        print(f"⚠️ No earlier Final_SLA_Report for {args.dg} - nothing to compare")
+        return
+
+    usecols = set(EXTRACT_COLUMNS + PREVIOUS_COLUMNS)
+    df_final = pd.read_csv(final_path, usecols=lambda c: c in usecols, dtype=str)
+    write_transition_reports(df_final, read_previous_final(previous_path), args.dg, args.date, previous_date, output_dir)
+
+
+if __name__ == "__main__":
+    main()
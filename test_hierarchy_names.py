@@ -0,0 +1,19 @@
+import pandas as pd
+
+from hierarchy_names import HierarchyAliases, aliases_path, canonical_spelling
+
+
+def test_canonical_spelling_ignores_frequency(tmp_path):
+    aliases = HierarchyAliases.open(tmp_path)
+    values = pd.Series(["sd-a "] * 206 + ["SD-A"] * 202 + ["sd-b"] * 3)
+    resolved = aliases.resolve(values, "Subdivision")
+    assert set(resolved) == {"SD-A", "SD-B"}
+    assert canonical_spelling({"Circle N", "circle n"}) == "Circle N"
+
+
+def test_stored_lowercase_canonical_is_corrected(tmp_path):
+    path = aliases_path(tmp_path)
+    path.parent.mkdir(parents=True)
+    path.write_text("Level,Name,Canonical,Source\nSubdivision,sd-a,sd-a,auto\nSubdivision,SD-A,sd-a,auto\n")
+    aliases = HierarchyAliases.open(tmp_path)
+    assert aliases.resolve(pd.Series(["sd-a"]), "Subdivision").tolist() == ["SD-A"]
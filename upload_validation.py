@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Upload Validation
+Header-only checks of many date/DG raw_data folders at once (--validate-only). Excel
+headers are read straight from the workbook XML, stopping after the first row, so no
+workbook is fully loaded
+"""
+
+import json
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from atomic_io import write_json
+from sla_utils import REPORT_NAME
+
+VALIDATION_FOLDER = "_validation"
+MAX_WORKERS = 8
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _first_sheet_path(z):
+    """Zip member of the first sheet in workbook order (what pd.read_excel reads by default)"""
+    try:
+        workbook = ET.fromstring(z.read("xl/workbook.xml"))
+        first = workbook.find(f"{_MAIN_NS}sheets/{_MAIN_NS}sheet")
+        rel_id = first.get(f"{_REL_NS}id")
+        rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+        for rel in rels.iter(f"{_PKG_REL_NS}Relationship"):
+            if rel.get("Id") == rel_id:
+                target = rel.get("Target").lstrip("/")
+                return target if target.startswith("xl/") else f"xl/{target}"
+    except (KeyError, AttributeError, ET.ParseError):
+        pass
+    sheets = sorted(n for n in z.namelist() if n.startswith("xl/worksheets/sheet"))
+    return sheets[0]
+
+
+def _shared_strings(z, wanted):
+    """Only the shared strings with the given indices, stopping once the highest is read"""
+    if not wanted or "xl/sharedStrings.xml" not in z.namelist():
+        return {}
+    last = max(wanted)
+    found = {}
+    index = 0
+    for _, el in ET.iterparse(z.open("xl/sharedStrings.xml"), events=("end",)):
+        if el.tag != f"{_MAIN_NS}si":
+            continue
+        if index in wanted:
+            found[index] = "".join(t.text or "" for t in el.iter(f"{_MAIN_NS}t"))
+        el.clear()
+        if index >= last:
+            break
+        index += 1
+    return found
+
+
+def peek_xlsx_header(path):
+    """Column names from the first row of the first sheet of an .xlsx file"""
+    with zipfile.ZipFile(path) as z:
+        row = None
+        for _, el in ET.iterparse(z.open(_first_sheet_path(z)), events=("end",)):
+            if el.tag == f"{_MAIN_NS}row":
+                row = el
+                break
+        if row is None:
+            return []
+
+        cells = []
+        for c in row.iter(f"{_MAIN_NS}c"):
+            kind = c.get("t")
+            if kind == "inlineStr":
+                cells.append(("text", "".join(t.text or "" for t in c.iter(f"{_MAIN_NS}t"))))
+            else:
+                v = c.find(f"{_MAIN_NS}v")
+                cells.append(("shared" if kind == "s" else "text", v.text if v is not None else None))
+
+        strings = _shared_strings(z, {int(v) for kind, v in cells if kind == "shared" and v is not None})
+        names = [strings.get(int(v)) if kind == "shared" and v is not None else v for kind, v in cells]
+        return [n for n in names if n not in (None, "")]
+
+
+def peek_header(path):
+    """Header of a raw file without loading it: csv first line, xlsx first row (falls back to pandas)"""
+    path = Path(path)
+    if path.suffix.lower() == ".xlsx":
+        try:
+            return peek_xlsx_header(path)
+        except (zipfile.BadZipFile, KeyError, IndexError, ET.ParseError):
+            pass
+    if path.suffix.lower() in [".xlsx", ".xls"]:
+        return pd.read_excel(path, nrows=0).columns.tolist()
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def find_upload_folders(base_path, dates, report_name=REPORT_NAME):
+    """[(date, dg, raw_dir)] for every DG folder with a raw_data subfolder on the given dates"""
+    folders = []
+    for date in dates:
+        report_folder = Path(base_path) / date / report_name
+        if not report_folder.exists():
+            continue
+        for dg_folder in sorted(report_folder.iterdir()):
+            if (dg_folder / "raw_data").is_dir():
+                folders.append((date, dg_folder.name, dg_folder / "raw_data"))
+    return folders
+
+
+def validate_folder(reporter, date, dg_name, raw_dir):
+    """Filename and column checks for one raw_data folder, as a JSON-ready dict"""
+    result = {"date": date, "dg": dg_name, "raw_dir": str(raw_dir), "passed": False,
+              "missing_files": [], "unexpected_files": [], "files": []}
+    try:
+        if not any(raw_dir.iterdir()):
+            result["error"] = "raw_data folder is empty"
+            return result
+        result["missing_files"], result["unexpected_files"] = reporter.check_filenames(raw_dir)
+        result["files"] = reporter.check_columns(raw_dir)
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    result["passed"] = (not result["missing_files"] and not result["unexpected_files"]
+                        and all(not f["missing_columns"] and not f["error"] for f in result["files"]))
+    return result
+
+
+def validate_many(reporter, folders, max_workers=MAX_WORKERS):
+    """Validate folders concurrently (the work is file I/O and XML parsing of a few KB each)"""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(lambda f: validate_folder(reporter, *f), folders))
+
+
+def print_validation_table(results):
+    print(f"\n{'='*78}")
+    print(f"{'Date':<12}{'DG':<8}{'Result':<8}Issues")
+    print(f"{'-'*78}")
+    for r in results:
+        issues = []
+        if r.get("error"):
+            issues.append(r["error"])
+        if r["missing_files"]:
+            issues.append(f"missing files: {', '.join(r['missing_files'])}")
+        if r["unexpected_files"]:
+            issues.append(f"unexpected files: {', '.join(r['unexpected_files'])}")
+        for f in r["files"]:
+            if f["error"]:
+                issues.append(f"{f['file']}: unreadable ({f['error']})")
+            elif f["missing_columns"]:
+                issues.append(f"{f['file']}: missing columns {', '.join(f['missing_columns'])}")
+        status = "✅ PASS" if r["passed"] else "❌ FAIL"
+        print(f"{r['date']:<12}{r['dg']:<8}{status:<8}{'; '.join(issues)}")
+    print(f"{'='*78}")
+    passed = sum(r["passed"] for r in results)
+    print(f"{passed}/{len(results)} folder(s) passed")
+
+
+def write_validation_json(base_path, dates, results, elapsed):
+    out_dir = Path(base_path) / VALIDATION_FOLDER
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"Validation_{min(dates)}_to_{max(dates)}.json"
+    write_json({
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "dates": sorted(dates),
+        "folders": len(results),
+        "passed": sum(r["passed"] for r in results),
+        "seconds": round(elapsed, 2),
+        "results": results,
+    }, path, ensure_ascii=False, indent=2)
+    return path